@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query
+from typing import Literal, Optional
+from app.services.analytics import analytics, view_stats
+
+router = APIRouter()
+
+KINDS = ("projects", "certificates", "cv")
+
+
+@router.get("/stats")
+async def get_view_stats(
+    kind: Optional[Literal["projects", "certificates", "cv"]] = None,
+    days: int = Query(30, ge=1, le=366, description="UTC days to sum, including today"),
+    limit: int = Query(10, ge=1, le=100, description="Most viewed items per kind"),
+):
+    stats = await view_stats((kind,) if kind else KINDS, days, limit)
+    # Hits not flushed yet are reported separately, not added to the totals
+    return {**stats, "buffer": analytics.stats()}
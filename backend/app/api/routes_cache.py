@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from app.core.cache import response_cache
+from app.core.replica import replica
+from app.core.tenancy import tenant_registry
+from app.services.cache_sync import version_watcher
+
+router = APIRouter()
+
+
+@router.get("/stats")
+async def get_cache_stats():
+    return {
+        **response_cache.stats(),
+        "sync": version_watcher.stats(),
+        "replica": replica.stats(),
+        "tenants": tenant_registry.stats(),
+    }
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Query, Request, Response
+from typing import Literal
+from app.core.cache import CACHE_CONTROL, etag_matches
+from app.services.analytics import analytics
+from app.services.cv import cv_builder
+
+router = APIRouter()
+
+MEDIA_TYPES = {"pdf": "application/pdf", "json": "application/json"}
+
+
+@router.get("/get")
+async def get_cv(
+    request: Request,
+    format: Literal["pdf", "json"] = Query("pdf", description="pdf, or json for a JSON Resume document"),
+):
+    document = await cv_builder.get()
+    # Content based, so every worker agrees on it
+    etag = f'"{document.digest[:20]}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    # Revalidations are not downloads
+    analytics.hit("cv", format)
+    if format == "pdf":
+        headers["Content-Disposition"] = 'inline; filename="cv.pdf"'
+        return Response(content=document.pdf, media_type=MEDIA_TYPES[format], headers=headers)
+    return Response(content=document.resume, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.get("/status")
+async def get_cv_status():
+    return {"section_renders": cv_builder.section_renders, "document_builds": cv_builder.document_builds}
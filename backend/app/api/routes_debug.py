@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.core.profiling import PROFILE_TOKEN, profile_store, token_matches
+
+
+def require_token(x_debug_token: Optional[str] = Header(None)):
+    # X-Debug-Token carries the PROFILE_TOKEN; without one the routes do not exist
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(x_debug_token):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+router = APIRouter(dependencies=[Depends(require_token)])
+
+
+@router.get("/slow")
+async def get_slow_requests():
+    # Newest first
+    return {"requests": list(reversed(profile_store.slow))}
+
+
+@router.get("/profiles")
+async def get_profiles():
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    # Folded stacks, for flamegraph.pl or speedscope
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        profile.folded(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'},
+    )
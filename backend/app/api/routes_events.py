@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.core.events import published_collections
+from app.services.broadcaster import change_broadcaster
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_changes(
+    collections: Optional[str] = Query(None, description="Comma separated collections to follow, e.g. projects,tech_stacks; default all"),
+    last_event_id: Optional[str] = Header(None),
+):
+    wanted = frozenset(name.strip() for name in collections.split(",") if name.strip()) if collections else frozenset()
+    unknown = wanted - published_collections()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(sorted(unknown))}")
+    client = change_broadcaster.connect(wanted, last_event_id)
+    if client is None:
+        raise HTTPException(status_code=503, detail="Too many open event streams", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        change_broadcaster.stream(client),
+        media_type="text/event-stream",
+        # No buffering by nginx, no caching anywhere
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats")
+async def get_stream_stats():
+    return change_broadcaster.stats()
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from app.db.database import mongo
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def live():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    # Ready only after indexes exist and hot data is cached (see main.lifespan)
+    if not mongo.ready:
+        raise HTTPException(status_code=503, detail="Starting up")
+    try:
+        await mongo.ping()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e}")
+    return {"status": "ready"}
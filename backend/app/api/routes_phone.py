@@ -1,34 +1,36 @@
-from fastapi import APIRouter
-from app.db.database import db
-from app.schemas.phone_schema import Phone, PhoneUpdate
-from bson import ObjectId
+from fastapi import HTTPException
+from app.core.codec import document_serializer
+from app.core.crud import CrudResource, crud_router, parse_object_id
+from app.core.query import CollectionSpec
+from app.schemas.phone_schema import Phone, PhoneOut, PhoneUpdate
 
-router = APIRouter()
+def prepare_phone(phone: Phone) -> dict:
+    return phone.model_dump(exclude_unset=True)
 
-@router.get("/get")
-async def get_phones():
-    phones = await db.phones.find().to_list(100)
-    result = []
-    for phone in phones:
-        phone["id"] = str(phone["_id"])
-        del phone["_id"]  # This is important
-        result.append(phone)
-    return result
+PHONE = CrudResource(
+    collection="phones",
+    schema=Phone,
+    prepare=prepare_phone,
+    serialize=document_serializer(),
+    response_model=PhoneOut,
+    query=CollectionSpec(sort_fields={"number": "number"}, fields=("number",)),
+    label="Phone",
+)
 
-@router.post("/post")
-async def create_phone(phone: Phone):
-    result = await db.phones.insert_one(phone.model_dump())
-    return {"id": str(result.inserted_id), **phone.model_dump()}
+router = crud_router(PHONE)
 
+# ───── Original phone routes, kept for existing clients ─────
 @router.put("/{phone_id}/put")
 async def update_phone(phone: PhoneUpdate):
-    await db.phones.update_one({"_id": ObjectId(phone.id)}, {"$set": {"number": phone.number}})
+    await PHONE.update({"_id": parse_object_id(phone.id)}, {"number": phone.number})
     return {"msg":"updated successfully", "id": phone.id, "number": phone.number}
 
 @router.delete("/{phone_id}/delete")
 async def delete_phone(phone_id: str):
-    result = await db.phones.delete_one({"_id": ObjectId(phone_id)})
-    if result.deleted_count == 1:
-        return {"msg": "Phone deleted successfully"}
-    else:
-        return {"msg": "Phone not found"}
\ No newline at end of file
+    try:
+        await PHONE.delete(phone_id)
+    except HTTPException as e:
+        if e.status_code != 404:
+            raise
+        return {"msg": "Phone not found"}
+    return {"msg": "Phone deleted successfully"}
@@ -0,0 +1,132 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Literal, Optional
+import asyncio
+from app.api.routes_personal import PERSONAL
+from app.api.routes_education import EDUCATION
+from app.api.routes_experience import EXPERIENCE
+from app.api.routes_project import PROJECT
+from app.api.routes_skill import load_tech_icons
+from app.api.routes_certificate import CERTIFICATE
+from app.api.routes_phone import PHONE
+from app.core.bulk import validate_import, import_section, export_section
+from app.core.cache import cached_response, prime
+from app.core.codec import CodecJSONResponse
+from app.schemas.bulk_schema import PortfolioImport
+from app.core.query import ListQuery, MAX_PAGE_SIZE
+
+router = APIRouter()
+
+# Section name -> loader; keys match the payload keys of the combined document
+SECTIONS = {
+    "personal": PERSONAL.load,
+    "educations": EDUCATION.load,
+    "experiences": EXPERIENCE.load,
+    "projects": PROJECT.load,
+    "skills": load_tech_icons,
+    "certificates": CERTIFICATE.load,
+}
+
+# Section name -> MongoDB collection it reads, used to tag cached responses
+SECTION_COLLECTIONS = {
+    "personal": "personal",
+    "educations": "educations",
+    "experiences": "experiences",
+    "projects": "projects",
+    "skills": "tech_stacks",
+    "certificates": "certificates",
+}
+
+# Sections carried by /export and accepted by /import. Skill icons are binary
+# uploads and go through /skills/post instead.
+TRANSFER_SECTIONS = {
+    "personal": PERSONAL,
+    "educations": EDUCATION,
+    "experiences": EXPERIENCE,
+    "projects": PROJECT,
+    "certificates": CERTIFICATE,
+    "phones": PHONE,
+}
+
+
+def parse_sections(sections: Optional[str]) -> list[str]:
+    if not sections:
+        return list(SECTIONS)
+
+    requested = [name.strip() for name in sections.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown section(s): {', '.join(unknown)}")
+
+    # Keep order stable and drop duplicates
+    return [name for name in SECTIONS if name in requested]
+
+
+def portfolio_loader(names: list[str]):
+    async def load():
+        # All collections are queried concurrently, so the request costs one
+        # round trip plus the slowest query instead of the sum of all of them
+        params = ListQuery(limit=MAX_PAGE_SIZE)
+        pages = await asyncio.gather(*(SECTIONS[name](params) for name in names))
+        portfolio = {name: page.items for name, page in zip(names, pages)}
+
+        # Sections larger than one page continue through their own /get endpoint
+        next_cursors = {name: page.next_cursor for name, page in zip(names, pages) if page.next_cursor}
+        if next_cursors:
+            portfolio["next_cursors"] = next_cursors
+        return portfolio
+
+    return load
+
+
+def portfolio_cache_args(names: list[str]):
+    tags = tuple(SECTION_COLLECTIONS[name] for name in names)
+    return f"portfolio:{','.join(names)}", tags, portfolio_loader(names)
+
+
+async def warm_portfolio():
+    # The full snapshot is what the site requests on every page load
+    await prime(*portfolio_cache_args(list(SECTIONS)))
+
+
+@router.get("/get")
+async def get_portfolio(request: Request, sections: Optional[str] = Query(None, description="Comma separated list of sections to include")):
+    names = parse_sections(sections)
+    return await cached_response(request, *portfolio_cache_args(names))
+
+
+@router.get("/export")
+async def export_portfolio():
+    sections = await asyncio.gather(*(export_section(target) for target in TRANSFER_SECTIONS.values()))
+    # Whole collections: encoded straight to bytes, skipping jsonable_encoder
+    return CodecJSONResponse(dict(zip(TRANSFER_SECTIONS, sections)))
+
+
+@router.post("/import")
+async def import_portfolio(
+    payload: PortfolioImport,
+    mode: Literal["merge", "replace"] = Query("merge", description="replace empties each provided section first"),
+    ordered: bool = Query(True, description="Stop each section at its first failed write"),
+):
+    provided = {name: docs for name in TRANSFER_SECTIONS if (docs := getattr(payload, name)) is not None}
+
+    # Everything is validated before anything is written. Replacing then
+    # runs in a transaction where MongoDB has them, else writes the new
+    # documents before removing the old ones; either way a failed write
+    # never leaves a section emptied
+    validated, errors = {}, {}
+    for name, documents in provided.items():
+        docs, section_errors = validate_import(TRANSFER_SECTIONS[name], documents)
+        if section_errors:
+            errors[name] = section_errors
+        validated[name] = docs
+    if len(provided.get("personal") or []) > 1:
+        errors.setdefault("personal", []).append({"index": 1, "error": "Only one personal document is allowed"})
+    if errors:
+        raise HTTPException(status_code=422, detail={"errors": errors})
+
+    # Personal information is a single document, so importing it always replaces it
+    results = await asyncio.gather(*(
+        import_section(TRANSFER_SECTIONS[name], docs, ordered, replace=mode == "replace" or name == "personal")
+        for name, docs in validated.items()
+    ))
+    return {"mode": mode, "ordered": ordered, "sections": dict(zip(validated, results))}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.services.search import search_index, INDEXED_FIELDS
+
+router = APIRouter()
+
+
+def parse_collections(collections: Optional[str]):
+    if not collections:
+        return None
+    names = {name.strip() for name in collections.split(",") if name.strip()}
+    unknown = names - set(INDEXED_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collection(s): {', '.join(sorted(unknown))}")
+    return names
+
+
+async def require_index():
+    try:
+        await search_index.ensure_built()
+    except Exception as e:
+        print(f"Search index build failed: {e}")
+    if not search_index.ready:
+        raise HTTPException(status_code=503, detail="Search index is still loading")
+
+
+@router.get("/get")
+async def search(
+    q: str = Query("", max_length=200, description="Full-text query; the last word also matches as a prefix"),
+    collections: Optional[str] = Query(None, description="Comma separated subset of projects, experiences, certificates"),
+    technology: Optional[str] = Query(None, description="Only projects using this technology"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    await require_index()
+    return search_index.search(q, parse_collections(collections), technology, limit)
+
+
+@router.get("/facets")
+async def get_facets():
+    await require_index()
+    return search_index.facet_counts()
@@ -1,44 +1,197 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request, Response
 from app.db.database import db
+from app.db.blob_store import CHUNK_SIZE, store_blob, store_blob_file, get_blob_meta, iter_blob
+from app.core.cache import cached_response
+from app.schemas.skill_schema import SkillOut, SkillUploadOut
+from app.core.events import publish_change, register_collection
+from app.core.query import CollectionSpec, ListQuery, list_query, fetch_page, stream_page
+from app.core.replica import replica, snapshot_page, snapshot_stream
+from app.core.workers import run_in_process
+from app.services.image_pipeline import ALLOWED_FORMATS, process_image, InvalidImage
+from typing import Optional
+import asyncio
 import base64
+import hashlib
+import tempfile
 from fastapi.responses import StreamingResponse
-from io import BytesIO
 from bson import ObjectId
 
 
 router = APIRouter()
 
-@router.post("/post")
+# Image URLs carry the content hash, so a given URL never changes content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Icons are served from the API origin: opened directly, nothing in them
+# may run or be sniffed into something that does
+IMAGE_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; sandbox",
+}
+# Shortest ?v= that pins the immutable cache policy; image URLs carry 16 hex characters
+MIN_VERSION_LENGTH = 16
+RASTER_TYPES = set(ALLOWED_FORMATS.values()) | {f"image/{fmt}" for fmt in ("webp", "png")}
+
+
+def image_headers(content_type: str) -> dict:
+    headers = dict(IMAGE_SECURITY_HEADERS)
+    # Legacy icons kept the type the client sent, which may be markup
+    if content_type not in RASTER_TYPES:
+        headers["Content-Disposition"] = "attachment"
+    return headers
+
+SKILL_QUERY = CollectionSpec(
+    sort_fields={"name": "name"},
+    fields=("name", "image_filename", "content_type"),
+    # Needed to build image_url and image_sizes
+    required_fields=("image_hash", "variants"),
+    excluded_fields=("image_data",),
+)
+replica.register("tech_stacks", SKILL_QUERY)
+register_collection("tech_stacks")
+
+
+def image_url(doc) -> str:
+    url = f"/skills/{doc['_id']}/image"
+    if doc.get("image_hash"):
+        url += f"?v={doc['image_hash'][:16]}"
+    return url
+
+
+async def store_variants(variants: dict) -> dict:
+    # {"64": {"webp": bytes, ...}} -> {"64": {"webp": sha256, ...}}, stored concurrently
+    keys = [(size, fmt) for size, formats in variants.items() for fmt in formats]
+    hashes = await asyncio.gather(*(
+        store_blob(variants[size][fmt], f"image/{fmt}") for size, fmt in keys
+    ))
+    stored = {}
+    for (size, fmt), blob_hash in zip(keys, hashes):
+        stored.setdefault(size, {})[fmt] = blob_hash
+    return stored
+
+
+def pick_variant(doc, size: int, fmt: str):
+    variants = doc.get("variants") or {}
+    if not variants:
+        return None
+    # Smallest variant that covers the requested size, else the largest one
+    sizes = sorted(int(s) for s in variants)
+    chosen = next((s for s in sizes if s >= size), sizes[-1])
+    return variants[str(chosen)][fmt]
+
+
+@router.post("/post", response_model=SkillUploadOut)
 async def upload_icon(name: str, file: UploadFile = File(...)):
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type")
+    # Hash and spool the upload in chunks, so the API process never holds it whole;
+    # only the worker decodes it, from the spooled file
+    with tempfile.NamedTemporaryFile(prefix="icon-") as spool:
+        digest = hashlib.sha256()
+        size = 0
+        while chunk := await file.read(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            await asyncio.to_thread(spool.write, chunk)
+        spool.flush()
+
+        # Decode, validate and resize off the event loop
+        try:
+            processed = await run_in_process(process_image, spool.name)
+        except InvalidImage as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    # Read file content
-    content = await file.read()
+        # Store raw bytes once per distinct image, keyed by SHA-256
+        spool.seek(0)
+        image_hash = await store_blob_file(spool, digest.hexdigest(), size, processed["content_type"])
 
-    # Encode image to base64 string
-    encoded = base64.b64encode(content).decode("utf-8")
+    variants = await store_variants(processed["variants"])
 
-    # Save to MongoDB
-    result = await db.tech_stacks.insert_one({
+    # Save metadata to MongoDB
+    doc = {
         "name": name,
         "image_filename": file.filename,
-        "content_type": file.content_type,
-        "image_data": encoded
-    })
-
-    return {"id": str(result.inserted_id), "filename": file.filename}
-
-@router.get("/get")
-async def get_tech_icon():
-    icons = []
-    async for doc in db.tech_stacks.find():
-        image_bytes = base64.b64decode(doc["image_data"])
-        icons.append({
-            "id": str(doc["_id"]),
-            "name": doc.get("name", "Unnamed"),
-            "content_type": doc["content_type"],
-            "image_data": f"data:{doc['content_type']};base64,{doc['image_data']}"
-        })
-
-    return icons
\ No newline at end of file
+        "content_type": processed["content_type"],
+        "image_hash": image_hash,
+        "size": size,
+        "width": processed["width"],
+        "height": processed["height"],
+        "variants": variants,
+    }
+    result = await db.tech_stacks.insert_one(doc)
+    replica.put("tech_stacks", doc)
+    await publish_change("tech_stacks", "create", str(result.inserted_id))
+
+    return {"id": str(result.inserted_id), "filename": file.filename, "image_hash": image_hash}
+
+def serialize_icon(doc):
+    icon = {"id": str(doc["_id"])}
+    # Only the fields that were loaded, so ?fields= trims the payload
+    for field in SKILL_QUERY.fields:
+        if field in doc:
+            icon[field] = doc[field]
+    icon["image_url"] = image_url(doc)
+    icon["image_sizes"] = sorted(int(size) for size in doc.get("variants") or {})
+    return icon
+
+async def load_tech_icons(params: ListQuery = ListQuery()):
+    # Metadata only; legacy base64 payloads are never read for the list
+    snapshot = replica.snapshot("tech_stacks")
+    if snapshot is not None:
+        return snapshot_page(snapshot, SKILL_QUERY, params, serialize_icon)
+    return await fetch_page(db.tech_stacks, SKILL_QUERY, params, serialize_icon)
+
+@router.get("/get", response_model=list[SkillOut])
+async def get_tech_icon(request: Request, params: ListQuery = Depends(list_query)):
+    if params.stream:
+        snapshot = replica.snapshot("tech_stacks")
+        if snapshot is not None:
+            return snapshot_stream(snapshot, SKILL_QUERY, params, serialize_icon)
+        return stream_page(db.tech_stacks, SKILL_QUERY, params, serialize_icon)
+    return await cached_response(request, f"tech_stacks?{params.cache_key()}", ("tech_stacks",), lambda: load_tech_icons(params))
+
+@router.get("/{id}/image")
+async def get_icon_image(
+    id: str,
+    request: Request,
+    v: Optional[str] = None,
+    size: Optional[int] = Query(None, gt=0, description="Longest edge in pixels; served from the closest stored variant"),
+    format: Optional[str] = Query(None, pattern="^(webp|png)$"),
+):
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+
+    doc = await db.tech_stacks.find_one({"_id": ObjectId(id)})
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Skill not found")
+
+    # Icons uploaded before binary storage still hold base64 inline
+    if not doc.get("image_hash"):
+        if not doc.get("image_data"):
+            raise HTTPException(status_code=404, detail="Image data not found")
+        return Response(
+            content=base64.b64decode(doc["image_data"]),
+            media_type=doc.get("content_type"),
+            headers=image_headers(doc.get("content_type")),
+        )
+
+    versioned = v is not None and len(v) >= MIN_VERSION_LENGTH and doc["image_hash"].startswith(v)
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL if versioned else "public, no-cache", **IMAGE_SECURITY_HEADERS}
+
+    blob_hash = doc["image_hash"]
+    if size is not None:
+        # Without an explicit format, prefer WebP when the client accepts it
+        if format is None:
+            format = "webp" if "image/webp" in request.headers.get("accept", "") else "png"
+            headers["Vary"] = "Accept"
+        blob_hash = pick_variant(doc, size, format) or blob_hash
+
+    etag = f'"{blob_hash}"'
+    headers["ETag"] = etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    meta = await get_blob_meta(blob_hash)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Image data not found")
+
+    headers["Content-Length"] = str(meta["size"])
+    headers.update(image_headers(meta["content_type"]))
+    return StreamingResponse(iter_blob(blob_hash), media_type=meta["content_type"], headers=headers)
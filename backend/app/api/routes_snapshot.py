@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from pathlib import Path
+from app.core.cache import CACHE_CONTROL, etag_matches
+from app.db.database import DEFAULT_TENANT, current_tenant
+from app.services.snapshots import ENCODINGS, SNAPSHOT_DIR, SNAPSHOTS, snapshot_builder
+
+router = APIRouter()
+
+# path -> (mtime_ns, size, content). Snapshots are small and few, so they are
+# kept in memory and re-read only when a rebuild replaces the file.
+_contents = {}
+
+
+def accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        # "gzip;q=0" explicitly refuses gzip
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def read_snapshot(path: Path, stat) -> bytes:
+    cached = _contents.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    content = path.read_bytes()
+    _contents[path] = (stat.st_mtime_ns, stat.st_size, content)
+    return content
+
+
+@router.get("/status")
+async def snapshot_status():
+    return {
+        "builds": snapshot_builder.builds,
+        "last_build": snapshot_builder.last_build,
+        "last_error": snapshot_builder.last_error,
+    }
+
+
+@router.get("/{name}.json")
+async def get_snapshot(name: str, request: Request):
+    # Static files from the last build; the same files nginx or a CDN can serve
+    if name not in SNAPSHOTS or current_tenant.get() != DEFAULT_TENANT:
+        raise HTTPException(status_code=404, detail="Unknown snapshot")
+
+    directory = Path(SNAPSHOT_DIR)
+    accepted = accepted_encodings(request)
+    path, encoding = directory / f"{name}.json", None
+    for candidate, suffix in ENCODINGS.items():
+        if candidate in accepted and (directory / f"{name}{suffix}").is_file():
+            path, encoding = directory / f"{name}{suffix}", candidate
+            break
+
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="Snapshot not built yet")
+
+    # Per-file validator, like nginx: each encoding has its own ETag
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=read_snapshot(path, stat), media_type="application/json", headers=headers)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from app.core.cache import cached_response
+from app.core.settings import settings
+from app.db.database import current_tenant
+from app.services.views import (
+    TECHNOLOGIES_VIEW, TIMELINE_KINDS, TIMELINE_VIEW, derived_views, load_technologies, load_technology, load_timeline,
+    view_refresher,
+)
+
+router = APIRouter()
+
+
+def parse_kinds(kind: Optional[str]) -> tuple:
+    if not kind:
+        return ()
+    kinds = sorted({name.strip() for name in kind.split(",") if name.strip()})
+    unknown = set(kinds) - set(TIMELINE_KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind(s): {', '.join(sorted(unknown))}")
+    return tuple(kinds)
+
+
+async def require_views():
+    if not settings.views_enabled:
+        raise HTTPException(status_code=404, detail="Derived views are turned off")
+    # Served as they are while a failed build waits for its retry
+    await derived_views.ensure_built()
+
+
+@router.get("/technologies")
+async def get_technologies(request: Request):
+    # Every technology with the projects and experiences using it, most used first
+    await require_views()
+    return await cached_response(request, "views/technologies", (TECHNOLOGIES_VIEW,), load_technologies)
+
+
+@router.get("/technologies/{name}")
+async def get_technology(name: str, request: Request):
+    await require_views()
+    key = name.strip().lower()
+    return await cached_response(request, f"views/technologies/{key}", (TECHNOLOGIES_VIEW,), lambda: load_technology(key))
+
+
+@router.get("/timeline")
+async def get_timeline(
+    request: Request,
+    kind: Optional[str] = Query(None, description="Comma separated subset of work, education, certificate"),
+):
+    # Experiences, educations and certificates in one list, newest first
+    await require_views()
+    kinds = parse_kinds(kind)
+    return await cached_response(request, f"views/timeline?{','.join(kinds)}", (TIMELINE_VIEW,), lambda: load_timeline(kinds))
+
+
+@router.get("/status")
+async def views_status():
+    # Collections written since the last refresh, not yet reflected
+    pending = view_refresher.pending.get(current_tenant.get(), {})
+    return {**derived_views.stats(), "pending": sorted(pending)}
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from fastapi import HTTPException
+from app.core.codec import encode
+from app.core.metrics import admission_rejections
+from app.core.settings import settings
+import math
+import time
+
+# Probes and scrapes are never throttled
+EXEMPT_PATHS = ("/health/", "/metrics")
+# Long-lived responses: rate limited on connect, capped on their own
+STREAM_PATHS = ("/events/stream",)
+# Buckets are kept for this many distinct clients per group; the least
+# recently seen one is forgotten (and starts again with a full bucket)
+MAX_TRACKED_CLIENTS = 10_000
+
+
+def parse_rate(value: str):
+    # "5/600" -> (5 tokens, refilled at 5 per 600 seconds); "" -> no limit
+    if not value or not value.strip():
+        return None
+    count, _, seconds = value.partition("/")
+    count, seconds = int(count), float(seconds or 1)
+    if count <= 0:
+        return None
+    return count, count / seconds
+
+
+def route_group(method: str, path: str):
+    if path.startswith(EXEMPT_PATHS) or method == "OPTIONS":
+        return None
+    if path.startswith(STREAM_PATHS):
+        return "stream"
+    if method in ("GET", "HEAD"):
+        return "read"
+    if path.startswith("/contact/"):
+        return "contact"
+    if path.startswith("/skills/"):
+        return "upload"
+    return "write"
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets: `capacity` requests at once, refilled
+    continuously at `rate` per second."""
+
+    def __init__(self, capacity: int, rate: float, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> [tokens, last refill]
+
+    def acquire(self, client: str) -> float:
+        # 0 when the request may go ahead, otherwise seconds until it could
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [float(self.capacity), now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+
+class AdmissionGroup:
+    def __init__(self, name: str, rate: str, max_in_flight: int, max_body: int, long_lived: bool = False):
+        self.name = name
+        parsed = parse_rate(rate)
+        self.limiter = TokenBucketLimiter(*parsed) if parsed else None
+        self.max_in_flight = max_in_flight
+        self.max_body = max_body
+        self.in_flight = 0
+        # Open streams would otherwise hold the global slots for good
+        self.long_lived = long_lived
+
+
+def default_groups() -> dict:
+    return {
+        "read": AdmissionGroup("read", settings.rate_limit_read, settings.max_in_flight_read, settings.max_body_read),
+        "write": AdmissionGroup("write", settings.rate_limit_write, settings.max_in_flight_write, settings.max_body_write),
+        "upload": AdmissionGroup("upload", settings.rate_limit_upload, settings.max_in_flight_upload, settings.max_body_upload),
+        "contact": AdmissionGroup("contact", settings.rate_limit_contact, settings.max_in_flight_contact, settings.max_body_contact),
+        "stream": AdmissionGroup("stream", settings.rate_limit_read, settings.sse_max_clients, settings.max_body_read, long_lived=True),
+    }
+
+
+class AdmissionMiddleware:
+    """Pure ASGI admission control, checked before any body is read.
+
+    Per route group (read, write, upload, contact, stream):
+    - a token bucket per client answers 429 once it is empty,
+    - an in-flight cap answers 503 instead of queueing, so a flood of
+      writes cannot take the slots (or the latency) of public reads,
+    - a body limit answers 413 from Content-Length, or while a chunked
+      body is still streaming in, before the handler has buffered it.
+    A global in-flight cap sits on top of the per-group ones, except for
+    the long-lived event streams.
+    """
+
+    def __init__(self, app, groups: dict = None, max_in_flight: int = None, trust_forwarded_for: bool = None):
+        self.app = app
+        self.groups = groups if groups is not None else default_groups()
+        self.max_in_flight = settings.max_in_flight if max_in_flight is None else max_in_flight
+        self.trust_forwarded_for = settings.admission_trust_forwarded_for if trust_forwarded_for is None else trust_forwarded_for
+        self.in_flight = 0
+
+    def client_id(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    # The proxy appends the address it saw last
+                    return value.decode("latin-1").rsplit(",", 1)[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def reject(self, send, group: str, reason: str, status: int, detail: str, retry_after: float = None):
+        admission_rejections.inc(group, reason)
+        body = encode({"detail": detail})
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(max(1, math.ceil(retry_after))).encode()))
+        if status == 413:
+            # The rest of the body is not read, so the connection cannot be reused
+            headers.append((b"connection", b"close"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.admission_enabled:
+            await self.app(scope, receive, send)
+            return
+        name = route_group(scope["method"], scope["path"])
+        group = self.groups.get(name)
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        if group.max_body:
+            for header, value in scope["headers"]:
+                if header == b"content-length":
+                    if value.isdigit() and int(value) > group.max_body:
+                        await self.reject(send, name, "body_size", 413, "Request body too large")
+                        return
+                    break
+
+        if group.limiter is not None:
+            wait = group.limiter.acquire(self.client_id(scope))
+            if wait:
+                await self.reject(send, name, "rate_limit", 429, "Too many requests", wait)
+                return
+
+        counted = not group.long_lived
+        if group.in_flight >= group.max_in_flight or (counted and self.in_flight >= self.max_in_flight):
+            await self.reject(send, name, "in_flight", 503, "Server busy, try again shortly", 1)
+            return
+
+        if group.max_body:
+            receive = self.limit_body(receive, name, group.max_body)
+
+        group.in_flight += 1
+        self.in_flight += counted
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.in_flight -= 1
+            self.in_flight -= counted
+
+    @staticmethod
+    def limit_body(receive, group: str, max_body: int):
+        # For bodies without (or with a lying) Content-Length. The handler's
+        # body or form parsing sees the exception and answers 413.
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    admission_rejections.inc(group, "body_size")
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        return limited_receive
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from pydantic import ValidationError
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from app.db.database import db, mongo
+from app.core.events import publish_change
+from app.core.replica import replica
+
+
+@dataclass(frozen=True)
+class BulkTarget:
+    collection: str
+    schema: type
+    # Validated model -> MongoDB document (same converter the /post handler uses)
+    prepare: object
+    # MongoDB document -> JSON-ready dict (same shape the /get handler returns)
+    serialize: object
+
+
+class BulkItemError(Exception):
+    def __init__(self, detail):
+        super().__init__(str(detail))
+        self.detail = detail
+
+
+def validate_document(target: BulkTarget, document) -> dict:
+    if document is None:
+        raise BulkItemError("document is required")
+    try:
+        return target.prepare(target.schema.model_validate(document))
+    except ValidationError as e:
+        raise BulkItemError(e.errors(include_url=False, include_context=False))
+
+
+def parse_id(value) -> ObjectId:
+    if not value or not ObjectId.is_valid(value):
+        raise BulkItemError("Invalid ID format")
+    return ObjectId(value)
+
+
+def build_operation(target: BulkTarget, item):
+    # Returns (pymongo operation, document id)
+    if item.op == "insert":
+        doc = validate_document(target, item.document)
+        doc["_id"] = parse_id(item.id) if item.id else ObjectId()
+        return InsertOne(doc), doc["_id"]
+
+    doc_id = parse_id(item.id)
+    if item.op == "update":
+        return UpdateOne({"_id": doc_id}, {"$set": validate_document(target, item.document)}), doc_id
+    return DeleteOne({"_id": doc_id}), doc_id
+
+
+async def execute(collection: str, operations: list, positions: list, ordered: bool, results: list) -> dict:
+    """Send operations in one bulk_write and record per-item outcomes.
+
+    positions[i] is the index in `results` of operations[i].
+    """
+    counts = {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0}
+    if not operations:
+        return counts
+
+    try:
+        outcome = (await db[collection].bulk_write(operations, ordered=ordered)).bulk_api_result
+    except BulkWriteError as e:
+        outcome = e.details
+        failed = {}
+        for error in outcome.get("writeErrors", []):
+            failed[error["index"]] = error
+            results[positions[error["index"]]].update(status="error", error=error.get("errmsg"), code=error.get("code"))
+
+        # Ordered writes stop at the first error; everything after it never ran
+        if ordered and failed:
+            first = min(failed)
+            for index in positions[first + 1:]:
+                results[index].update(status="skipped")
+
+    counts.update(
+        # Replacing imports upsert by id
+        inserted=outcome.get("nInserted", 0) + outcome.get("nUpserted", 0),
+        matched=outcome.get("nMatched", 0),
+        modified=outcome.get("nModified", 0),
+        deleted=outcome.get("nRemoved", 0),
+    )
+    return counts
+
+
+async def run_bulk(target: BulkTarget, request) -> dict:
+    results = [{"index": i, "op": item.op, "status": "ok"} for i, item in enumerate(request.operations)]
+    operations, positions = [], []
+
+    for i, item in enumerate(request.operations):
+        try:
+            operation, doc_id = build_operation(target, item)
+        except BulkItemError as e:
+            results[i].update(status="error", error=e.detail)
+            if request.ordered:
+                # Nothing after an invalid item runs in ordered mode
+                for result in results[i + 1:]:
+                    result.update(status="skipped")
+                break
+            continue
+        results[i]["id"] = str(doc_id)
+        operations.append(operation)
+        positions.append(i)
+
+    counts = await execute(target.collection, operations, positions, request.ordered, results)
+    if any(counts.values()):
+        await publish_change(target.collection, "bulk")
+    return {"ordered": request.ordered, **counts, "results": results}
+
+
+def validate_import(target: BulkTarget, documents: list) -> tuple:
+    # Validate a whole section up front; returns (documents, errors).
+    # Exported documents carry their id, which is kept so references survive.
+    docs, errors = [], []
+    for i, document in enumerate(documents):
+        try:
+            doc = validate_document(target, document)
+            doc["_id"] = parse_id(document["id"]) if document.get("id") else ObjectId()
+            docs.append(doc)
+        except BulkItemError as e:
+            errors.append({"index": i, "error": e.detail})
+    return docs, errors
+
+
+async def replace_in_transaction(collection: str, docs: list, results: list) -> dict:
+    # All or nothing: a failed insert rolls back the delete as well
+    counts = {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0}
+    try:
+        async with await mongo.connect().start_session() as session:
+            async with session.start_transaction():
+                deleted = await db[collection].delete_many({}, session=session)
+                inserted = await db[collection].bulk_write([InsertOne(doc) for doc in docs], ordered=True, session=session)
+        counts.update(inserted=inserted.inserted_count, deleted=deleted.deleted_count)
+    except BulkWriteError as e:
+        failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+        for i, result in enumerate(results):
+            if i in failed:
+                result.update(status="error", error=failed[i].get("errmsg"), code=failed[i].get("code"))
+            else:
+                result.update(status="skipped")
+    return counts
+
+
+async def replace_in_place(collection: str, docs: list, ordered: bool, results: list) -> dict:
+    # Without transactions the new documents are written first (over any
+    # with the same id) and the others removed only once all of them are
+    # in, so a failed write leaves the old documents rather than none
+    upserts = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs]
+    counts = await execute(collection, upserts, list(range(len(upserts))), ordered, results)
+    if all(result["status"] == "ok" for result in results):
+        kept = [doc["_id"] for doc in docs]
+        counts["deleted"] = (await db[collection].delete_many({"_id": {"$nin": kept}})).deleted_count
+    return counts
+
+
+async def import_section(target: BulkTarget, docs: list, ordered: bool, replace: bool) -> dict:
+    results = [{"index": i, "status": "ok", "id": str(doc["_id"])} for i, doc in enumerate(docs)]
+    if not replace:
+        inserts = [InsertOne(doc) for doc in docs]
+        counts = await execute(target.collection, inserts, list(range(len(inserts))), ordered, results)
+    elif await mongo.supports_transactions():
+        counts = await replace_in_transaction(target.collection, docs, results)
+    else:
+        counts = await replace_in_place(target.collection, docs, ordered, results)
+    if any(counts.values()):
+        await publish_change(target.collection, "bulk")
+    return {**counts, "results": results}
+
+
+async def export_section(target: BulkTarget) -> list:
+    snapshot = replica.snapshot(target.collection)
+    if snapshot is not None:
+        return [target.serialize(dict(doc)) for doc in snapshot.order("_id")[1]]
+    return [target.serialize(doc) async for doc in db[target.collection].find()]
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from fastapi import Request, Response
+from app.core.codec import encode
+from app.core.events import subscribe, version_token
+from app.core.query import Page
+from app.core.tenancy import TenantLocal, quota
+import hashlib
+import time
+from app.core.settings import settings
+
+CACHE_TTL_SECONDS = settings.cache_ttl_seconds
+CACHE_MAX_ENTRIES = settings.cache_max_entries
+# Let browsers and the CDN store responses but always revalidate with If-None-Match
+CACHE_CONTROL = settings.cache_control
+
+
+class ResponseCache:
+    """In-process LRU cache of serialized responses with a TTL.
+
+    Every entry is tagged with the collections it was built from, so a write
+    to one collection drops exactly the entries that read it. With a
+    `max_bytes` quota, least recently used entries are also evicted once the
+    cached bodies add up to more than that.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value, _ = entry
+        if expires_at < time.monotonic():
+            self.discard(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, tags: tuple, size: int = 0):
+        if self.max_bytes and size > self.max_bytes:
+            return
+        self.discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl, frozenset(tags), value, size)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+            _, (_, _, _, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+
+    def invalidate(self, tag: str):
+        stale = [key for key, (_, tags, _, _) in self._entries.items() if tag in tags]
+        for key in stale:
+            self.discard(key)
+        self.invalidations += len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# One cache per tenant, each within the tenant's byte quota
+response_cache = TenantLocal(lambda tenant: ResponseCache(max_bytes=quota(settings.tenant_cache_max_bytes)))
+
+
+@subscribe
+async def invalidate_on_change(event):
+    response_cache.invalidate(event.collection)
+
+
+def build_etag(key: str, tags: tuple) -> str:
+    # Strong validator: changes whenever any source collection is written
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    return f'"{digest}.{version_token(tags)}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore a W/ prefix added by proxies
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return etag in candidates
+
+
+async def load_entry(versioned_key: str, tags: tuple, loader):
+    data = await loader()
+    # Paged loaders hand back headers (next cursor) that must be replayed on hits
+    page_headers = {}
+    if isinstance(data, Page):
+        data, page_headers = data.items, data.headers
+    body = encode(data)
+    entry = (body, page_headers)
+    response_cache.set(versioned_key, entry, tags, len(body))
+    return entry
+
+
+async def prime(key: str, tags: tuple, loader):
+    # Fill the cache ahead of the first request (startup warm-up)
+    versioned_key = f"{key}@{build_etag(key, tags)}"
+    if response_cache.get(versioned_key) is None:
+        await load_entry(versioned_key, tags, loader)
+
+
+async def cached_response(request: Request, key: str, tags: tuple, loader) -> Response:
+    etag = build_etag(key, tags)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    # Client copy is still current: answer before touching the cache or MongoDB
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Entries are stored under their version token, so a body loaded while a
+    # write was in flight can never be served for the newer version
+    versioned_key = f"{key}@{etag}"
+    entry = response_cache.get(versioned_key)
+    headers["X-Cache"] = "HIT"
+    if entry is None:
+        headers["X-Cache"] = "MISS"
+        entry = await load_entry(versioned_key, tags, loader)
+
+    body, page_headers = entry
+    return Response(content=body, media_type="application/json", headers={**headers, **page_headers})
@@ -0,0 +1,56 @@
+from datetime import datetime
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from bson import Decimal128, ObjectId
+import base64
+import orjson
+import time
+from app.core.metrics import request_timings
+
+# datetime, date, UUID and dataclasses are encoded natively by orjson;
+# this only covers BSON types and the odd model that reaches a response.
+def encode_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode(content) -> bytes:
+    # One pass from Motor documents (or lists/dicts of them) to JSON bytes
+    timings = request_timings.get()
+    if timings is None:
+        return orjson.dumps(content, default=encode_default)
+    started = time.perf_counter()
+    body = orjson.dumps(content, default=encode_default)
+    timings.add_serialize(time.perf_counter() - started)
+    return body
+
+
+def document_serializer(*date_fields: str):
+    # MongoDB document -> API shape, in place: `_id` becomes a string `id`
+    # and the given datetime fields are narrowed to dates
+    def serialize(doc: dict) -> dict:
+        doc["id"] = str(doc.pop("_id"))
+        for field in date_fields:
+            value = doc.get(field)
+            if isinstance(value, datetime):
+                doc[field] = value.date()
+        return doc
+
+    return serialize
+
+
+class CodecJSONResponse(JSONResponse):
+    # Returned directly by handlers whose payload is already JSON-ready or raw
+    # Motor documents (the portfolio export); not the app default, so other
+    # routes still go through response_model validation
+    def render(self, content) -> bytes:
+        return encode(content)
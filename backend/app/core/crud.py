@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from pydantic import create_model
+from pymongo import ReturnDocument
+from bson import ObjectId
+from app.db.database import db
+from app.core.bulk import BulkTarget, run_bulk
+from app.core.cache import cached_response
+from app.core.events import publish_change, register_collection
+from app.core.query import CollectionSpec, ListQuery, list_query, fetch_page, stream_page
+from app.core.replica import replica, snapshot_page, snapshot_stream
+from app.schemas.bulk_schema import BulkRequest
+
+ALL_ROUTES = ("list", "get", "create", "update", "patch", "delete", "bulk")
+
+
+def parse_object_id(id: str) -> ObjectId:
+    if not ObjectId.is_valid(id):
+        raise HTTPException(status_code=400, detail="Invalid ID format")
+    return ObjectId(id)
+
+
+def partial_model(schema: type) -> type:
+    # Every field becomes optional for PATCH, but an explicit null is still
+    # only accepted where the full schema allows it
+    fields = {name: (field.annotation, None) for name, field in schema.model_fields.items()}
+    return create_model(f"{schema.__name__}Patch", **fields)
+
+
+@dataclass(frozen=True)
+class CrudResource(BulkTarget):
+    """A collection exposed through the standard CRUD routes.
+
+    `prepare` (validated model -> document) must only convert the fields
+    that are present, so the same converter serves create, PUT and PATCH.
+    """
+
+    response_model: type
+    query: CollectionSpec
+    # Used in messages, e.g. "Project not found"
+    label: str
+
+    def __post_init__(self):
+        replica.register(self.collection, self.query)
+        register_collection(self.collection)
+
+    # Reads use the in-memory replica when it holds a current snapshot
+    async def load(self, params: ListQuery = ListQuery()):
+        snapshot = replica.snapshot(self.collection)
+        if snapshot is not None:
+            return snapshot_page(snapshot, self.query, params, self.serialize)
+        return await fetch_page(db[self.collection], self.query, params, self.serialize)
+
+    def stream(self, params: ListQuery):
+        snapshot = replica.snapshot(self.collection)
+        if snapshot is not None:
+            return snapshot_stream(snapshot, self.query, params, self.serialize)
+        return stream_page(db[self.collection], self.query, params, self.serialize)
+
+    async def load_one(self, id: str) -> dict:
+        doc_id = parse_object_id(id)
+        snapshot = replica.snapshot(self.collection)
+        if snapshot is not None:
+            doc = snapshot.by_id.get(doc_id)
+            doc = dict(doc) if doc is not None else None
+        else:
+            doc = await db[self.collection].find_one({"_id": doc_id})
+        if doc is None:
+            raise HTTPException(status_code=404, detail=f"{self.label} not found")
+        return self.serialize(doc)
+
+    async def create(self, model) -> dict:
+        doc = self.prepare(model)
+        result = await db[self.collection].insert_one(doc)
+        replica.put(self.collection, doc)
+        await publish_change(self.collection, "create", str(result.inserted_id))
+        # insert_one added the _id, so the stored document is already at hand
+        return self.serialize(doc)
+
+    async def update(self, filter: dict, changes: dict) -> dict:
+        # One round trip: the updated document comes back with the write.
+        # Matching but unchanged documents are a success, not a 404.
+        collection = db[self.collection]
+        if changes:
+            doc = await collection.find_one_and_update(filter, {"$set": changes}, return_document=ReturnDocument.AFTER)
+        else:
+            doc = await collection.find_one(filter)
+        if doc is None:
+            raise HTTPException(status_code=404, detail=f"{self.label} not found")
+        if changes:
+            replica.put(self.collection, doc)
+            await publish_change(self.collection, "update", str(doc["_id"]))
+        return self.serialize(doc)
+
+    async def delete(self, id: str):
+        doc_id = parse_object_id(id)
+        result = await db[self.collection].delete_one({"_id": doc_id})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail=f"{self.label} not found")
+        replica.remove(self.collection, doc_id)
+        await publish_change(self.collection, "delete", id)
+
+
+def crud_router(resource: CrudResource, routes: tuple = ALL_ROUTES, on_view=None) -> APIRouter:
+    """Build the standard routes for a resource.
+
+    GET /get, GET /get/{id}, POST /post, PUT /update/{id} (full document),
+    PATCH /update/{id} (only the fields sent), DELETE /delete/{id} and
+    POST /bulk. Routers add their own endpoints to the returned router.
+    `on_view(id)` is called for every GET /get/{id} that serves the document
+    (not for a 304).
+    """
+    router = APIRouter()
+    collection = resource.collection
+    schema = resource.schema
+    patch_schema = partial_model(schema)
+
+    if "list" in routes:
+        async def list_documents(request: Request, params: ListQuery = Depends(list_query)):
+            if params.stream:
+                return resource.stream(params)
+            return await cached_response(request, f"{collection}?{params.cache_key()}", (collection,), lambda: resource.load(params))
+
+        router.add_api_route("/get", list_documents, methods=["GET"], response_model=list[resource.response_model], name=f"get_{collection}")
+
+    if "get" in routes:
+        async def get_document(id: str, request: Request):
+            response = await cached_response(request, f"{collection}/{id}", (collection,), lambda: resource.load_one(id))
+            # A 304 means the client already has it; only served bodies count
+            if on_view is not None and response.status_code != 304:
+                on_view(id)
+            return response
+
+        router.add_api_route("/get/{id}", get_document, methods=["GET"], response_model=resource.response_model, name=f"get_{collection}_item")
+
+    if "create" in routes:
+        async def create_document(document: schema = Body(...)):
+            try:
+                return await resource.create(document)
+            except Exception as e:
+                print(f"POST /{collection}/post failed: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        router.add_api_route("/post", create_document, methods=["POST"], response_model=resource.response_model, name=f"create_{collection}")
+
+    if "update" in routes:
+        async def replace_document(id: str, document: schema = Body(...)):
+            return await resource.update({"_id": parse_object_id(id)}, resource.prepare(document))
+
+        router.add_api_route("/update/{id}", replace_document, methods=["PUT"], response_model=resource.response_model, name=f"update_{collection}")
+
+    if "patch" in routes:
+        async def patch_document(id: str, document: patch_schema = Body(...)):
+            return await resource.update({"_id": parse_object_id(id)}, resource.prepare(document))
+
+        router.add_api_route("/update/{id}", patch_document, methods=["PATCH"], response_model=resource.response_model, name=f"patch_{collection}")
+
+    if "delete" in routes:
+        async def delete_document(id: str):
+            await resource.delete(id)
+            return {"detail": f"{resource.label} deleted successfully"}
+
+        router.add_api_route("/delete/{id}", delete_document, methods=["DELETE"], name=f"delete_{collection}")
+
+    if "bulk" in routes:
+        async def bulk_documents(request: BulkRequest):
+            return await run_bulk(resource, request)
+
+        router.add_api_route("/bulk", bulk_documents, methods=["POST"], name=f"bulk_{collection}")
+
+    return router
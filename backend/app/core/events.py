@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+from pymongo import ReturnDocument
+import secrets
+from app.core.settings import settings
+from app.db.database import DEFAULT_TENANT, control_db, current_tenant
+
+# Random per-process prefix so version tokens never repeat across restarts.
+# Once the shared versions are in use it is replaced by the cluster epoch,
+# so every worker hands out the same ETag for the same data.
+BOOT_ID = secrets.token_hex(4)
+# Identifies this worker in cache_versions, to skip its own changes
+WORKER_ID = secrets.token_hex(6)
+
+# Shared per-collection versions, one document per collection of every
+# tenant, kept in the control database so one watcher follows them all:
+# {_id: collection or "<tenant>/<collection>", version, operation, doc_id, origin, updated_at}
+VERSIONS_COLLECTION = "cache_versions"
+EPOCH_ID = "_epoch"
+
+_versions: dict[tuple, int] = {}  # (tenant, collection) -> version
+_subscribers = []
+# Every collection whose changes are published, for consumers that validate names
+_collections: set[str] = set()
+_epoch = BOOT_ID
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    collection: str
+    operation: str  # "create", "update", "delete", "bulk", or "sync" when changes were missed
+    id: Optional[str]
+    version: int
+    # True when another worker made the change
+    remote: bool = False
+    tenant: str = DEFAULT_TENANT
+
+
+def shared_id(tenant: str, collection: str) -> str:
+    return collection if tenant == DEFAULT_TENANT else f"{tenant}/{collection}"
+
+
+def parse_shared_id(value: str) -> tuple:
+    # -> (tenant, collection)
+    tenant, _, collection = value.rpartition("/")
+    return tenant, collection
+
+
+def current_version(collection: str) -> int:
+    # Of the current request's tenant
+    return _versions.get((current_tenant.get(), collection), 0)
+
+
+def version_token(collections) -> str:
+    # Compact token covering every collection a response was built from
+    versions = ".".join(str(current_version(name)) for name in collections)
+    return f"{_epoch}.{versions}"
+
+
+def set_epoch(epoch: str):
+    global _epoch
+    _epoch = epoch
+
+
+def adopt_versions(versions: dict):
+    # Start from the shared versions, keyed (tenant, collection), without
+    # announcing them as changes
+    for key, version in versions.items():
+        _versions[key] = max(version, _versions.get(key, 0))
+
+
+def register_collection(collection: str):
+    _collections.add(collection)
+
+
+def published_collections() -> frozenset:
+    return frozenset(_collections)
+
+
+def subscribe(handler):
+    # handler is an async callable receiving a ChangeEvent
+    _subscribers.append(handler)
+    return handler
+
+
+def subscribe_first(handler):
+    # For state other handlers read from (the in-memory replica)
+    _subscribers.insert(0, handler)
+    return handler
+
+
+async def dispatch(event: ChangeEvent):
+    for handler in list(_subscribers):
+        try:
+            await handler(event)
+        except Exception as e:
+            print(f"Change handler {getattr(handler, '__name__', handler)} failed: {e}")
+
+
+async def bump_shared_version(collection: str, operation: str, doc_id: Optional[str]) -> Optional[int]:
+    try:
+        doc = await control_db[VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": shared_id(current_tenant.get(), collection)},
+            {
+                "$inc": {"version": 1},
+                "$set": {"operation": operation, "doc_id": doc_id, "origin": WORKER_ID, "updated_at": datetime.now(timezone.utc)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={"version": 1},
+        )
+        return doc["version"]
+    except Exception as e:
+        # Other workers catch up through their cache TTL instead
+        print(f"Cache version bump for {collection} failed: {e}")
+        return None
+
+
+async def publish_change(collection: str, operation: str, doc_id: Optional[str] = None) -> ChangeEvent:
+    # Called by every write path after MongoDB acknowledged the write
+    _collections.add(collection)
+    version = await bump_shared_version(collection, operation, doc_id) if settings.cache_sync_enabled else None
+    if version is None:
+        version = current_version(collection) + 1
+    elif version > current_version(collection) + 1:
+        # Another worker wrote in between and this one has not seen it yet
+        await apply_version(collection, version - 1, "sync", None, remote=True)
+    # max(): the watcher may already have applied a newer remote version
+    tenant = current_tenant.get()
+    _versions[(tenant, collection)] = max(version, current_version(collection))
+    event = ChangeEvent(collection, operation, doc_id, version, tenant=tenant)
+    await dispatch(event)
+    return event
+
+
+async def apply_version(collection: str, version: int, operation: str, doc_id: Optional[str], remote: bool = True) -> bool:
+    # Brings the local version up to a shared one, for the current tenant.
+    # The exact change is only known when exactly one was missed; otherwise
+    # handlers reload everything.
+    known = current_version(collection)
+    if version <= known:
+        return False
+    if version != known + 1:
+        operation, doc_id = "sync", None
+    tenant = current_tenant.get()
+    _versions[(tenant, collection)] = version
+    await dispatch(ChangeEvent(collection, operation, doc_id, version, remote, tenant))
+    return True
@@ -0,0 +1,204 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from pymongo import monitoring
+import threading
+import time
+
+# Seconds; covers a cached hit (sub-millisecond) up to a slow upload
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Commands worth timing per collection; the value of the command field is the
+# collection name (getMore carries it in "collection")
+TIMED_COMMANDS = {"find", "getMore", "insert", "update", "delete", "findAndModify", "aggregate", "count", "distinct"}
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, description: str, labels: tuple):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three additions."""
+
+    def __init__(self, name: str, description: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class RequestTimings:
+    """Where one request spent its time. Shared through `request_timings`
+    with Motor's worker threads, which run in a copy of the caller's context."""
+
+    __slots__ = ("mongo_seconds", "mongo_commands", "serialize_seconds", "_lock")
+
+    def __init__(self):
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+        self.serialize_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_mongo(self, seconds: float):
+        with self._lock:
+            self.mongo_seconds += seconds
+            self.mongo_commands += 1
+
+    def add_serialize(self, seconds: float):
+        with self._lock:
+            self.serialize_seconds += seconds
+
+
+request_timings: ContextVar = ContextVar("request_timings", default=None)
+
+
+http_requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_duration = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"), LATENCY_BUCKETS)
+http_response_size = Histogram("http_response_size_bytes", "HTTP response body size.", ("method", "route"), SIZE_BUCKETS)
+mongo_duration = Histogram("mongodb_command_duration_seconds", "MongoDB command latency.", ("collection", "command"), LATENCY_BUCKETS)
+mongo_failures = Counter("mongodb_command_failures_total", "Failed MongoDB commands.", ("collection", "command"))
+smtp_duration = Histogram("smtp_batch_duration_seconds", "Time to send one batch of contact mail.", (), LATENCY_BUCKETS)
+admission_rejections = Counter("http_admission_rejections_total", "Requests turned away before reaching a handler.", ("group", "reason"))
+
+METRICS = (http_requests, http_duration, http_response_size, mongo_duration, mongo_failures, smtp_duration, admission_rejections)
+
+
+def route_template(scope) -> str:
+    # Included routers only know their own path ("/{id}/image"), so rebuild
+    # the full template from the request path and the matched parameters.
+    # Unmatched paths share one label to keep cardinality bounded.
+    if scope.get("route") is None:
+        return "unmatched"
+    params = {str(value): name for name, value in (scope.get("path_params") or {}).items()}
+    if not params:
+        return scope["path"]
+    return "/".join("{" + params[part] + "}" if part in params else part for part in scope["path"].split("/"))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: no request/response objects, one timer per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope)
+            method = scope["method"]
+            http_requests.inc(method, route, str(status))
+            http_duration.observe(time.perf_counter() - started, method, route)
+            http_response_size.observe(size, method, route)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    # Called on Motor's worker threads; started() remembers the collection
+    # because the succeeded/failed events do not carry the command document
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name not in TIMED_COMMANDS:
+            return
+        collection = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = str(collection)
+
+    def succeeded(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), None)
+        if collection is not None:
+            self.observe(event, collection)
+
+    def failed(self, event):
+        collection = self._pending.pop((event.connection_id, event.request_id), None)
+        if collection is not None:
+            self.observe(event, collection)
+            mongo_failures.inc(collection, event.command_name)
+
+    def observe(self, event, collection: str):
+        seconds = event.duration_micros / 1_000_000
+        mongo_duration.observe(seconds, collection, event.command_name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.add_mongo(seconds)
+
+
+mongo_listener = MongoCommandListener()
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,249 @@
+"""Per-request profiling and the slow-request log.
+
+Every request gets a RequestTimings (Mongo and serialization time, see
+app.core.metrics); requests slower than SLOW_REQUEST_MS are kept in a
+bounded log with that breakdown.
+
+A request is profiled when it sends `X-Profile: <PROFILE_TOKEN>` or is
+picked by PROFILE_SAMPLE_RATE. While it runs, a sampling thread records the
+event loop thread's stack every PROFILE_INTERVAL_MS; the result is kept as
+folded stacks (flamegraph.pl / speedscope format) and the response carries
+an X-Profile-Id to download it from /debug/profiles/{id}. Samples taken
+while the loop ran another task, or waited for I/O, are labelled as such.
+
+Safe to leave on: without a token and with a zero sample rate nothing is
+profiled, at most PROFILE_MAX_CONCURRENT requests are profiled at once,
+and both the profiles and the slow log are bounded.
+"""
+from collections import Counter, deque
+from datetime import datetime, timezone
+import asyncio
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from app.core.metrics import RequestTimings, request_timings, route_template
+from app.core.settings import settings
+from app.db.database import current_tenant
+
+PROFILE_TOKEN = settings.profile_token
+PROFILE_SAMPLE_RATE = settings.profile_sample_rate
+PROFILE_INTERVAL_SECONDS = settings.profile_interval_ms / 1000
+PROFILE_MAX_CONCURRENT = settings.profile_max_concurrent
+SLOW_REQUEST_SECONDS = settings.slow_request_ms / 1000
+MAX_STACK_DEPTH = 64
+
+
+def token_matches(value) -> bool:
+    return bool(PROFILE_TOKEN) and value is not None and secrets.compare_digest(value, PROFILE_TOKEN)
+
+
+def current_task(loop):
+    # Read from the sampling thread; the private mapping is what
+    # asyncio.current_task() itself consults
+    tasks = getattr(asyncio.tasks, "_current_tasks", None)
+    return tasks.get(loop) if tasks is not None else None
+
+
+def fold(frame) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profile:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = secrets.token_hex(8)
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.now(timezone.utc)
+        self.thread_id = threading.get_ident()
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.stacks = Counter()
+        self.samples = 0
+        self.seconds = None
+        self.status = None
+
+    def sample(self, frames: dict):
+        frame = frames.get(self.thread_id)
+        if frame is None:
+            return
+        running = current_task(self.loop)
+        if running is None:
+            label = "[waiting for I/O]"
+        elif running is self.task:
+            label = "[request]"
+        else:
+            label = "[other task]"
+        self.stacks[f"{label};{fold(frame)}"] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "started_at": self.started_at.isoformat(),
+            "seconds": self.seconds,
+            "status": self.status,
+            "samples": self.samples,
+        }
+
+
+class Sampler:
+    """One daemon thread shared by all running profiles; it exits when the
+    last one finishes, so nothing samples between profiled requests."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.active = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def add(self, profile: Profile):
+        with self.lock:
+            self.active.add(profile)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+                self.thread.start()
+
+    def remove(self, profile: Profile):
+        with self.lock:
+            self.active.discard(profile)
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.active:
+                    self.thread = None
+                    return
+                profiles = list(self.active)
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    def __init__(self, max_stored: int = settings.profile_max_stored, slow_log_size: int = settings.slow_log_size):
+        self.profiles = {}
+        self.order = deque()
+        self.max_stored = max_stored
+        self.slow = deque(maxlen=slow_log_size)
+        self.running = 0
+
+    def save(self, profile: Profile):
+        self.profiles[profile.id] = profile
+        self.order.append(profile.id)
+        while len(self.order) > self.max_stored:
+            self.profiles.pop(self.order.popleft(), None)
+
+    def get(self, profile_id: str):
+        return self.profiles.get(profile_id)
+
+    def list(self) -> list:
+        return [self.profiles[profile_id].summary() for profile_id in reversed(self.order)]
+
+
+sampler = Sampler()
+profile_store = ProfileStore()
+
+
+def profile_reason(scope):
+    if PROFILE_TOKEN:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                if token_matches(value.decode("latin-1")):
+                    return "header"
+                break
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI: sets up the per-request timings, profiles the request when
+    asked to, and logs it when it was slow."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        profile = None
+        reason = profile_reason(scope)
+        if reason and profile_store.running < PROFILE_MAX_CONCURRENT:
+            profile = Profile(scope["method"], scope["path"], reason)
+            profile_store.running += 1
+            sampler.add(profile)
+
+        status = 500
+        size = 0
+        streaming = False
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, size, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream") for name, value in message.get("headers", ())
+                )
+                if profile is not None:
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_timings.reset(token)
+            if profile is not None:
+                sampler.remove(profile)
+                profile_store.running -= 1
+                profile.seconds = round(elapsed, 6)
+                profile.status = status
+                profile_store.save(profile)
+            # Event streams are open for as long as the client listens
+            if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS and not streaming:
+                self.log_slow(scope, status, elapsed, size, timings, profile)
+
+    @staticmethod
+    def log_slow(scope, status: int, elapsed: float, size: int, timings: RequestTimings, profile):
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "method": scope["method"],
+            "route": route_template(scope),
+            "tenant": current_tenant.get() or None,
+            "status": status,
+            "total_ms": round(elapsed * 1000, 2),
+            "mongo_ms": round(timings.mongo_seconds * 1000, 2),
+            "mongo_commands": timings.mongo_commands,
+            "serialize_ms": round(timings.serialize_seconds * 1000, 2),
+            "response_bytes": size,
+            "profile_id": profile.id if profile is not None else None,
+        }
+        profile_store.slow.append(entry)
+        print(
+            f"Slow request {entry['method']} {entry['route']} {status}: {entry['total_ms']}ms "
+            f"(mongo {entry['mongo_ms']}ms in {entry['mongo_commands']} commands, serialize {entry['serialize_ms']}ms, {size} bytes)"
+        )
@@ -0,0 +1,203 @@
+from dataclasses import dataclass, field
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from bson import ObjectId, json_util
+import base64
+from app.core.codec import encode
+from app.core.settings import settings
+
+DEFAULT_PAGE_SIZE = settings.default_page_size
+MAX_PAGE_SIZE = settings.max_page_size
+# Documents per getMore while streaming, and bytes gathered per socket write
+STREAM_BATCH_SIZE = settings.stream_batch_size
+STREAM_CHUNK_BYTES = 64 * 1024
+
+NDJSON = "application/x-ndjson"
+
+
+@dataclass(frozen=True)
+class CollectionSpec:
+    # Public sort key -> indexed MongoDB field
+    sort_fields: dict
+    # Fields a client may ask for with ?fields=
+    fields: tuple
+    default_sort: str = "_id"
+    # Fields the serializer needs even when not requested
+    required_fields: tuple = ()
+    # Fields never loaded for list responses (large legacy payloads)
+    excluded_fields: tuple = ()
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    # None only when streaming without an explicit limit: everything is sent
+    limit: Optional[int] = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+    sort: Optional[str] = None
+    fields: Optional[str] = None
+    stream: bool = False
+
+    def cache_key(self) -> str:
+        return f"limit={self.limit}&cursor={self.cursor or ''}&sort={self.sort or ''}&fields={self.fields or ''}"
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: Optional[str] = None
+    headers: dict = field(default_factory=dict)
+
+
+def list_query(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's X-Next-Cursor header"),
+    sort: Optional[str] = Query(None, description="Sort key, prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma separated list of fields to return"),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="'ndjson' (or Accept: application/x-ndjson) streams one document per line"),
+) -> ListQuery:
+    stream = format == "ndjson" or (format is None and NDJSON in request.headers.get("accept", ""))
+    if stream and "limit" not in request.query_params:
+        # A stream is not a page: without a limit it runs to the end
+        limit = None
+    return ListQuery(limit=limit, cursor=cursor, sort=sort, fields=fields, stream=stream)
+
+
+def resolve_sort(spec: CollectionSpec, sort: Optional[str]):
+    key = sort or spec.default_sort
+    direction = -1 if key.startswith("-") else 1
+    name = key.lstrip("-")
+    if name == "_id":
+        return key, "_id", direction
+    if name not in spec.sort_fields:
+        allowed = ", ".join(sorted(spec.sort_fields)) or "none"
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{name}'. Allowed: {allowed}")
+    return key, spec.sort_fields[name], direction
+
+
+def resolve_projection(spec: CollectionSpec, fields: Optional[str]):
+    if not fields:
+        return {name: 0 for name in spec.excluded_fields} or None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in spec.fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return {name: 1 for name in (*requested, *spec.required_fields)}
+
+
+def encode_cursor(sort_key: str, value, doc_id) -> str:
+    # Extended JSON keeps datetime and ObjectId values exact across the round trip
+    raw = json_util.dumps({"s": sort_key, "v": value, "id": doc_id})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded).decode("utf-8"))
+        value, doc_id = data["v"], data["id"]
+        if data["s"] != sort_key or not isinstance(doc_id, ObjectId):
+            raise ValueError("cursor does not match this query")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, doc_id
+
+
+def keyset_filter(sort_field: str, direction: int, value, doc_id) -> dict:
+    # Documents strictly after (value, _id) in the requested order. MongoDB
+    # sorts missing/null values first, and range operators never match null,
+    # so null positions are handled explicitly.
+    id_op = "$gt" if direction == 1 else "$lt"
+    if sort_field == "_id":
+        return {"_id": {id_op: doc_id}}
+
+    same_value = {sort_field: value, "_id": {id_op: doc_id}}
+    if value is None:
+        if direction == 1:
+            return {"$or": [same_value, {sort_field: {"$ne": None}}]}
+        return same_value
+
+    value_op = "$gt" if direction == 1 else "$lt"
+    after = [{sort_field: {value_op: value}}, same_value]
+    if direction == -1:
+        after.append({sort_field: None})
+    return {"$or": after}
+
+
+def get_path(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def build_find(spec: CollectionSpec, params: ListQuery, base_filter: dict = None):
+    # -> (filter, projection, sort, sort key, sort field); raises 400 on bad params
+    sort_key, sort_field, direction = resolve_sort(spec, params.sort)
+    projection = resolve_projection(spec, params.fields)
+
+    # The cursor is built from the sort field, so it must survive projection
+    if params.fields:
+        projection[sort_field] = 1
+
+    query = dict(base_filter or {})
+    if params.cursor:
+        value, doc_id = decode_cursor(params.cursor, sort_key)
+        after = keyset_filter(sort_field, direction, value, doc_id)
+        query = {"$and": [query, after]} if query else after
+
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
+    return query, projection, sort, sort_key, sort_field
+
+
+async def fetch_page(collection, spec: CollectionSpec, params: ListQuery, serialize, base_filter: dict = None) -> Page:
+    query, projection, sort, sort_key, sort_field = build_find(spec, params, base_filter)
+
+    # One extra document tells us whether another page exists
+    cursor = collection.find(query, projection).sort(sort).limit(params.limit + 1)
+    docs = await cursor.to_list(length=params.limit + 1)
+
+    next_cursor = None
+    if len(docs) > params.limit:
+        docs = docs[:params.limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(sort_key, get_path(last, sort_field), last["_id"])
+
+    page = Page(items=[serialize(doc) for doc in docs], next_cursor=next_cursor)
+    if next_cursor:
+        page.headers["X-Next-Cursor"] = next_cursor
+    return page
+
+
+def stream_page(collection, spec: CollectionSpec, params: ListQuery, serialize, base_filter: dict = None) -> StreamingResponse:
+    """NDJSON response fed straight from the Motor cursor.
+
+    Only one cursor batch and one output chunk are held at a time, so memory
+    stays flat however large the collection is. Bad parameters still fail
+    with a 400 here, before the response starts.
+    """
+    query, projection, sort, _, _ = build_find(spec, params, base_filter)
+    cursor = collection.find(query, projection).sort(sort).batch_size(STREAM_BATCH_SIZE)
+    if params.limit:
+        cursor = cursor.limit(params.limit)
+
+    async def lines():
+        chunk = bytearray()
+        try:
+            async for doc in cursor:
+                chunk += encode(serialize(doc))
+                chunk += b"\n"
+                if len(chunk) >= STREAM_CHUNK_BYTES:
+                    yield bytes(chunk)
+                    chunk.clear()
+            if chunk:
+                yield bytes(chunk)
+        finally:
+            # Client went away mid-stream: release the server-side cursor
+            await cursor.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON)
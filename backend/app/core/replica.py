@@ -0,0 +1,350 @@
+"""In-memory replica of the portfolio collections.
+
+Each registered collection is loaded once into an immutable Snapshot; list
+and get-by-id reads are answered from it with the same sorting, keyset
+cursors and projections as the MongoDB queries in app.core.query. Writes
+go to MongoDB first and are then applied by swapping in a new snapshot, so
+a reader always sees either the old or the new state, never half of it.
+
+Changes this worker did not make itself (bulk writes, imports, other
+workers through app.services.cache_sync) mark the collection stale, which
+sends its reads back to MongoDB until it has been reloaded. If a reload
+fails because MongoDB is unreachable, the last snapshot keeps serving
+reads and the reload is retried every REPLICA_RETRY_SECONDS.
+
+In tenant mode every tenant has its own replica, loaded on its first read
+and only kept for collections within TENANT_REPLICA_MAX_BYTES; larger ones
+are read from MongoDB.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+import asyncio
+import orjson
+import time
+from app.core.cache import response_cache
+from app.core.codec import encode, encode_default
+from app.core.events import subscribe_first
+from app.core.query import (
+    NDJSON, STREAM_CHUNK_BYTES, CollectionSpec, ListQuery, Page,
+    decode_cursor, encode_cursor, get_path, resolve_projection, resolve_sort,
+)
+from app.core.settings import settings
+from app.core.tenancy import TenantLocal, quota
+from app.db.database import DEFAULT_TENANT, db
+
+REPLICA_RETRY_SECONDS = 5
+# collection -> fields never kept in memory; the same for every tenant
+REPLICA_EXCLUDED = {}
+
+# MongoDB's cross-type sort order (null first), for mixed or missing values
+TYPE_RANKS = ((type(None), 0), (bool, 9), ((int, float), 1), (str, 2), (dict, 3), (list, 4), (bytes, 5), (ObjectId, 6), (datetime, 10))
+
+
+def sort_key(value) -> tuple:
+    for types, rank in TYPE_RANKS:
+        if isinstance(value, types):
+            if rank in (3, 4):
+                return rank, repr(value)
+            return rank, value
+    return 11, repr(value)
+
+
+class Snapshot:
+    """One immutable version of a collection. Sort orders are built lazily
+    and cached per snapshot, so each costs one sort per write at most."""
+
+    __slots__ = ("by_id", "_orders")
+
+    def __init__(self, docs):
+        self.by_id = MappingProxyType({doc["_id"]: doc for doc in docs})
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def order(self, field: str) -> tuple:
+        # -> (ascending keys, documents in that order); ties broken by _id like the queries
+        order = self._orders.get(field)
+        if order is None:
+            if field == "_id":
+                rows = sorted((((doc["_id"],), doc) for doc in self.by_id.values()), key=lambda row: row[0])
+            else:
+                rows = sorted(
+                    (((sort_key(get_path(doc, field)), doc["_id"]), doc) for doc in self.by_id.values()),
+                    key=lambda row: row[0],
+                )
+            order = self._orders[field] = (tuple(key for key, _ in rows), tuple(doc for _, doc in rows))
+        return order
+
+    def replace(self, doc_id, doc: Optional[dict]) -> "Snapshot":
+        docs = dict(self.by_id)
+        if doc is None:
+            docs.pop(doc_id, None)
+        else:
+            docs[doc_id] = doc
+        return Snapshot(docs.values())
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    # Always a fresh dict: serializers rewrite the document they are given
+    if not projection:
+        return dict(doc)
+    if next(iter(projection.values())) == 0:
+        return {name: value for name, value in doc.items() if name not in projection}
+    selected = {"_id": doc["_id"]}
+    for name in projection:
+        if name in doc:
+            selected[name] = doc[name]
+    return selected
+
+
+def select(snapshot: Snapshot, spec: CollectionSpec, params: ListQuery):
+    # Same rows, in the same order, as build_find + find().sort()
+    sort_name, sort_field, direction = resolve_sort(spec, params.sort)
+    keys, docs = snapshot.order(sort_field)
+    if params.cursor:
+        value, doc_id = decode_cursor(params.cursor, sort_name)
+        position = (doc_id,) if sort_field == "_id" else (sort_key(value), doc_id)
+        if direction == 1:
+            docs = docs[bisect_right(keys, position):]
+        else:
+            docs = docs[:bisect_left(keys, position)][::-1]
+    elif direction == -1:
+        docs = docs[::-1]
+    return sort_name, sort_field, docs
+
+
+def snapshot_page(snapshot: Snapshot, spec: CollectionSpec, params: ListQuery, serialize) -> Page:
+    sort_name, sort_field, docs = select(snapshot, spec, params)
+    projection = resolve_projection(spec, params.fields)
+    # As in fetch_page, where the cursor needs the sort field
+    if params.fields:
+        projection[sort_field] = 1
+    next_cursor = None
+    if len(docs) > params.limit:
+        docs = docs[:params.limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(sort_name, get_path(last, sort_field), last["_id"])
+    page = Page(items=[serialize(project(doc, projection)) for doc in docs], next_cursor=next_cursor)
+    if next_cursor:
+        page.headers["X-Next-Cursor"] = next_cursor
+    return page
+
+
+def snapshot_stream(snapshot: Snapshot, spec: CollectionSpec, params: ListQuery, serialize) -> StreamingResponse:
+    _, _, docs = select(snapshot, spec, params)
+    projection = resolve_projection(spec, params.fields)
+    if params.limit:
+        docs = docs[:params.limit]
+
+    async def lines():
+        chunk = bytearray()
+        for doc in docs:
+            chunk += encode(serialize(project(doc, projection)))
+            chunk += b"\n"
+            if len(chunk) >= STREAM_CHUNK_BYTES:
+                yield bytes(chunk)
+                chunk.clear()
+        if chunk:
+            yield bytes(chunk)
+
+    return StreamingResponse(lines(), media_type=NDJSON)
+
+
+def document_size(doc: dict) -> int:
+    # Encoded size, a fair proxy for memory; not counted as response serialization
+    return len(orjson.dumps(doc, default=encode_default))
+
+
+class ReplicaStore:
+    def __init__(self, lazy: bool = False, max_bytes: int = 0):
+        self.excluded = REPLICA_EXCLUDED
+        self.lazy = lazy  # loaded on first read rather than by the bootstrap
+        self.max_bytes = max_bytes
+        self._snapshots = {}
+        self._bytes = {}  # collection -> encoded size, with a quota
+        self._over_quota = set()
+        self._stale = set()
+        self._retry = set()
+        self._writes = {}  # collection -> write-through count, to spot racing reloads
+        self.task = None
+        self.loader = None
+        self.retry_at = 0.0
+        self.reloads = 0
+        self.last_error = None
+
+    def register(self, collection: str, spec: CollectionSpec):
+        self.excluded[collection] = spec.excluded_fields
+
+    def snapshot(self, collection: str) -> Optional[Snapshot]:
+        # None sends the read to MongoDB
+        if not settings.replica_enabled or collection in self._stale:
+            return None
+        snapshot = self._snapshots.get(collection)
+        if snapshot is None and self.lazy and collection not in self._over_quota:
+            self.load_later()
+        return snapshot
+
+    def load_later(self):
+        # One background load at a time, and none for a while after a failure
+        if self.loader is not None and not self.loader.done():
+            return
+        if time.monotonic() < self.retry_at:
+            return
+        self.loader = asyncio.create_task(self.load_missing())
+
+    async def load_missing(self):
+        missing = [name for name in self.excluded if name not in self._snapshots and name not in self._over_quota]
+        try:
+            await asyncio.gather(*(self.load(collection) for collection in missing))
+        except Exception as e:
+            self.last_error = str(e)
+            self.retry_at = time.monotonic() + REPLICA_RETRY_SECONDS
+
+    def compact(self, collection: str, doc: dict) -> dict:
+        excluded = self.excluded.get(collection)
+        if excluded:
+            return {name: value for name, value in doc.items() if name not in excluded}
+        return doc
+
+    async def load(self, collection: str):
+        projection = {name: 0 for name in self.excluded[collection]} or None
+        while True:
+            writes = self._writes.get(collection, 0)
+            docs = await db[collection].find({}, projection).to_list(length=None)
+            # A write applied meanwhile may be missing from what was read
+            if self._writes.get(collection, 0) == writes:
+                break
+        self._stale.discard(collection)
+        self._retry.discard(collection)
+        self.reloads += 1
+        if self.max_bytes:
+            size = sum(document_size(doc) for doc in docs)
+            if size > self.max_bytes:
+                self.drop(collection)
+                return
+            self._bytes[collection] = size
+        self._snapshots[collection] = Snapshot(docs)
+
+    def drop(self, collection: str):
+        # Over the tenant's quota: reads of it go to MongoDB from now on
+        self._snapshots.pop(collection, None)
+        self._bytes.pop(collection, None)
+        self._over_quota.add(collection)
+
+    async def load_all(self):
+        if settings.replica_enabled:
+            await asyncio.gather(*(self.load(collection) for collection in self.excluded))
+
+    async def reload(self, collection: str):
+        # Reads go to MongoDB while the reload is in flight
+        self._stale.add(collection)
+        try:
+            await self.load(collection)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Replica reload of {collection} failed, serving the last snapshot: {e}")
+            self._stale.discard(collection)
+            self._retry.add(collection)
+
+    def mark_stale(self):
+        # Changes may have been missed: reads go to MongoDB until reloaded
+        self._stale.update(self._snapshots)
+
+    async def reload_loaded(self):
+        for collection in list(self._snapshots):
+            await self.reload(collection)
+
+    def put(self, collection: str, doc: dict):
+        # Write-through, after MongoDB acknowledged the write
+        self._writes[collection] = self._writes.get(collection, 0) + 1
+        current = self._snapshots.get(collection)
+        if current is not None:
+            doc = self.compact(collection, dict(doc))
+            if self.max_bytes:
+                previous = current.by_id.get(doc["_id"])
+                self._bytes[collection] += document_size(doc) - (document_size(previous) if previous is not None else 0)
+                if self._bytes[collection] > self.max_bytes:
+                    self.drop(collection)
+                    return
+            self._snapshots[collection] = current.replace(doc["_id"], doc)
+
+    def remove(self, collection: str, doc_id: ObjectId):
+        self._writes[collection] = self._writes.get(collection, 0) + 1
+        current = self._snapshots.get(collection)
+        if current is not None:
+            previous = current.by_id.get(doc_id)
+            if self.max_bytes and previous is not None:
+                self._bytes[collection] -= document_size(previous)
+            self._snapshots[collection] = current.replace(doc_id, None)
+
+    def start(self):
+        if self.task is None and settings.replica_enabled:
+            self.task = asyncio.create_task(self.run(), name="replica-retry")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(REPLICA_RETRY_SECONDS)
+            for collection in list(self._retry):
+                try:
+                    await self.load(collection)
+                    # Responses cached from the old snapshot are dropped
+                    response_cache.invalidate(collection)
+                except Exception as e:
+                    self.last_error = str(e)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.replica_enabled,
+            "collections": {name: len(snapshot) for name, snapshot in sorted(self._snapshots.items())},
+            "bytes": sum(self._bytes.values()) if self.max_bytes else None,
+            "max_bytes": self.max_bytes,
+            "over_quota": sorted(self._over_quota),
+            "stale": sorted(self._stale | self._retry),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+# The default tenant's replica is loaded by the bootstrap, the others on demand
+replica = TenantLocal(lambda tenant: ReplicaStore(
+    lazy=tenant != DEFAULT_TENANT,
+    max_bytes=quota(settings.tenant_replica_max_bytes),
+))
+
+
+@subscribe_first
+async def apply_change(event):
+    # Runs before every other subscriber, so nothing rebuilds from a
+    # snapshot that misses the change
+    if event.collection not in replica._snapshots:
+        return
+    if not event.remote and event.operation in ("create", "update", "delete"):
+        return  # Already applied by the writer through put() / remove()
+    if event.id is None or not ObjectId.is_valid(event.id):
+        await replica.reload(event.collection)
+        return
+    replica._stale.add(event.collection)
+    try:
+        doc = await db[event.collection].find_one({"_id": ObjectId(event.id)})
+        if doc is None:
+            replica.remove(event.collection, ObjectId(event.id))
+        else:
+            replica.put(event.collection, doc)
+        replica._stale.discard(event.collection)
+    except Exception as e:
+        print(f"Replica refresh of {event.collection}/{event.id} failed: {e}")
+        await replica.reload(event.collection)
@@ -0,0 +1,231 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+import os
+from dotenv import load_dotenv
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    return os.getenv(name, default)
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name: str, default: str) -> tuple:
+    return tuple(item.strip() for item in os.getenv(name, default).split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    # MongoDB
+    mongo_url: Optional[str]
+    mongo_db: str
+    mongo_max_pool_size: int
+    mongo_min_pool_size: int
+    mongo_max_idle_time_ms: int
+    mongo_server_selection_timeout_ms: int
+    mongo_connect_timeout_ms: int
+    mongo_socket_timeout_ms: int
+    mongo_compressors: tuple
+    mongo_warm_up: bool
+
+    # Multi-tenancy: "off", "host" (<tenant>.<TENANT_DOMAIN> or a registered
+    # host) or "path" (/t/<tenant>/...). Each tenant has its own database,
+    # TENANT_DB_PREFIX + name, reached through the one shared client.
+    tenant_mode: str
+    tenant_domain: Optional[str]
+    tenant_db_prefix: str
+    # Tenants whose in-memory state (caches, replica, search index, CV) is
+    # kept at once; the least recently used one is dropped beyond that
+    tenant_max_active: int
+    # Per-tenant memory quotas in tenant mode, in bytes (0 = no quota)
+    tenant_cache_max_bytes: int
+    tenant_replica_max_bytes: int
+
+    # Response cache and list queries
+    cache_ttl_seconds: float
+    cache_max_entries: int
+    cache_control: str
+    # Cross-worker invalidation through the cache_versions collection;
+    # mode "auto" tails it with a change stream on a replica set, else polls
+    cache_sync_enabled: bool
+    cache_sync_mode: str
+    cache_sync_interval_seconds: float
+    cache_sync_max_staleness_seconds: float
+    default_page_size: int
+    stream_batch_size: int
+    # Serve reads from the in-memory replica (app.core.replica)
+    replica_enabled: bool
+    # Technology graph and career timeline kept in MongoDB (app.services.views);
+    # needs MongoDB 4.4 or later
+    views_enabled: bool
+    views_debounce_seconds: float
+    views_max_delay_seconds: float
+    max_page_size: int
+
+    # Uploads
+    process_pool_workers: int
+    icon_variant_sizes: tuple
+    blob_gridfs_threshold: int
+
+    # Outbound mail
+    smtp_host: str
+    smtp_port: int
+    smtp_starttls: bool
+    smtp_timeout: float
+    smtp_idle_seconds: float
+    email_address: Optional[str]
+    email_password: Optional[str]
+    mail_batch_size: int
+    mail_max_attempts: int
+    mail_retry_base_seconds: float
+    mail_retry_max_seconds: float
+    mail_poll_seconds: float
+    mail_lock_seconds: float
+
+    # Static snapshots
+    snapshot_enabled: bool
+    snapshot_dir: str
+    snapshot_debounce_seconds: float
+    snapshot_max_delay_seconds: float
+    snapshot_brotli_quality: int
+
+    # Admission control. Rate limits are "<requests>/<seconds>" per client
+    # (also the burst size); an empty value turns a limit off.
+    admission_enabled: bool
+    admission_trust_forwarded_for: bool
+    rate_limit_read: str
+    rate_limit_write: str
+    rate_limit_upload: str
+    rate_limit_contact: str
+    max_in_flight: int
+    max_in_flight_read: int
+    max_in_flight_write: int
+    max_in_flight_upload: int
+    max_in_flight_contact: int
+    max_body_read: int
+    max_body_write: int
+    max_body_upload: int
+    max_body_contact: int
+
+    # Profiling and slow-request log. Profiles are taken for requests that
+    # send "X-Profile: <PROFILE_TOKEN>" or are picked by PROFILE_SAMPLE_RATE
+    profile_token: Optional[str]
+    profile_sample_rate: float
+    profile_interval_ms: float
+    profile_max_stored: int
+    profile_max_concurrent: int
+    slow_request_ms: float
+    slow_log_size: int
+
+    # View counters
+    analytics_enabled: bool
+    analytics_flush_seconds: float
+    analytics_max_keys: int
+
+    # Server-Sent Events change stream (/events/stream)
+    sse_max_clients: int
+    sse_queue_size: int
+    sse_heartbeat_seconds: float
+    sse_replay_size: int
+
+
+@lru_cache
+def get_settings() -> Settings:
+    # .env is read exactly once, here
+    load_dotenv()
+    return Settings(
+        mongo_url=env_str("MONGO_URL"),
+        mongo_db=env_str("MONGO_DB", "portfolio"),
+        mongo_max_pool_size=env_int("MONGO_MAX_POOL_SIZE", 50),
+        mongo_min_pool_size=env_int("MONGO_MIN_POOL_SIZE", 5),
+        mongo_max_idle_time_ms=env_int("MONGO_MAX_IDLE_TIME_MS", 300_000),
+        mongo_server_selection_timeout_ms=env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5_000),
+        mongo_connect_timeout_ms=env_int("MONGO_CONNECT_TIMEOUT_MS", 5_000),
+        mongo_socket_timeout_ms=env_int("MONGO_SOCKET_TIMEOUT_MS", 20_000),
+        mongo_compressors=env_list("MONGO_COMPRESSORS", "zlib"),
+        mongo_warm_up=env_bool("MONGO_WARM_UP", True),
+        tenant_mode=env_str("TENANT_MODE", "off"),
+        tenant_domain=env_str("TENANT_DOMAIN"),
+        tenant_db_prefix=env_str("TENANT_DB_PREFIX", "portfolio_"),
+        tenant_max_active=env_int("TENANT_MAX_ACTIVE", 200),
+        tenant_cache_max_bytes=env_int("TENANT_CACHE_MAX_BYTES", 2 * 1024 * 1024),
+        tenant_replica_max_bytes=env_int("TENANT_REPLICA_MAX_BYTES", 4 * 1024 * 1024),
+        cache_ttl_seconds=env_float("CACHE_TTL_SECONDS", 300),
+        cache_max_entries=env_int("CACHE_MAX_ENTRIES", 512),
+        cache_control=env_str("CACHE_CONTROL", "public, no-cache"),
+        cache_sync_enabled=env_bool("CACHE_SYNC_ENABLED", True),
+        cache_sync_mode=env_str("CACHE_SYNC_MODE", "auto"),
+        cache_sync_interval_seconds=env_float("CACHE_SYNC_INTERVAL_SECONDS", 1.0),
+        cache_sync_max_staleness_seconds=env_float("CACHE_SYNC_MAX_STALENESS_SECONDS", 30),
+        default_page_size=env_int("DEFAULT_PAGE_SIZE", 100),
+        stream_batch_size=env_int("STREAM_BATCH_SIZE", 200),
+        replica_enabled=env_bool("REPLICA_ENABLED", True),
+        views_enabled=env_bool("VIEWS_ENABLED", True),
+        views_debounce_seconds=env_float("VIEWS_DEBOUNCE_SECONDS", 0.5),
+        views_max_delay_seconds=env_float("VIEWS_MAX_DELAY_SECONDS", 5),
+        max_page_size=env_int("MAX_PAGE_SIZE", 500),
+        process_pool_workers=env_int("PROCESS_POOL_WORKERS", min(4, os.cpu_count() or 1)),
+        icon_variant_sizes=tuple(int(size) for size in env_list("ICON_VARIANT_SIZES", "32,64,128")),
+        blob_gridfs_threshold=env_int("BLOB_GRIDFS_THRESHOLD", 4 * 1024 * 1024),
+        smtp_host=env_str("SMTP_HOST", "smtp.gmail.com"),
+        smtp_port=env_int("SMTP_PORT", 587),
+        smtp_starttls=env_bool("SMTP_STARTTLS", True),
+        smtp_timeout=env_float("SMTP_TIMEOUT", 30),
+        smtp_idle_seconds=env_float("SMTP_IDLE_SECONDS", 120),
+        email_address=env_str("EMAIL_ADDRESS"),
+        email_password=env_str("EMAIL_PASSWORD"),
+        mail_batch_size=env_int("MAIL_BATCH_SIZE", 20),
+        mail_max_attempts=env_int("MAIL_MAX_ATTEMPTS", 6),
+        mail_retry_base_seconds=env_float("MAIL_RETRY_BASE_SECONDS", 30),
+        mail_retry_max_seconds=env_float("MAIL_RETRY_MAX_SECONDS", 3600),
+        mail_poll_seconds=env_float("MAIL_POLL_SECONDS", 30),
+        mail_lock_seconds=env_float("MAIL_LOCK_SECONDS", 600),
+        snapshot_enabled=env_bool("SNAPSHOT_ENABLED", True),
+        snapshot_dir=env_str("SNAPSHOT_DIR", "snapshots"),
+        snapshot_debounce_seconds=env_float("SNAPSHOT_DEBOUNCE_SECONDS", 2),
+        snapshot_max_delay_seconds=env_float("SNAPSHOT_MAX_DELAY_SECONDS", 30),
+        snapshot_brotli_quality=env_int("SNAPSHOT_BROTLI_QUALITY", 11),
+        admission_enabled=env_bool("ADMISSION_ENABLED", True),
+        admission_trust_forwarded_for=env_bool("ADMISSION_TRUST_FORWARDED_FOR", False),
+        rate_limit_read=env_str("RATE_LIMIT_READ", ""),
+        rate_limit_write=env_str("RATE_LIMIT_WRITE", "120/60"),
+        rate_limit_upload=env_str("RATE_LIMIT_UPLOAD", "10/60"),
+        rate_limit_contact=env_str("RATE_LIMIT_CONTACT", "5/600"),
+        max_in_flight=env_int("MAX_IN_FLIGHT", 512),
+        max_in_flight_read=env_int("MAX_IN_FLIGHT_READ", 400),
+        max_in_flight_write=env_int("MAX_IN_FLIGHT_WRITE", 32),
+        max_in_flight_upload=env_int("MAX_IN_FLIGHT_UPLOAD", 4),
+        max_in_flight_contact=env_int("MAX_IN_FLIGHT_CONTACT", 8),
+        max_body_read=env_int("MAX_BODY_READ", 16 * 1024),
+        max_body_write=env_int("MAX_BODY_WRITE", 8 * 1024 * 1024),
+        max_body_upload=env_int("MAX_BODY_UPLOAD", 5 * 1024 * 1024),
+        max_body_contact=env_int("MAX_BODY_CONTACT", 16 * 1024),
+        profile_token=env_str("PROFILE_TOKEN"),
+        profile_sample_rate=env_float("PROFILE_SAMPLE_RATE", 0.0),
+        profile_interval_ms=env_float("PROFILE_INTERVAL_MS", 5),
+        profile_max_stored=env_int("PROFILE_MAX_STORED", 20),
+        profile_max_concurrent=env_int("PROFILE_MAX_CONCURRENT", 2),
+        slow_request_ms=env_float("SLOW_REQUEST_MS", 500),
+        slow_log_size=env_int("SLOW_LOG_SIZE", 100),
+        analytics_enabled=env_bool("ANALYTICS_ENABLED", True),
+        analytics_flush_seconds=env_float("ANALYTICS_FLUSH_SECONDS", 10),
+        analytics_max_keys=env_int("ANALYTICS_MAX_KEYS", 10_000),
+        sse_max_clients=env_int("SSE_MAX_CLIENTS", 10_000),
+        sse_queue_size=env_int("SSE_QUEUE_SIZE", 64),
+        sse_heartbeat_seconds=env_float("SSE_HEARTBEAT_SECONDS", 15),
+        sse_replay_size=env_int("SSE_REPLAY_SIZE", 1_000),
+    )
+
+
+settings = get_settings()
@@ -0,0 +1,253 @@
+"""Serving many portfolios from one process.
+
+With TENANT_MODE=host a request for `alice.<TENANT_DOMAIN>` (or a host
+registered for alice) is served from alice's portfolio; with
+TENANT_MODE=path the same goes for `/t/alice/...`, the prefix being
+stripped before routing. Anything else is the default tenant (MONGO_DB),
+so a single-portfolio deployment is just TENANT_MODE=off.
+
+Each tenant has its own database (TENANT_DB_PREFIX + name), so every query
+path, index and single-document collection such as `personal` works
+unchanged; the request's tenant is a context variable read by the `db`
+proxy. All tenants share the one Motor client and its connection pool, the
+process pool, the mail worker and the background tasks.
+
+In-process state keyed by tenant (response cache, replica, search index,
+CV) is held by TenantLocal: built on a tenant's first request, dropped for
+the least recently used tenant beyond TENANT_MAX_ACTIVE, and each cache
+capped by its per-tenant byte quota.
+
+Tenants are documents in the `tenants` collection of MONGO_DB, added with
+`python -m app.core.tenancy add <name> [--host <host>]`.
+"""
+from collections import OrderedDict
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import re
+import time
+from app.core.codec import encode
+from app.core.settings import settings
+from app.db.database import DEFAULT_TENANT, control_db, current_tenant, mongo, tenant_database
+from app.db.indexes import ensure_indexes
+
+TENANT_MODE = settings.tenant_mode
+TENANT_DOMAIN = (settings.tenant_domain or "").lower()
+TENANT_MAX_ACTIVE = settings.tenant_max_active
+TENANT_PATH_PREFIX = "/t/"
+TENANTS_COLLECTION = "tenants"
+# A name (or host) not found is looked up again after this long, so tenants
+# added meanwhile are served without a restart
+TENANT_MISS_SECONDS = 30
+MAX_REMEMBERED_MISSES = 10_000
+# DNS label; also keeps database names short and safe
+TENANT_NAME = re.compile(r"^[a-z0-9](?:[a-z0-9-]{0,38}[a-z0-9])?$")
+
+
+def multi_tenant() -> bool:
+    return TENANT_MODE in ("host", "path")
+
+
+def quota(limit: int) -> int:
+    # Per-tenant quotas only apply when there are tenants to share memory with
+    return limit if multi_tenant() else 0
+
+
+class TenantLocal:
+    """One instance of `factory(tenant)` per tenant, behind a proxy.
+
+    Module-level singletons such as `response_cache = TenantLocal(...)` keep
+    their call sites: attribute access goes to the current tenant's
+    instance. Only the TENANT_MAX_ACTIVE most recently used tenants keep
+    theirs; the default tenant's is never dropped.
+    """
+
+    def __init__(self, factory, max_tenants: int = TENANT_MAX_ACTIVE):
+        self._factory = factory
+        self._max_tenants = max_tenants
+        self._default = factory(DEFAULT_TENANT)
+        self._instances = OrderedDict()  # tenant -> instance, least recently used first
+
+    def for_tenant(self, tenant: str):
+        if tenant == DEFAULT_TENANT:
+            return self._default
+        instance = self._instances.get(tenant)
+        if instance is None:
+            instance = self._instances[tenant] = self._factory(tenant)
+            if len(self._instances) > self._max_tenants:
+                self._instances.popitem(last=False)
+        else:
+            self._instances.move_to_end(tenant)
+        return instance
+
+    def all_tenants(self) -> list:
+        # -> [(tenant, instance)] for every tenant with state in memory
+        return [(DEFAULT_TENANT, self._default), *self._instances.items()]
+
+    def __getattr__(self, name):
+        return getattr(self.for_tenant(current_tenant.get()), name)
+
+
+class TenantRegistry:
+    def __init__(self):
+        self.known = set()
+        self.hosts = {}  # registered host -> tenant
+        self._misses = OrderedDict()  # name or "host:<host>" -> when it was not found
+        self.lookups = 0
+
+    def add(self, doc: dict):
+        if doc["_id"] not in self.known:
+            self.known.add(doc["_id"])
+            # A no-op for indexes that exist; new tenants get theirs here
+            asyncio.create_task(self.index(doc["_id"]))
+        for host in doc.get("hosts") or []:
+            self.hosts[host.lower()] = doc["_id"]
+
+    @staticmethod
+    async def index(tenant: str):
+        try:
+            await ensure_indexes(mongo.database(tenant))
+        except Exception as e:
+            print(f"Index creation for tenant {tenant} failed: {e}")
+
+    async def load(self):
+        async for doc in control_db[TENANTS_COLLECTION].find({}, {"hosts": 1}):
+            self.add(doc)
+
+    def missed_recently(self, key: str) -> bool:
+        missed = self._misses.get(key)
+        return missed is not None and time.monotonic() - missed < TENANT_MISS_SECONDS
+
+    def remember_miss(self, key: str):
+        self._misses[key] = time.monotonic()
+        self._misses.move_to_end(key)
+        if len(self._misses) > MAX_REMEMBERED_MISSES:
+            self._misses.popitem(last=False)
+
+    async def find(self, key: str, filter: dict):
+        if self.missed_recently(key):
+            return None
+        self.lookups += 1
+        doc = await control_db[TENANTS_COLLECTION].find_one(filter, {"hosts": 1})
+        if doc is None:
+            self.remember_miss(key)
+            return None
+        self._misses.pop(key, None)
+        self.add(doc)
+        return doc["_id"]
+
+    async def by_name(self, name: str):
+        if name in self.known:
+            return name
+        if not TENANT_NAME.match(name):
+            return None
+        return await self.find(name, {"_id": name})
+
+    async def by_host(self, host: str):
+        # -> tenant name, DEFAULT_TENANT for hosts outside TENANT_DOMAIN, or None
+        tenant = self.hosts.get(host)
+        if tenant is not None:
+            return tenant
+        if TENANT_DOMAIN and host.endswith("." + TENANT_DOMAIN):
+            return await self.by_name(host[:-len(TENANT_DOMAIN) - 1])
+        tenant = await self.find(f"host:{host}", {"hosts": host})
+        return DEFAULT_TENANT if tenant is None else tenant
+
+    async def create(self, name: str, hosts: list) -> dict:
+        if not TENANT_NAME.match(name):
+            raise ValueError(f"Invalid tenant name {name!r}: lowercase letters, digits and dashes")
+        hosts = sorted({host.lower() for host in hosts})
+        await control_db[TENANTS_COLLECTION].update_one(
+            {"_id": name},
+            {"$setOnInsert": {"created_at": datetime.now(timezone.utc)}, "$addToSet": {"hosts": {"$each": hosts}}},
+            upsert=True,
+        )
+        await ensure_indexes(mongo.database(name))
+        return await control_db[TENANTS_COLLECTION].find_one({"_id": name})
+
+    def stats(self) -> dict:
+        return {
+            "mode": TENANT_MODE,
+            "known": len(self.known),
+            "hosts": len(self.hosts),
+            "lookups": self.lookups,
+            "current": current_tenant.get() or None,
+        }
+
+
+tenant_registry = TenantRegistry()
+
+
+def request_host(scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"host":
+            return value.decode("latin-1").rsplit(":", 1)[0].strip().lower()
+    return ""
+
+
+class TenantMiddleware:
+    """Pure ASGI: picks the tenant before anything reads from MongoDB."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def not_found(self, send):
+        body = encode({"detail": "Unknown portfolio"})
+        await send({"type": "http.response.start", "status": 404, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not multi_tenant():
+            await self.app(scope, receive, send)
+            return
+
+        if TENANT_MODE == "host":
+            tenant = await tenant_registry.by_host(request_host(scope))
+        else:
+            tenant = DEFAULT_TENANT
+            path = scope["path"]
+            if path.startswith(TENANT_PATH_PREFIX):
+                name, slash, rest = path[len(TENANT_PATH_PREFIX):].partition("/")
+                tenant = await tenant_registry.by_name(name)
+                prefix = TENANT_PATH_PREFIX + name
+                raw_path = scope.get("raw_path") or path.encode()
+                scope = {
+                    **scope,
+                    "path": slash + rest or "/",
+                    "raw_path": raw_path[len(prefix):] if raw_path.startswith(prefix.encode()) else raw_path,
+                    "root_path": scope.get("root_path", "") + prefix,
+                }
+        if tenant is None:
+            await self.not_found(send)
+            return
+
+        token = current_tenant.set(tenant)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
+
+
+async def add_tenant(name: str, hosts: list):
+    mongo.connect()
+    try:
+        doc = await tenant_registry.create(name, hosts)
+    finally:
+        mongo.close()
+    print(f"Tenant {doc['_id']} uses database {tenant_database(doc['_id'])}; hosts: {', '.join(doc.get('hosts') or []) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the portfolios served in multi-tenant mode")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Register a tenant (or add hosts to one) and create its indexes")
+    add.add_argument("name")
+    add.add_argument("--host", action="append", default=[], help="Extra host name served as this tenant; repeatable")
+    args = parser.parse_args()
+    asyncio.run(add_tenant(args.name, args.host))
+
+
+if __name__ == "__main__":
+    main()
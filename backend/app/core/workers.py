@@ -0,0 +1,33 @@
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import multiprocessing
+from app.core.settings import settings
+
+PROCESS_POOL_WORKERS = settings.process_pool_workers
+
+_pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    # Created on first use so worker processes are only spawned when needed
+    global _pool
+    if _pool is None:
+        # Never fork: by now Motor's threads are running, and a forked child
+        # inherits their locks in whatever state they happened to be
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS, mp_context=context)
+    return _pool
+
+
+async def run_in_process(fn, *args):
+    # fn and args must be picklable (module level functions, bytes, plain data)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), fn, *args)
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
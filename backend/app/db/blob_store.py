@@ -0,0 +1,72 @@
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from bson import Binary
+from datetime import datetime, timezone
+from io import BytesIO
+import hashlib
+from app.core.settings import settings
+from app.db.database import db, get_database
+
+# Blobs up to this size are stored inline as BSON binary, larger ones go to GridFS
+GRIDFS_THRESHOLD = settings.blob_gridfs_threshold
+CHUNK_SIZE = 256 * 1024
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def gridfs_bucket():
+    return AsyncIOMotorGridFSBucket(get_database(), bucket_name="blobs")
+
+
+async def store_blob(content: bytes, content_type: str) -> str:
+    return await store_blob_file(BytesIO(content), content_hash(content), len(content), content_type)
+
+
+async def store_blob_file(source, sha256: str, size: int, content_type: str) -> str:
+    # Content addressed: the SHA-256 is the _id, so identical uploads are stored once.
+    # `source` is a file object at the start of the content, read in chunks into GridFS
+    if await db.blobs.find_one({"_id": sha256}, {"_id": 1}):
+        return sha256
+
+    doc = {
+        "_id": sha256,
+        "content_type": content_type,
+        "size": size,
+        "created_at": datetime.now(timezone.utc),
+    }
+    if size > GRIDFS_THRESHOLD:
+        doc["gridfs_id"] = await gridfs_bucket().upload_from_stream(
+            sha256, source, chunk_size_bytes=CHUNK_SIZE, metadata={"content_type": content_type}
+        )
+    else:
+        doc["data"] = Binary(source.read())
+
+    # Upsert keeps concurrent uploads of the same content from racing on the _id;
+    # the losers drop the GridFS file they wrote so it is not orphaned
+    result = await db.blobs.update_one({"_id": sha256}, {"$setOnInsert": doc}, upsert=True)
+    if result.upserted_id is None and "gridfs_id" in doc:
+        await gridfs_bucket().delete(doc["gridfs_id"])
+    return sha256
+
+
+async def get_blob_meta(sha256: str):
+    return await db.blobs.find_one({"_id": sha256}, {"data": 0})
+
+
+async def iter_blob(sha256: str):
+    # Yields the blob in chunks without materializing GridFS files in memory
+    doc = await db.blobs.find_one({"_id": sha256})
+    if doc is None:
+        return
+
+    if "data" in doc:
+        yield bytes(doc["data"])
+        return
+
+    stream = await gridfs_bucket().open_download_stream(doc["gridfs_id"])
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
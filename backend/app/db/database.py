@@ -1,9 +1,101 @@
+from contextvars import ContextVar
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
+from app.core.metrics import mongo_listener
+from app.core.settings import settings
 
-load_dotenv()
+# Tenant of the current request, set by app.core.tenancy.TenantMiddleware.
+# "" is the default tenant, whose data lives in MONGO_DB.
+DEFAULT_TENANT = ""
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default=DEFAULT_TENANT)
 
-MONGO_URL = os.getenv("MONGO_URL")
-client = AsyncIOMotorClient(MONGO_URL)
-db = client["portfolio"]
+
+def tenant_database(tenant: str) -> str:
+    return settings.mongo_db if tenant == DEFAULT_TENANT else f"{settings.tenant_db_prefix}{tenant}"
+
+
+class Mongo:
+    """Owns the single Motor client for the process.
+
+    The client is opened by the app lifespan (or lazily on first use by
+    scripts) with pool and timeout settings from app.core.settings, and
+    closed on shutdown. Every tenant's database is reached through this one
+    client, so all tenants share its connection pool.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.ready = False
+        self.transactions = None  # unknown until asked
+
+    def connect(self) -> AsyncIOMotorClient:
+        if self.client is None:
+            self.client = AsyncIOMotorClient(
+                settings.mongo_url,
+                maxPoolSize=settings.mongo_max_pool_size,
+                minPoolSize=settings.mongo_min_pool_size,
+                maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+                serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+                connectTimeoutMS=settings.mongo_connect_timeout_ms,
+                socketTimeoutMS=settings.mongo_socket_timeout_ms,
+                compressors=list(settings.mongo_compressors) or None,
+                appname="portfolio-api",
+                # Per-collection command timings for /metrics
+                event_listeners=[mongo_listener],
+            )
+        return self.client
+
+    def database(self, tenant: str = None):
+        # The current tenant's database unless one is given
+        return self.connect()[tenant_database(current_tenant.get() if tenant is None else tenant)]
+
+    def control_database(self):
+        # Shared state of the whole deployment (tenant list, cache versions,
+        # mail outbox) stays in MONGO_DB whatever the current tenant is
+        return self.connect()[settings.mongo_db]
+
+    async def ping(self):
+        await self.control_database().command("ping")
+
+    async def supports_transactions(self) -> bool:
+        # Replica sets and sharded clusters do; a standalone server does not
+        if self.transactions is None:
+            try:
+                hello = await self.control_database().command("hello")
+            except Exception as e:
+                print(f"Transaction support check failed: {e}")
+                return False
+            self.transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        return self.transactions
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        self.ready = False
+        self.transactions = None
+
+
+class DatabaseProxy:
+    # Routers import `db` at module load; attribute access is forwarded to the
+    # live database so the client can be created and replaced by the lifespan,
+    # and so every request reaches its own tenant's database
+    def __init__(self, control: bool = False):
+        self._control = control
+
+    def _database(self):
+        return mongo.control_database() if self._control else mongo.database()
+
+    def __getattr__(self, name):
+        return getattr(self._database(), name)
+
+    def __getitem__(self, name):
+        return self._database()[name]
+
+
+mongo = Mongo()
+db = DatabaseProxy()
+control_db = DatabaseProxy(control=True)
+
+
+def get_database():
+    return mongo.database()
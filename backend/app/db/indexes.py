@@ -0,0 +1,49 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+import asyncio
+
+
+def sort_index(field: str) -> IndexModel:
+    # List endpoints sort by (field, _id); one ascending index serves both directions
+    return IndexModel([(field, ASCENDING), ("_id", ASCENDING)], name=f"{field}_id")
+
+
+# Collection -> indexes required by the query paths in app/api
+INDEXES = {
+    "experiences": [sort_index("start_date"), sort_index("end_date"), sort_index("Company_name")],
+    "educations": [sort_index("start_date"), sort_index("end_date"), sort_index("institution")],
+    "certificates": [sort_index("issue_date"), sort_index("expiration_date"), sort_index("title")],
+    "projects": [sort_index("name"), IndexModel([("technologies", ASCENDING)], name="technologies")],
+    "tech_stacks": [sort_index("name"), IndexModel([("image_hash", ASCENDING)], name="image_hash")],
+    "phones": [sort_index("number")],
+    # Daily view counters, read by /analytics/stats
+    "analytics_counters": [IndexModel([("day", ASCENDING), ("kind", ASCENDING)], name="day_kind")],
+    # Derived views (app.services.views): the read order, and the lookups
+    # of incremental refreshes
+    "view_technologies": [
+        IndexModel([("usage", DESCENDING), ("_id", ASCENDING)], name="usage_id"),
+        IndexModel([("projects.id", ASCENDING)], name="projects_id"),
+        IndexModel([("skill_id", ASCENDING)], name="skill_id"),
+    ],
+    "view_timeline": [
+        sort_index("start"),
+        IndexModel([("kind", ASCENDING), ("start", ASCENDING), ("_id", ASCENDING)], name="kind_start_id"),
+        IndexModel([("source", ASCENDING), ("refreshed_at", ASCENDING)], name="source_refreshed_at"),
+    ],
+}
+
+# Collections shared by every tenant, kept in MONGO_DB only
+CONTROL_INDEXES = {
+    # Version polling reads only what changed since the last poll
+    "cache_versions": [IndexModel([("updated_at", ASCENDING)], name="updated_at")],
+    "contact_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        IndexModel([("status", ASCENDING), ("locked_at", ASCENDING)], name="status_locked_at"),
+    ],
+}
+
+
+async def ensure_indexes(database, indexes: dict = INDEXES):
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    await asyncio.gather(*(
+        database[name].create_indexes(models) for name, models in indexes.items()
+    ))
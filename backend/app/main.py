@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import routes_phone
 from app.api import routes_personal
@@ -8,8 +10,96 @@ from app.api import routes_skill
 from app.api import routes_certificate
 from app.api import routes_project
 from app.api import routes_contact
+from app.api import routes_portfolio
+from app.api import routes_cache
+from app.api import routes_health
+from app.api import routes_search
+from app.api import routes_metrics
+from app.api import routes_snapshot
+from app.api import routes_cv
+from app.api import routes_analytics
+from app.api import routes_debug
+from app.api import routes_events
+from app.api import routes_views
+from app.core.admission import AdmissionMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.replica import replica
+from app.core.settings import settings
+from app.core.tenancy import TenantMiddleware, multi_tenant, tenant_registry
+from app.core.workers import shutdown_process_pool
+from app.db.database import mongo
+from app.db.indexes import CONTROL_INDEXES, ensure_indexes
+from app.services.analytics import analytics
+from app.services.broadcaster import change_broadcaster
+from app.services.cache_sync import version_watcher
+from app.services.mailer import mail_worker
+from app.services.search import search_index
+from app.services.snapshots import snapshot_builder
+from app.services.views import derived_views, view_refresher
 
-app = FastAPI()
+STARTUP_RETRY_SECONDS = 5
+
+
+async def bootstrap_database():
+    # Retried until it succeeds; /health/ready reports 503 until then
+    while True:
+        try:
+            await mongo.ping()
+            await ensure_indexes(mongo.database())
+            await ensure_indexes(mongo.control_database(), CONTROL_INDEXES)
+            if multi_tenant():
+                await tenant_registry.load()
+            if settings.cache_sync_enabled:
+                await version_watcher.prime()
+            await replica.load_all()
+            await search_index.build()
+            # Also catches up with data written while the API was down
+            await derived_views.ensure_built()
+            if settings.mongo_warm_up:
+                await routes_portfolio.warm_portfolio()
+            mongo.ready = True
+            snapshot_builder.schedule()
+            if settings.cache_sync_enabled:
+                version_watcher.start()
+            replica.start()
+            return
+        except Exception as e:
+            print(f"Database bootstrap failed, retrying in {STARTUP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(STARTUP_RETRY_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mongo.connect()
+    bootstrap = asyncio.create_task(bootstrap_database())
+    # Give a healthy database the chance to finish before serving traffic,
+    # but keep starting up (and retrying in the background) if it is down
+    await asyncio.wait([bootstrap], timeout=settings.mongo_server_selection_timeout_ms / 1000 * 2)
+    mail_worker.start()
+    analytics.start()
+    change_broadcaster.start()
+    if settings.snapshot_enabled:
+        snapshot_builder.start()
+    view_refresher.start()
+    yield
+    bootstrap.cancel()
+    await change_broadcaster.stop()
+    await version_watcher.stop()
+    await replica.stop()
+    await snapshot_builder.stop()
+    await view_refresher.stop()
+    await mail_worker.stop()
+    # Last flush of buffered view counts, while the client is still open
+    await analytics.stop()
+    shutdown_process_pool()
+    mongo.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Inside CORS, so 429/503/413 answers still carry the CORS headers
+app.add_middleware(AdmissionMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,8 +107,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Profile-Id"],
 )
 
+# Per-request timings and profiles; covers CORS and admission as well
+app.add_middleware(ProfilingMiddleware)
+
+# Covers every middleware below, so recorded latency includes them too
+app.add_middleware(MetricsMiddleware)
+
+# Outermost: the tenant is known before anything reads from MongoDB, and
+# /t/<name> is stripped before routes are matched
+app.add_middleware(TenantMiddleware)
+
 app.include_router(routes_phone.router, prefix="/phones", tags=["phones"])
 app.include_router(routes_personal.router, prefix="/personals", tags=["personals"])
 app.include_router(routes_education.router, prefix="/educations", tags=["educations"])
@@ -26,4 +127,15 @@ app.include_router(routes_experience.router, prefix="/experiences", tags=["exper
 app.include_router(routes_skill.router, prefix="/skills", tags=["skills"])
 app.include_router(routes_certificate.router, prefix="/certificates", tags=["certificates"])
 app.include_router(routes_project.router, prefix="/projects", tags=["projects"])
-app.include_router(routes_contact.router, prefix="/contact", tags=["contact"])  
\ No newline at end of file
+app.include_router(routes_contact.router, prefix="/contact", tags=["contact"])
+app.include_router(routes_portfolio.router, prefix="/portfolio", tags=["portfolio"])
+app.include_router(routes_cache.router, prefix="/cache", tags=["cache"])
+app.include_router(routes_health.router, prefix="/health", tags=["health"])
+app.include_router(routes_search.router, prefix="/search", tags=["search"])
+app.include_router(routes_metrics.router, tags=["metrics"])
+app.include_router(routes_snapshot.router, prefix="/snapshots", tags=["snapshots"])
+app.include_router(routes_cv.router, prefix="/cv", tags=["cv"])
+app.include_router(routes_analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(routes_debug.router, prefix="/debug", tags=["debug"])
+app.include_router(routes_events.router, prefix="/events", tags=["events"])
+app.include_router(routes_views.router, prefix="/views", tags=["views"])
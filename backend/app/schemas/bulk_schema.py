@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Any, Literal, Optional
+
+
+class BulkOperation(BaseModel):
+    op: Literal["insert", "update", "delete"]
+    id: Optional[str] = None  # Required for update/delete; optional _id for insert
+    document: Optional[dict[str, Any]] = None  # Validated against the collection's schema
+
+
+class BulkRequest(BaseModel):
+    ordered: bool = True
+    operations: list[BulkOperation]
+
+
+class PortfolioImport(BaseModel):
+    # Same shape as GET /portfolio/export; items are validated per collection
+    personal: Optional[list[dict[str, Any]]] = None
+    educations: Optional[list[dict[str, Any]]] = None
+    experiences: Optional[list[dict[str, Any]]] = None
+    projects: Optional[list[dict[str, Any]]] = None
+    certificates: Optional[list[dict[str, Any]]] = None
+    phones: Optional[list[dict[str, Any]]] = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, HttpUrl
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 class Certificate(BaseModel):
     title: str
@@ -9,3 +9,13 @@ class Certificate(BaseModel):
     expiration_date: Optional[date]
     description: Optional[str]
     certificate_url: Optional[HttpUrl]
+
+
+class CertificateOut(BaseModel):
+    id: str
+    title: str
+    issuer: str
+    issue_date: Optional[datetime] = None  # Stored as a datetime at midnight
+    expiration_date: Optional[datetime] = None
+    description: Optional[str] = None
+    certificate_url: Optional[str] = None
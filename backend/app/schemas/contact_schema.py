@@ -1,9 +1,10 @@
 import os
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr
 from typing import Optional
 
 class ContactForm(BaseModel):
     first_name: str
     last_name: str
-    email: str
+    # Validated as a single address: it is copied into the Reply-To header
+    email: EmailStr
     message: str
\ No newline at end of file
@@ -8,4 +8,14 @@ class Education(BaseModel):
     field_of_study: Optional[str]
     start_date: Optional[str]
     end_date: Optional[str]
-    description: Optional[str]
\ No newline at end of file
+    description: Optional[str]
+
+
+class EducationOut(BaseModel):
+    id: str
+    institution: str
+    degree: str
+    field_of_study: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    description: Optional[str] = None
@@ -8,4 +8,14 @@ class Experience(BaseModel):
     start_date: Optional[date]
     end_date: Optional[date]
     description: Optional[str]
-    website: Optional[HttpUrl]  
\ No newline at end of file
+    website: Optional[HttpUrl]
+
+
+class ExperienceOut(BaseModel):
+    id: str
+    Company_name: str
+    position: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    description: Optional[str] = None
+    website: Optional[str] = None
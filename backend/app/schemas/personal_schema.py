@@ -10,4 +10,16 @@ class Personal(BaseModel):
     email: EmailStr
     linkedin: Optional[HttpUrl]
     github: Optional[HttpUrl]
-    birthdate: Optional[date]
\ No newline at end of file
+    birthdate: Optional[date]
+
+
+class PersonalOut(BaseModel):
+    id: str
+    name: str
+    passion: Optional[str] = None
+    address: Optional[str] = None
+    phone: Optional[str] = None
+    email: str
+    linkedin: Optional[str] = None
+    github: Optional[str] = None
+    birthdate: Optional[str] = None  # Stored as an ISO date string
@@ -6,3 +6,8 @@ class Phone(BaseModel):
 class PhoneUpdate(BaseModel):
     id: str
     number: str
+
+
+class PhoneOut(BaseModel):
+    id: str
+    number: str
@@ -7,4 +7,13 @@ class Project(BaseModel):
     description: Optional[str]
     repository_url: Optional[str]
     live_url: Optional[str]
-    technologies: Optional[list[str]]  # List of technologies used in the project
\ No newline at end of file
+    technologies: Optional[list[str]]  # List of technologies used in the project
+
+
+class ProjectOut(BaseModel):
+    id: str
+    name: str
+    description: Optional[str] = None
+    repository_url: Optional[str] = None
+    live_url: Optional[str] = None
+    technologies: Optional[list[str]] = None
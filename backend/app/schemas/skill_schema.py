@@ -2,8 +2,16 @@ from pydantic import BaseModel
 from typing import Optional
 
 
-class Skill(BaseModel):
-    name: str
-    image_filename: str
-    content_type: Optional[str]
-    image_data: Optional[str] 
\ No newline at end of file
+class SkillOut(BaseModel):
+    id: str
+    name: Optional[str] = None
+    image_filename: Optional[str] = None
+    content_type: Optional[str] = None
+    image_url: str
+    image_sizes: list[int] = []
+
+
+class SkillUploadOut(BaseModel):
+    id: str
+    filename: Optional[str] = None
+    image_hash: str
@@ -0,0 +1,172 @@
+"""Write-behind view counters.
+
+Handlers call `analytics.hit(kind, item)`, which only bumps an in-memory
+counter. A background task flushes the counters every
+ANALYTICS_FLUSH_SECONDS as a single unordered bulk_write of upserting
+`$inc`s into analytics_counters (one document per kind, item and UTC day),
+one bulk_write per tenant with hits, and the app lifespan flushes once more
+on shutdown.
+
+Loss policy, stated plainly:
+- A crash or kill -9 loses the hits of the last ANALYTICS_FLUSH_SECONDS at
+  most. A clean shutdown loses nothing.
+- The buffer holds at most ANALYTICS_MAX_KEYS distinct counters. Once full,
+  hits for new counters are dropped (and counted in `dropped`); hits for
+  counters already buffered are still added.
+- A failed flush is put back and retried on the next tick. If the write
+  landed but its acknowledgement was lost, those hits are counted twice;
+  the counters favour over-counting to losing views.
+"""
+from datetime import datetime, timedelta, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+from app.core.settings import settings
+from app.db.database import current_tenant, db, mongo
+
+ANALYTICS_FLUSH_SECONDS = settings.analytics_flush_seconds
+ANALYTICS_MAX_KEYS = settings.analytics_max_keys
+
+COUNTERS_COLLECTION = "analytics_counters"
+
+
+def utcday() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class BoundedCounter:
+    """In-memory counters, at most max_keys of them.
+
+    Only touched from the event loop (handlers and the flush task), and
+    never across an await, so no lock is needed.
+    """
+
+    def __init__(self, max_keys: int = ANALYTICS_MAX_KEYS):
+        self.max_keys = max_keys
+        self._counts = {}
+        self.dropped = 0
+
+    def add(self, key: tuple, amount: int = 1) -> bool:
+        if key in self._counts:
+            self._counts[key] += amount
+            return True
+        if len(self._counts) >= self.max_keys:
+            self.dropped += amount
+            return False
+        self._counts[key] = amount
+        return True
+
+    def drain(self) -> dict:
+        drained, self._counts = self._counts, {}
+        return drained
+
+    def pending(self) -> int:
+        return sum(self._counts.values())
+
+
+class Analytics:
+    def __init__(self, flush_seconds: float = ANALYTICS_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.counter = BoundedCounter()
+        self.task = None
+        self.stopping = asyncio.Event()
+        self.flushes = 0
+        self.flushed_hits = 0
+        self.last_error = None
+
+    def hit(self, kind: str, item: str):
+        # Request path: one dict update
+        if settings.analytics_enabled:
+            self.counter.add((current_tenant.get(), kind, item, utcday()))
+
+    def start(self):
+        if self.task is None:
+            self.stopping.clear()
+            self.task = asyncio.create_task(self.run(), name="analytics-flush")
+
+    async def stop(self):
+        # Not cancelled: a flush in progress finishes, then the last one runs
+        if self.task is not None:
+            self.stopping.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+    async def run(self):
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> int:
+        counts = self.counter.drain()
+        if not counts:
+            return 0
+        by_tenant = {}
+        for key in counts:
+            by_tenant.setdefault(key[0], []).append(key)
+        failed = []
+        for tenant, keys in by_tenant.items():
+            failed.extend(await self.write(tenant, keys, counts))
+
+        # Put back what did not make it; the next tick retries it
+        for key in failed:
+            self.counter.add(key, counts[key])
+        written = sum(counts.values()) - sum(counts[key] for key in failed)
+        self.flushes += 1
+        self.flushed_hits += written
+        return written
+
+    async def write(self, tenant: str, keys: list, counts: dict) -> list:
+        # -> the keys whose update failed
+        operations = [
+            UpdateOne(
+                {"_id": f"{kind}:{item}:{day}"},
+                {"$inc": {"hits": counts[(tenant, kind, item, day)]}, "$setOnInsert": {"kind": kind, "item": item, "day": day}},
+                upsert=True,
+            )
+            for _, kind, item, day in keys
+        ]
+        try:
+            await mongo.database(tenant)[COUNTERS_COLLECTION].bulk_write(operations, ordered=False)
+            return []
+        except BulkWriteError as e:
+            failed = [keys[error["index"]] for error in e.details.get("writeErrors", [])]
+            self.last_error = f"{len(failed)} counter update(s) failed"
+            return failed
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Analytics flush failed: {e}")
+            return keys
+
+    def stats(self) -> dict:
+        return {
+            "pending_hits": self.counter.pending(),
+            "dropped_hits": self.counter.dropped,
+            "flushes": self.flushes,
+            "flushed_hits": self.flushed_hits,
+            "flush_seconds": self.flush_seconds,
+            "last_error": self.last_error,
+        }
+
+
+analytics = Analytics()
+
+
+async def view_stats(kinds: tuple, days: int, limit: int) -> dict:
+    # Counts are as of the last flush, so up to ANALYTICS_FLUSH_SECONDS old
+    since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+    pipeline = [
+        {"$match": {"day": {"$gte": since}, "kind": {"$in": list(kinds)}}},
+        {"$group": {"_id": {"kind": "$kind", "item": "$item"}, "hits": {"$sum": "$hits"}}},
+        {"$sort": {"hits": -1}},
+    ]
+    result = {kind: {"total": 0, "top": []} for kind in kinds}
+    async for row in db[COUNTERS_COLLECTION].aggregate(pipeline):
+        entry = result[row["_id"]["kind"]]
+        entry["total"] += row["hits"]
+        if len(entry["top"]) < limit:
+            entry["top"].append({"id": row["_id"]["item"], "hits": row["hits"]})
+    return {"since": since, "kinds": result}
@@ -0,0 +1,195 @@
+"""Server-Sent Events fan-out of content changes.
+
+One broadcaster per worker subscribes to the change events (local writes,
+and other workers' writes replayed by app.services.cache_sync) and formats
+each event once; every connected client only gets a reference to the same
+bytes in its own bounded queue. Idle connections cost a queue and a parked
+task, nothing else: a single task sends the heartbeats, and only to clients
+with nothing queued.
+
+A client that falls SSE_QUEUE_SIZE events behind loses its queue and gets
+one `resync` event instead, telling it to refetch what it shows. A client
+reconnecting with Last-Event-ID is sent the events it missed while they are
+still among the last SSE_REPLAY_SIZE, and `resync` otherwise.
+
+In multi-tenant mode a client only hears about its own tenant's changes.
+"""
+from collections import deque
+import asyncio
+from app.core.codec import encode
+from app.core.events import WORKER_ID, subscribe
+from app.core.settings import settings
+from app.db.database import current_tenant
+
+SSE_MAX_CLIENTS = settings.sse_max_clients
+SSE_QUEUE_SIZE = settings.sse_queue_size
+SSE_HEARTBEAT_SECONDS = settings.sse_heartbeat_seconds
+SSE_REPLAY_SIZE = settings.sse_replay_size
+# Clients wait this long before reconnecting after a dropped connection
+SSE_RETRY_MS = 3000
+
+HEARTBEAT = b": ping\n\n"
+CLOSE = None
+
+
+def sse_message(event_id: str, event: str, data: dict) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), event.encode(), encode(data))
+
+
+class Client:
+    __slots__ = ("queue", "tenant", "collections", "since")
+
+    def __init__(self, tenant: str, collections: frozenset, queue_size: int, since: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.tenant = tenant
+        self.collections = collections  # empty for every collection
+        self.since = since  # last sequence queued before the stream started
+
+    def wants(self, tenant: str, collection: str) -> bool:
+        return tenant == self.tenant and (not self.collections or collection in self.collections)
+
+
+class ChangeBroadcaster:
+    def __init__(self, max_clients: int = SSE_MAX_CLIENTS, queue_size: int = SSE_QUEUE_SIZE,
+                 heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS, replay_size: int = SSE_REPLAY_SIZE):
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.clients = set()
+        # (sequence, tenant, collection, message), for Last-Event-ID replays
+        self.recent = deque(maxlen=replay_size)
+        self.sequence = 0
+        self.task = None
+        self.published = 0
+        self.overflows = 0
+        self.rejected = 0
+
+    def event_id(self, sequence: int) -> str:
+        # Sequences are per worker; an id from another worker means resync
+        return f"{WORKER_ID}-{sequence}"
+
+    def resync_message(self) -> bytes:
+        return sse_message(self.event_id(self.sequence), "resync", {"reason": "missed events"})
+
+    def connect(self, collections: frozenset, last_event_id: str = None):
+        # -> Client, or None when the worker is at SSE_MAX_CLIENTS. It only
+        # receives events once its stream starts (see stream()).
+        if len(self.clients) >= self.max_clients:
+            self.rejected += 1
+            return None
+        client = Client(current_tenant.get(), collections, self.queue_size, self.sequence)
+        if last_event_id:
+            for message in self.missed(last_event_id, client):
+                self.offer(client, message)
+        return client
+
+    def disconnect(self, client: Client):
+        self.clients.discard(client)
+
+    def missed(self, last_event_id: str, client: Client) -> list:
+        worker, _, sequence = last_event_id.rpartition("-")
+        if worker != WORKER_ID or not sequence.isdigit():
+            return [self.resync_message()]
+        sequence = int(sequence)
+        if sequence >= self.sequence:
+            return []
+        if not self.recent or self.recent[0][0] > sequence + 1:
+            return [self.resync_message()]
+        return [
+            message for number, tenant, collection, message in self.recent
+            if number > sequence and client.wants(tenant, collection)
+        ]
+
+    def offer(self, client: Client, message: bytes):
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event
+            self.overflows += 1
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            client.queue.put_nowait(self.resync_message())
+
+    def publish(self, event):
+        self.sequence += 1
+        self.published += 1
+        message = sse_message(self.event_id(self.sequence), "change", {
+            "collection": event.collection,
+            "operation": event.operation,
+            "id": event.id,
+            "version": event.version,
+        })
+        self.recent.append((self.sequence, event.tenant, event.collection, message))
+        for client in list(self.clients):
+            if client.wants(event.tenant, event.collection):
+                self.offer(client, message)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name="sse-heartbeat")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        # Ends the open streams instead of leaving them to the server's timeout
+        for client in list(self.clients):
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            client.queue.put_nowait(CLOSE)
+
+    async def run(self):
+        # Keeps proxies from closing idle connections, and finds dead ones
+        # (the write fails and the stream is torn down)
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for client in list(self.clients):
+                if client.queue.empty():
+                    client.queue.put_nowait(HEARTBEAT)
+
+    async def stream(self, client: Client):
+        # Registered here rather than in connect(), so a response that never
+        # starts streaming leaves nothing behind; what was published in
+        # between is taken from the replay buffer
+        self.clients.add(client)
+        for message in self.missed(self.event_id(client.since), client):
+            self.offer(client, message)
+        try:
+            yield b"retry: %d\n\n" % SSE_RETRY_MS
+            while True:
+                message = await client.queue.get()
+                # Whatever else is queued goes out in the same write
+                chunk = [message]
+                while message is not CLOSE and not client.queue.empty():
+                    message = client.queue.get_nowait()
+                    chunk.append(message)
+                if chunk[-1] is CLOSE:
+                    chunk.pop()
+                    if chunk:
+                        yield b"".join(chunk)
+                    return
+                yield b"".join(chunk)
+        finally:
+            self.disconnect(client)
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.clients),
+            "max_clients": self.max_clients,
+            "published": self.published,
+            "overflows": self.overflows,
+            "rejected": self.rejected,
+            "last_event_id": self.event_id(self.sequence),
+        }
+
+
+change_broadcaster = ChangeBroadcaster()
+
+
+@subscribe
+async def broadcast_change(event):
+    change_broadcaster.publish(event)
@@ -0,0 +1,192 @@
+"""Keeps this worker's in-process state in step with the other workers.
+
+Every write bumps a per-collection version in the cache_versions collection
+(see app.core.events.publish_change). This watcher follows those versions,
+with a change stream on a replica set or by polling the version documents
+(only those updated since the last poll, through the updated_at index), and
+replays changes made by other workers to the local change subscribers: the
+response cache, the replica, the search index and the snapshots.
+
+Local state is at most CACHE_SYNC_INTERVAL_SECONDS behind another worker's
+write. If MongoDB cannot be reached for longer than
+CACHE_SYNC_MAX_STALENESS_SECONDS the response cache is dropped and the
+replicas are marked stale rather than served from unknown versions; once
+syncing works again the replicas and search indexes are rebuilt.
+"""
+from datetime import timedelta
+from pymongo import ReturnDocument
+import asyncio
+import secrets
+import time
+from app.core.cache import response_cache
+from app.core.replica import replica
+from app.core.events import EPOCH_ID, VERSIONS_COLLECTION, WORKER_ID, adopt_versions, apply_version, parse_shared_id, set_epoch
+from app.core.settings import settings
+from app.db.database import control_db, current_tenant
+from app.services.search import search_index
+
+CACHE_SYNC_MODE = settings.cache_sync_mode
+CACHE_SYNC_INTERVAL_SECONDS = settings.cache_sync_interval_seconds
+CACHE_SYNC_MAX_STALENESS_SECONDS = settings.cache_sync_max_staleness_seconds
+# updated_at comes from each writer's clock and a slow write may commit after
+# a later one was seen; polls look back this far (applying is idempotent)
+POLL_OVERLAP = timedelta(seconds=5)
+
+
+class VersionWatcher:
+    def __init__(self, mode: str = CACHE_SYNC_MODE, interval: float = CACHE_SYNC_INTERVAL_SECONDS):
+        self.mode = mode  # "auto" until a change stream was tried, then "watch" or "poll"
+        self.interval = interval
+        self.task = None
+        self.last_sync = None
+        self.last_seen = None  # newest updated_at read from cache_versions
+        self.stale = False  # max staleness exceeded, rebuild once syncing works
+        self.remote_changes = 0
+        self.errors = 0
+        self.last_error = None
+
+    async def prime(self):
+        # Before local state is built: share one epoch (and so one set of
+        # ETags) across workers, and start from the current versions
+        epoch = await control_db[VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": EPOCH_ID},
+            {"$setOnInsert": {"epoch": secrets.token_hex(4)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        set_epoch(epoch["epoch"])
+        versions = {}
+        async for doc in control_db[VERSIONS_COLLECTION].find({"_id": {"$ne": EPOCH_ID}}, {"version": 1, "updated_at": 1}):
+            versions[parse_shared_id(doc["_id"])] = doc["version"]
+            self.see(doc)
+        adopt_versions(versions)
+        self.last_sync = time.monotonic()
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name="cache-version-watcher")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def see(self, doc):
+        updated_at = doc.get("updated_at")
+        if updated_at is not None and (self.last_seen is None or updated_at > self.last_seen):
+            self.last_seen = updated_at
+
+    async def apply(self, doc):
+        if doc is None or doc["_id"] == EPOCH_ID:
+            return
+        self.see(doc)
+        remote = doc.get("origin") != WORKER_ID
+        tenant, collection = parse_shared_id(doc["_id"])
+        # The change handlers work on the state of the tenant it belongs to
+        token = current_tenant.set(tenant)
+        try:
+            if await apply_version(collection, doc["version"], doc.get("operation", "sync"), doc.get("doc_id"), remote):
+                self.remote_changes += 1
+        finally:
+            current_tenant.reset(token)
+
+    async def poll(self):
+        # Only the versions bumped since the last poll; the epoch document
+        # has no updated_at and never matches
+        query = {"updated_at": {"$exists": True}}
+        if self.last_seen is not None:
+            query = {"updated_at": {"$gt": self.last_seen - POLL_OVERLAP}}
+        async for doc in control_db[VERSIONS_COLLECTION].find(query).sort("updated_at", 1):
+            await self.apply(doc)
+        await self.synced()
+
+    async def synced(self):
+        self.last_sync = time.monotonic()
+        if self.stale:
+            self.stale = False
+            await self.rebuild()
+
+    def mark_stale(self):
+        # MongoDB has been out of reach too long to trust any local state
+        self.stale = True
+        for _, cache in response_cache.all_tenants():
+            cache.clear()
+        for _, store in replica.all_tenants():
+            store.mark_stale()
+
+    async def rebuild(self):
+        # Changes missed while out of reach may not show up as versions
+        # (a failed bump), so everything local is read again
+        for tenant, store in replica.all_tenants():
+            token = current_tenant.set(tenant)
+            try:
+                await store.reload_loaded()
+            finally:
+                current_tenant.reset(token)
+        for tenant, index in search_index.all_tenants():
+            if not index.ready:
+                continue
+            token = current_tenant.set(tenant)
+            try:
+                await index.build()
+            except Exception as e:
+                print(f"Search index rebuild for tenant {tenant or 'default'} failed: {e}")
+            finally:
+                current_tenant.reset(token)
+        for _, cache in response_cache.all_tenants():
+            cache.clear()
+
+    async def watch(self):
+        collection = control_db[VERSIONS_COLLECTION]
+        max_await_ms = int(self.interval * 1000)
+        async with collection.watch(full_document="updateLookup", max_await_time_ms=max_await_ms) as stream:
+            self.mode = "watch"
+            # Changes made before the stream opened
+            await self.poll()
+            while True:
+                change = await stream.try_next()
+                if change is not None:
+                    await self.apply(change.get("fullDocument"))
+                await self.synced()
+
+    async def run(self):
+        while True:
+            try:
+                if self.mode in ("auto", "watch"):
+                    await self.watch()
+                else:
+                    await self.poll()
+                    await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self.mode == "auto":
+                    # Standalone servers have no change streams
+                    print(f"Cache version change stream unavailable, polling instead: {e}")
+                    self.mode = "poll"
+                    continue
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Cache version sync failed: {e}")
+                if self.last_sync is None or time.monotonic() - self.last_sync > CACHE_SYNC_MAX_STALENESS_SECONDS:
+                    self.mark_stale()
+                await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.task is not None,
+            "mode": self.mode,
+            "worker": WORKER_ID,
+            "seconds_since_sync": round(time.monotonic() - self.last_sync, 3) if self.last_sync is not None else None,
+            "stale": self.stale,
+            "remote_changes": self.remote_changes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+version_watcher = VersionWatcher()
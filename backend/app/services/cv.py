@@ -0,0 +1,297 @@
+"""CV rendered from the live collections, as a PDF and a JSON Resume document.
+
+Each section is rendered on its own in the process pool and cached by the
+hash of its data, so a write re-renders only the sections it touched.
+Assembling the PDF from the rendered sections is one more pool call; when
+nothing changed (same version token) the finished document is served from
+memory without touching MongoDB.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+import asyncio
+import hashlib
+import textwrap
+import zlib
+from app.api.routes_portfolio import SECTION_COLLECTIONS, portfolio_loader
+from app.core.codec import encode
+from app.core.events import version_token
+from app.core.tenancy import TenantLocal
+from app.core.workers import run_in_process
+
+# Order of the sections in the CV
+CV_SECTIONS = ("personal", "experiences", "educations", "projects", "skills", "certificates")
+CV_COLLECTIONS = tuple(SECTION_COLLECTIONS[name] for name in CV_SECTIONS)
+
+HEADINGS = {
+    "experiences": "Experience",
+    "educations": "Education",
+    "projects": "Projects",
+    "skills": "Skills",
+    "certificates": "Certificates",
+}
+
+# A4 in points
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 50
+# Line style -> (font resource, size, line height)
+STYLES = {
+    "title": ("F2", 20, 26),
+    "subtitle": ("F1", 10, 14),
+    "heading": ("F2", 13, 24),
+    "entry": ("F2", 10.5, 15),
+    "meta": ("F3", 9, 12),
+    "body": ("F1", 9.5, 12.5),
+    "space": ("F1", 9.5, 6),
+}
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Helvetica-Oblique"}
+
+
+def text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%b %Y")
+    return str(value).strip()
+
+
+def period(item, start: str, end: str) -> str:
+    started, ended = text(item.get(start)), text(item.get(end))
+    if started and not ended:
+        return f"{started} - Present"
+    return " - ".join(part for part in (started, ended) if part)
+
+
+def wrap(style: str, value: str) -> list[tuple]:
+    # Helvetica averages about half an em per character; good enough to wrap
+    _, size, _ = STYLES[style]
+    width = max(20, int((PAGE_WIDTH - 2 * MARGIN) / (size * 0.5)))
+    lines = []
+    for paragraph in value.splitlines() or [""]:
+        lines.extend((style, line) for line in textwrap.wrap(paragraph, width) or [""])
+    return lines
+
+
+def iso(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value or None
+
+
+def resume_fragment(name: str, items: list) -> dict:
+    # https://jsonresume.org/schema
+    if name == "personal":
+        person = items[0] if items else {}
+        profiles = [
+            {"network": network, "url": person[field]}
+            for field, network in (("linkedin", "LinkedIn"), ("github", "GitHub")) if person.get(field)
+        ]
+        basics = {
+            "name": person.get("name"),
+            "email": person.get("email"),
+            "phone": person.get("phone"),
+            "summary": person.get("passion"),
+            "location": {"address": person.get("address")} if person.get("address") else None,
+            "profiles": profiles,
+        }
+        return {"basics": {key: value for key, value in basics.items() if value}}
+    if name == "experiences":
+        return {"work": [
+            {"name": item.get("Company_name"), "position": item.get("position"), "url": item.get("website"),
+             "startDate": iso(item.get("start_date")), "endDate": iso(item.get("end_date")), "summary": item.get("description")}
+            for item in items
+        ]}
+    if name == "educations":
+        return {"education": [
+            {"institution": item.get("institution"), "studyType": item.get("degree"), "area": item.get("field_of_study"),
+             "startDate": iso(item.get("start_date")), "endDate": iso(item.get("end_date"))}
+            for item in items
+        ]}
+    if name == "projects":
+        return {"projects": [
+            {"name": item.get("name"), "description": item.get("description"), "url": item.get("live_url") or item.get("repository_url"),
+             "keywords": item.get("technologies") or []}
+            for item in items
+        ]}
+    if name == "skills":
+        return {"skills": [{"name": item.get("name")} for item in items]}
+    if name == "certificates":
+        return {"certificates": [
+            {"name": item.get("title"), "issuer": item.get("issuer"), "date": iso(item.get("issue_date")), "url": item.get("certificate_url")}
+            for item in items
+        ]}
+    return {}
+
+
+def layout_section(name: str, items: list) -> list[tuple]:
+    if name == "personal":
+        person = items[0] if items else {}
+        lines = wrap("title", text(person.get("name")) or "Curriculum Vitae")
+        contact = " | ".join(text(person.get(field)) for field in ("email", "phone", "address") if person.get(field))
+        links = " | ".join(text(person.get(field)) for field in ("linkedin", "github") if person.get(field))
+        for value in (contact, links):
+            if value:
+                lines.extend(wrap("subtitle", value))
+        if person.get("passion"):
+            lines.append(("space", ""))
+            lines.extend(wrap("body", text(person["passion"])))
+        return lines
+
+    if not items:
+        return []
+    lines = [("heading", HEADINGS[name])]
+    if name == "skills":
+        return lines + wrap("body", ", ".join(text(item.get("name")) for item in items))
+
+    for item in items:
+        if name == "experiences":
+            title = ", ".join(part for part in (text(item.get("position")), text(item.get("Company_name"))) if part)
+            meta, body = period(item, "start_date", "end_date"), text(item.get("description"))
+        elif name == "educations":
+            title = ", ".join(part for part in (text(item.get("degree")), text(item.get("field_of_study"))) if part)
+            meta = " | ".join(part for part in (text(item.get("institution")), period(item, "start_date", "end_date")) if part)
+            body = text(item.get("description"))
+        elif name == "projects":
+            title, body = text(item.get("name")), text(item.get("description"))
+            meta = ", ".join(item.get("technologies") or [])
+        else:
+            title = text(item.get("title"))
+            meta = " | ".join(part for part in (text(item.get("issuer")), text(item.get("issue_date"))) if part)
+            body = text(item.get("description"))
+        lines.extend(wrap("entry", title))
+        if meta:
+            lines.extend(wrap("meta", meta))
+        if body:
+            lines.extend(wrap("body", body))
+        lines.append(("space", ""))
+    return lines
+
+
+def render_section(name: str, items: list) -> tuple:
+    # Runs in a worker process: -> (PDF layout lines, JSON Resume fragment)
+    return layout_section(name, items), resume_fragment(name, items)
+
+
+def pdf_string(value: str) -> bytes:
+    data = value.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def paginate(sections: list) -> list[list]:
+    # -> pages of (style, text, y); a heading never ends a page
+    pages, page, y = [], [], PAGE_HEIGHT - MARGIN
+    for lines in sections:
+        for style, value in lines:
+            height = STYLES[style][2]
+            needed = height + (STYLES["entry"][2] * 2 if style == "heading" else 0)
+            if y - needed < MARGIN and page:
+                pages.append(page)
+                page, y = [], PAGE_HEIGHT - MARGIN
+                if style == "space":
+                    continue
+            y -= height
+            if style != "space":
+                page.append((style, value, y))
+    if page or not pages:
+        pages.append(page)
+    return pages
+
+
+def build_pdf(sections: list, title: str) -> bytes:
+    # Runs in a worker process. A minimal PDF 1.4 file: the three standard
+    # Helvetica fonts (no embedding) and one compressed stream per page.
+    pages = paginate(sections)
+    objects = {}
+    font_ids = {name: 3 + index for index, name in enumerate(FONTS)}
+    first_page = 3 + len(FONTS)
+    page_ids = [first_page + 2 * index for index in range(len(pages))]
+
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[2] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(pages)
+    for name, base_font in FONTS.items():
+        objects[font_ids[name]] = f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>".encode()
+    fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), font_ids[name]) for name in FONTS)
+
+    for page_id, lines in zip(page_ids, pages):
+        ops = []
+        for style, value, y in lines:
+            font, size, _ = STYLES[style]
+            ops.append(b"BT /%s %g Tf %d %.2f Td %s Tj ET" % (font.encode(), size, MARGIN, y, pdf_string(value)))
+        stream = zlib.compress(b"\n".join(ops))
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, fonts, page_id + 1)
+        )
+        objects[page_id + 1] = b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+
+    info_id = page_ids[-1] + 2
+    objects[info_id] = b"<< /Title " + pdf_string(title) + b" /Producer (Portfolio API) >>"
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (info_id + 1)
+    for object_id in range(1, info_id + 1):
+        out += b"%010d 00000 n \n" % offsets[object_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (info_id + 1, info_id, xref)
+    return bytes(out)
+
+
+@dataclass(frozen=True)
+class CvDocument:
+    digest: str  # hash of every section's data; stable across workers
+    pdf: bytes
+    resume: bytes
+
+
+class CvBuilder:
+    def __init__(self):
+        self._sections = {}  # name -> (data hash, rendered section)
+        self._document = None  # (version token, CvDocument)
+        self._lock = asyncio.Lock()
+        self.section_renders = 0
+        self.document_builds = 0
+
+    async def get(self) -> CvDocument:
+        token = version_token(CV_COLLECTIONS)
+        if self._document is not None and self._document[0] == token:
+            return self._document[1]
+        # One rebuild at a time; requests waiting on it get its result
+        async with self._lock:
+            if self._document is not None and self._document[0] == token:
+                return self._document[1]
+            document = await self.build()
+            self._document = (token, document)
+            return document
+
+    async def build(self) -> CvDocument:
+        data = await portfolio_loader(list(CV_SECTIONS))()
+        hashes = {name: hashlib.sha256(encode(data[name])).hexdigest() for name in CV_SECTIONS}
+
+        changed = [name for name in CV_SECTIONS if self._sections.get(name, (None,))[0] != hashes[name]]
+        rendered = await asyncio.gather(*(run_in_process(render_section, name, data[name]) for name in changed))
+        for name, section in zip(changed, rendered):
+            self._sections[name] = (hashes[name], section)
+        self.section_renders += len(changed)
+
+        digest = hashlib.sha256("".join(hashes[name] for name in CV_SECTIONS).encode()).hexdigest()
+        previous = self._document[1] if self._document is not None else None
+        if previous is not None and previous.digest == digest:
+            return previous
+
+        sections = [self._sections[name][1] for name in CV_SECTIONS]
+        resume = {"$schema": "https://raw.githubusercontent.com/jsonresume/resume-schema/v1.0.0/schema.json"}
+        for _, fragment in sections:
+            resume.update(fragment)
+        name = resume.get("basics", {}).get("name") or "Curriculum Vitae"
+        pdf = await run_in_process(build_pdf, [lines for lines, _ in sections], name)
+        self.document_builds += 1
+        return CvDocument(digest, pdf, encode(resume))
+
+
+cv_builder = TenantLocal(lambda tenant: CvBuilder())
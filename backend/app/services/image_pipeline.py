@@ -0,0 +1,77 @@
+from PIL import Image, UnidentifiedImageError
+from io import BytesIO
+from app.core.settings import settings
+
+# Longest edge, in pixels, of each stored variant
+VARIANT_SIZES = settings.icon_variant_sizes
+VARIANT_FORMATS = {"webp": "WEBP", "png": "PNG"}
+
+# Formats we accept, detected from the bytes rather than the client's content type
+ALLOWED_FORMATS = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+    "BMP": "image/bmp",
+    "ICO": "image/x-icon",
+}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def is_svg(content: bytes) -> bool:
+    # Checked only to give a clear error: SVG is markup that can carry
+    # scripts, so it is never stored
+    head = content[:1024].lstrip().lower()
+    return head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head)
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = BytesIO()
+    if fmt == "WEBP":
+        image.save(buffer, format=fmt, quality=90, method=4)
+    else:
+        image.save(buffer, format=fmt, optimize=True)
+    return buffer.getvalue()
+
+
+def process_image(path: str) -> dict:
+    """Validate an uploaded icon and render its size variants.
+
+    Runs in a worker process, so it takes the path of the spooled upload
+    rather than its bytes, and only returns picklable data.
+    """
+    with open(path, "rb") as f:
+        head = f.read(1024)
+    if is_svg(head):
+        raise InvalidImage("SVG icons are not accepted; upload a PNG, JPEG, GIF, WebP, BMP or ICO image")
+
+    try:
+        with Image.open(path) as probe:
+            probe.verify()
+        image = Image.open(path)
+        image.load()
+    except Image.DecompressionBombError:
+        raise InvalidImage("Image dimensions are too large")
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise InvalidImage("File is not a readable image")
+
+    if image.format not in ALLOWED_FORMATS:
+        raise InvalidImage(f"Unsupported image format: {image.format}")
+
+    content_type = ALLOWED_FORMATS[image.format]
+    width, height = image.size
+    image = image.convert("RGBA")
+
+    variants = {}
+    for size in VARIANT_SIZES:
+        # Never upscale: small originals only get the variants they can fill
+        if size > max(width, height) and size != min(VARIANT_SIZES):
+            continue
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[str(size)] = {name: encode(variant, fmt) for name, fmt in VARIANT_FORMATS.items()}
+
+    return {"content_type": content_type, "width": width, "height": height, "variants": variants}
@@ -0,0 +1,311 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from pymongo import ReturnDocument
+import asyncio
+import random
+import smtplib
+import time
+from app.core.metrics import smtp_duration
+from app.core.settings import settings
+from app.db.database import DEFAULT_TENANT, control_db as db, current_tenant, mongo
+
+SMTP_HOST = settings.smtp_host
+SMTP_PORT = settings.smtp_port
+SMTP_STARTTLS = settings.smtp_starttls
+SMTP_TIMEOUT = settings.smtp_timeout
+# Close the shared connection after this long without traffic
+SMTP_IDLE_SECONDS = settings.smtp_idle_seconds
+EMAIL_ADDRESS = settings.email_address
+EMAIL_PASSWORD = settings.email_password
+
+MAIL_BATCH_SIZE = settings.mail_batch_size
+MAIL_MAX_ATTEMPTS = settings.mail_max_attempts
+MAIL_RETRY_BASE_SECONDS = settings.mail_retry_base_seconds
+MAIL_RETRY_MAX_SECONDS = settings.mail_retry_max_seconds
+MAIL_POLL_SECONDS = settings.mail_poll_seconds
+# A message claimed longer ago than this belongs to a worker that died mid-send
+MAIL_LOCK_SECONDS = settings.mail_lock_seconds
+# A batch stops sending well before its claims could be taken as stale
+MAIL_BATCH_DEADLINE_SECONDS = MAIL_LOCK_SECONDS / 2
+
+
+class NotAttempted(Exception):
+    """Left unsent because the batch was cut short; released without
+    counting an attempt."""
+
+
+class NoRecipient(Exception):
+    pass
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def build_message(doc) -> MIMEMultipart:
+    contact = doc["payload"]
+
+    msg = MIMEMultipart()
+    msg["From"] = EMAIL_ADDRESS
+    # Messages queued before recipients were stored went to the operator
+    msg["To"] = doc.get("recipient") or EMAIL_ADDRESS
+    # Messages queued before addresses were validated may hold anything
+    if not any(c in contact["email"] for c in "\r\n,"):
+        msg["Reply-To"] = contact["email"]
+    msg["Subject"] = f"Portfolio Contact from {contact['first_name']} {contact['last_name']}"
+
+    body = f"""
+        New contact form submission:
+
+        Name: {contact['first_name']} {contact['last_name']}
+        Email: {contact['email']}
+
+        Message:
+        {contact['message']}
+        """
+
+    msg.attach(MIMEText(body, "plain"))
+    return msg
+
+
+def is_permanent(error: Exception) -> bool:
+    # 5xx replies about the message itself will fail the same way on retry
+    code = getattr(error, "smtp_code", None)
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(code, int) and 500 <= code < 600 and not isinstance(error, smtplib.SMTPAuthenticationError)
+
+
+class SmtpConnection:
+    """One authenticated SMTP session reused across messages.
+
+    All methods block and must run on the connection's own thread.
+    """
+
+    def __init__(self):
+        self.server = None
+        self.last_used = 0.0
+
+    def ensure_connected(self):
+        if self.server is not None:
+            try:
+                if self.server.noop()[0] == 250:
+                    return
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if EMAIL_PASSWORD:
+                server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+        except (smtplib.SMTPException, OSError):
+            server.close()
+            raise
+        self.server = server
+
+    def send_batch(self, messages: list, deadline: float) -> list:
+        # Returns one exception (or None) per message, in order. A failed
+        # connect ends the batch: retrying it per message would wait out
+        # one SMTP_TIMEOUT each while the claims grow stale.
+        results = []
+        for index, msg in enumerate(messages):
+            if time.monotonic() >= deadline:
+                results.extend(NotAttempted("batch deadline reached") for _ in messages[index:])
+                break
+            try:
+                self.ensure_connected()
+            except (smtplib.SMTPException, OSError) as e:
+                self.close()
+                results.append(e)
+                results.extend(NotAttempted(f"connect failed: {e}") for _ in messages[index + 1:])
+                break
+            try:
+                self.server.send_message(msg)
+                results.append(None)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                self.close()
+                results.append(e)
+            except smtplib.SMTPException as e:
+                results.append(e)
+        self.last_used = time.monotonic()
+        return results
+
+    def close_if_idle(self):
+        if self.server is not None and time.monotonic() - self.last_used > SMTP_IDLE_SECONDS:
+            self.close()
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.server = None
+
+
+class MailWorker:
+    """Drains the contact_outbox collection in the background.
+
+    Submissions are acknowledged as soon as they are written to the outbox;
+    delivery happens here with batching, exponential backoff and
+    dead-lettering after MAIL_MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.connection = SmtpConnection()
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    async def run_blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def start(self):
+        if self.task is None:
+            # A single thread owns the SMTP socket, so the connection is never shared
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+            self.task = asyncio.create_task(self.run(), name="mail-worker")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.executor is not None:
+            await self.run_blocking(self.connection.close)
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def notify(self):
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            try:
+                await self.release_stale_claims()
+                sent = await self.drain_once()
+                if sent:
+                    continue
+                await self.run_blocking(self.connection.close_if_idle)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Mail worker iteration failed: {e}")
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=MAIL_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def release_stale_claims(self):
+        cutoff = utcnow() - timedelta(seconds=MAIL_LOCK_SECONDS)
+        await db.contact_outbox.update_many(
+            {"status": "sending", "locked_at": {"$lt": cutoff}},
+            {"$set": {"status": "pending"}},
+        )
+
+    async def claim_batch(self) -> list:
+        # find_one_and_update claims atomically, so several workers never send the same message
+        batch = []
+        now = utcnow()
+        for _ in range(MAIL_BATCH_SIZE):
+            doc = await db.contact_outbox.find_one_and_update(
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"$set": {"status": "sending", "locked_at": now}},
+                sort=[("next_attempt_at", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            batch.append(doc)
+        return batch
+
+    async def drain_once(self) -> int:
+        batch = await self.claim_batch()
+        if not batch:
+            return 0
+
+        messages = [build_message(doc) for doc in batch]
+        started = time.perf_counter()
+        deadline = time.monotonic() + MAIL_BATCH_DEADLINE_SECONDS
+        errors = await self.run_blocking(self.connection.send_batch, messages, deadline)
+        smtp_duration.observe(time.perf_counter() - started)
+
+        for doc, error in zip(batch, errors):
+            if error is None:
+                await db.contact_outbox.update_one(
+                    {"_id": doc["_id"]},
+                    {"$set": {"status": "sent", "sent_at": utcnow()}, "$unset": {"locked_at": ""}},
+                )
+            elif isinstance(error, NotAttempted):
+                await self.release(doc, error)
+            else:
+                await self.record_failure(doc, error)
+        return len(batch)
+
+    async def release(self, doc, reason: Exception):
+        # Back to pending after one base delay; the attempt count is unchanged
+        delay = MAIL_RETRY_BASE_SECONDS * random.uniform(0.8, 1.2)
+        await db.contact_outbox.update_one(
+            {"_id": doc["_id"]},
+            {"$set": {"status": "pending", "next_attempt_at": utcnow() + timedelta(seconds=delay), "last_error": str(reason)},
+             "$unset": {"locked_at": ""}},
+        )
+
+    async def record_failure(self, doc, error: Exception):
+        attempts = doc.get("attempts", 0) + 1
+        update = {"attempts": attempts, "last_error": str(error) or type(error).__name__}
+
+        if attempts >= MAIL_MAX_ATTEMPTS or is_permanent(error):
+            update.update({"status": "dead", "dead_at": utcnow()})
+            print(f"Contact message {doc['_id']} moved to dead letter after {attempts} attempt(s): {error}")
+        else:
+            # Exponential backoff with jitter so retries do not arrive in bursts
+            delay = min(MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAIL_RETRY_MAX_SECONDS)
+            delay *= random.uniform(0.8, 1.2)
+            update.update({"status": "pending", "next_attempt_at": utcnow() + timedelta(seconds=delay)})
+
+        await db.contact_outbox.update_one({"_id": doc["_id"]}, {"$set": update, "$unset": {"locked_at": ""}})
+
+
+mail_worker = MailWorker()
+
+
+async def contact_recipient() -> str:
+    # The operator's address for the default portfolio; a tenant's mail goes
+    # to the owner of that portfolio, the email on its personal record
+    if current_tenant.get() == DEFAULT_TENANT:
+        return EMAIL_ADDRESS
+    doc = await mongo.database().personal.find_one({"email": {"$nin": [None, ""]}}, {"email": 1})
+    if doc is None:
+        raise NoRecipient("This portfolio has no contact email address")
+    return doc["email"]
+
+
+async def enqueue_contact(contact) -> str:
+    recipient = await contact_recipient()
+    now = utcnow()
+    # One outbox for every tenant, drained by the one mail worker
+    result = await db.contact_outbox.insert_one({
+        "kind": "contact",
+        "tenant": current_tenant.get() or None,
+        "recipient": recipient,
+        "status": "pending",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+        "payload": contact.model_dump(),
+    })
+    mail_worker.notify()
+    return str(result.inserted_id)
@@ -0,0 +1,213 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from bson import ObjectId
+import asyncio
+import math
+import re
+from app.db.database import DEFAULT_TENANT, db
+from app.core.events import subscribe
+from app.core.tenancy import TenantLocal
+
+# Collection -> {field: weight}. Matches in titles count more than in descriptions.
+INDEXED_FIELDS = {
+    "projects": {"name": 3.0, "technologies": 2.5, "description": 1.0},
+    "experiences": {"Company_name": 3.0, "position": 2.0, "description": 1.0},
+    "certificates": {"title": 3.0, "issuer": 2.0},
+}
+TITLE_FIELDS = {"projects": "name", "experiences": "Company_name", "certificates": "title"}
+
+# Keeps tokens such as "c++", "c#" and "node.js" intact
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text) -> list[str]:
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(item) for item in text)
+    return [token.rstrip(".") for token in TOKEN_PATTERN.findall(str(text).lower())]
+
+
+class SearchIndex:
+    """Inverted index over projects, experiences and certificates.
+
+    Built once at startup (for other tenants, on their first search) and
+    kept current by change events, so queries and facet counts never touch
+    MongoDB.
+    """
+
+    def __init__(self, lazy: bool = False):
+        self.lazy = lazy
+        self.building = None
+        self.postings = defaultdict(dict)  # token -> {doc_key: weighted term frequency}
+        self.documents = {}  # doc_key -> {"collection", "id", "title", "tokens", "technologies"}
+        self.technology_counts = Counter()  # normalized technology -> number of projects
+        self.technology_names = {}  # normalized technology -> display name
+        self.sorted_tokens = []
+        self.ready = False
+
+    # ───── maintenance ─────
+
+    def add(self, collection: str, doc: dict):
+        key = (collection, str(doc["_id"]))
+        self.remove(*key)
+
+        weights = Counter()
+        for field, weight in INDEXED_FIELDS[collection].items():
+            for token in tokenize(doc.get(field)):
+                weights[token] += weight
+        for token, weight in weights.items():
+            self.postings[token][key] = weight
+
+        technologies = []
+        if collection == "projects":
+            # One entry per technology, however it is capitalized
+            unique = {tech.strip().lower(): tech.strip() for tech in doc.get("technologies") or [] if tech and tech.strip()}
+            technologies = sorted(unique.values())
+            for tech in technologies:
+                self.technology_counts[tech.lower()] += 1
+                self.technology_names.setdefault(tech.lower(), tech)
+
+        self.documents[key] = {
+            "collection": collection,
+            "id": key[1],
+            "title": doc.get(TITLE_FIELDS[collection]),
+            "tokens": tuple(weights),
+            "technologies": tuple(technologies),
+        }
+        self.sorted_tokens = []
+
+    def remove(self, collection: str, doc_id: str):
+        entry = self.documents.pop((collection, doc_id), None)
+        if entry is None:
+            return
+        for token in entry["tokens"]:
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop((collection, doc_id), None)
+                if not postings:
+                    del self.postings[token]
+        for tech in entry["technologies"]:
+            self.technology_counts[tech.lower()] -= 1
+            if self.technology_counts[tech.lower()] <= 0:
+                del self.technology_counts[tech.lower()]
+                self.technology_names.pop(tech.lower(), None)
+        self.sorted_tokens = []
+
+    def clear_collection(self, collection: str):
+        for _, doc_id in [key for key in self.documents if key[0] == collection]:
+            self.remove(collection, doc_id)
+
+    async def load_collection(self, collection: str):
+        docs = await db[collection].find({}, {field: 1 for field in INDEXED_FIELDS[collection]}).to_list(length=None)
+        self.clear_collection(collection)
+        for doc in docs:
+            self.add(collection, doc)
+
+    async def build(self):
+        for collection in INDEXED_FIELDS:
+            await self.load_collection(collection)
+        self.ready = True
+
+    async def ensure_built(self):
+        if self.ready or not self.lazy:
+            return
+        # Concurrent first searches share one build
+        if self.building is None or self.building.done():
+            self.building = asyncio.create_task(self.build())
+        await asyncio.shield(self.building)
+
+    async def refresh_document(self, collection: str, doc_id: str):
+        doc = None
+        if ObjectId.is_valid(doc_id):
+            doc = await db[collection].find_one({"_id": ObjectId(doc_id)}, {field: 1 for field in INDEXED_FIELDS[collection]})
+        if doc is None:
+            self.remove(collection, doc_id)
+        else:
+            self.add(collection, doc)
+
+    # ───── queries ─────
+
+    def expand(self, token: str) -> list[str]:
+        # Prefix match for the last query term so partial input still finds results
+        if not self.sorted_tokens:
+            self.sorted_tokens = sorted(self.postings)
+        start = bisect_left(self.sorted_tokens, token)
+        matches = []
+        for candidate in self.sorted_tokens[start:]:
+            if not candidate.startswith(token):
+                break
+            matches.append(candidate)
+        return matches
+
+    def search(self, query: str, collections=None, technology: str = None, limit: int = 20) -> dict:
+        terms = tokenize(query)
+        total = len(self.documents) or 1
+        scores = Counter()
+
+        for position, term in enumerate(terms):
+            candidates = self.expand(term) if position == len(terms) - 1 else [term]
+            term_scores = {}
+            for token in candidates:
+                postings = self.postings.get(token, {})
+                idf = math.log(1 + total / len(postings)) if postings else 0.0
+                for key, weight in postings.items():
+                    # Exact matches outrank prefix matches
+                    boost = 1.0 if token == term else 0.5
+                    term_scores[key] = max(term_scores.get(key, 0.0), weight * idf * boost)
+            # Every term must match (AND semantics)
+            if position == 0:
+                scores = Counter(term_scores)
+            else:
+                scores = Counter({key: score + term_scores[key] for key, score in scores.items() if key in term_scores})
+
+        if not terms:
+            scores = Counter({key: 0.0 for key in self.documents})
+
+        wanted_tech = technology.lower() if technology else None
+        hits = []
+        for key, score in scores.items():
+            entry = self.documents[key]
+            if collections and entry["collection"] not in collections:
+                continue
+            if wanted_tech and wanted_tech not in (tech.lower() for tech in entry["technologies"]):
+                continue
+            hits.append((score, entry))
+
+        hits.sort(key=lambda hit: (-hit[0], hit[1]["collection"], hit[1]["title"] or ""))
+        return {
+            "total": len(hits),
+            "results": [
+                {"collection": entry["collection"], "id": entry["id"], "title": entry["title"], "score": round(score, 4)}
+                for score, entry in hits[:limit]
+            ],
+            "facets": self.facet_counts([entry for _, entry in hits]),
+        }
+
+    def facet_counts(self, entries=None) -> dict:
+        if entries is None:
+            counts = self.technology_counts
+            collections = Counter(entry["collection"] for entry in self.documents.values())
+        else:
+            counts = Counter(tech.lower() for entry in entries for tech in entry["technologies"])
+            collections = Counter(entry["collection"] for entry in entries)
+        technologies = {self.technology_names.get(tech, tech): count for tech, count in counts.items()}
+        return {
+            "collections": dict(collections),
+            "technologies": dict(sorted(technologies.items(), key=lambda item: (-item[1], item[0].lower()))),
+        }
+
+
+search_index = TenantLocal(lambda tenant: SearchIndex(lazy=tenant != DEFAULT_TENANT))
+
+
+@subscribe
+async def update_search_index(event):
+    if event.collection not in INDEXED_FIELDS or not search_index.ready:
+        return
+    if event.operation == "bulk" or event.id is None:
+        await search_index.load_collection(event.collection)
+    elif event.operation == "delete":
+        search_index.remove(event.collection, event.id)
+    else:
+        await search_index.refresh_document(event.collection, event.id)
@@ -0,0 +1,224 @@
+"""Static snapshots of the public read API.
+
+Every public GET response (the combined portfolio and each section) is
+rendered to `<SNAPSHOT_DIR>/<name>.json` with precompressed `.json.gz` and
+`.json.br` siblings. They are rebuilt after writes, and can be served by
+/snapshots or directly by nginx (`gzip_static on; brotli_static on;`) or
+a CDN, so the read path never reaches MongoDB.
+
+Build once from the command line (from backend/):
+
+    python -m app.services.snapshots [--dir snapshots]
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import asyncio
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from app.api.routes_portfolio import SECTIONS, SECTION_COLLECTIONS, portfolio_loader
+from app.core.codec import encode
+from app.core.events import subscribe, version_token
+from app.core.query import ListQuery, MAX_PAGE_SIZE
+from app.core.settings import settings
+from app.core.workers import run_in_process, shutdown_process_pool
+from app.db.database import DEFAULT_TENANT
+
+try:
+    import brotli
+except ImportError:  # Snapshots are still written, without the .br sibling
+    brotli = None
+
+SNAPSHOT_DIR = settings.snapshot_dir
+# Wait for writes to go quiet this long before rebuilding...
+SNAPSHOT_DEBOUNCE_SECONDS = settings.snapshot_debounce_seconds
+# ...but never let a steady stream of writes postpone it longer than this
+SNAPSHOT_MAX_DELAY_SECONDS = settings.snapshot_max_delay_seconds
+SNAPSHOT_BROTLI_QUALITY = settings.snapshot_brotli_quality
+
+# Snapshot name -> collections it is built from
+SNAPSHOTS = {"portfolio": tuple(SECTION_COLLECTIONS.values()), **{name: (SECTION_COLLECTIONS[name],) for name in SECTIONS}}
+SNAPSHOT_COLLECTIONS = frozenset(SECTION_COLLECTIONS.values())
+
+# Served encoding -> file suffix, in order of preference
+ENCODINGS = {"br": ".json.br", "gzip": ".json.gz"}
+
+
+def compress_bodies(bodies: dict, brotli_quality: int) -> dict:
+    # Runs in a worker process: {name: json bytes} -> {file name: bytes}.
+    # A compressed sibling is only kept when it is actually smaller.
+    files = {}
+    for name, body in bodies.items():
+        files[f"{name}.json"] = body
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            files[f"{name}.json.gz"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=brotli_quality)
+            if len(compressed) < len(body):
+                files[f"{name}.json.br"] = compressed
+    return files
+
+
+async def render_bodies() -> dict:
+    # Same payloads as the /get endpoints: the default first page of every
+    # section, plus the combined document /portfolio/get returns
+    params = ListQuery(limit=MAX_PAGE_SIZE)
+    names = list(SECTIONS)
+    portfolio, *pages = await asyncio.gather(
+        portfolio_loader(names)(),
+        *(SECTIONS[name](params) for name in names),
+    )
+    bodies = {"portfolio": encode(portfolio)}
+    for name, page in zip(names, pages):
+        bodies[name] = encode(page.items)
+    return bodies
+
+
+def write_files(directory: Path, files: dict) -> list[str]:
+    # Unchanged files are left alone so their mtime (and ETag) stays stable;
+    # changed ones are swapped in atomically so readers never see half a file
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for file_name, content in files.items():
+        path = directory / file_name
+        try:
+            if path.read_bytes() == content:
+                continue
+        except FileNotFoundError:
+            pass
+        # Every worker builds into the same directory, so each write gets
+        # its own temp file; os.replace makes the last one win whole
+        fd, temp = tempfile.mkstemp(dir=directory, prefix=f".{file_name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(content)
+            os.replace(temp, path)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+        written.append(file_name)
+
+    # Siblings that are no longer worth keeping (or brotli went away); another
+    # worker may have removed them already
+    for stale in directory.glob("*.json.*"):
+        if stale.name not in files and not stale.name.endswith(".tmp"):
+            stale.unlink(missing_ok=True)
+    return written
+
+
+async def build_snapshots(directory: str = SNAPSHOT_DIR) -> dict:
+    started = time.perf_counter()
+    version = version_token(tuple(SNAPSHOT_COLLECTIONS))
+    bodies = await render_bodies()
+    files = await run_in_process(compress_bodies, bodies, SNAPSHOT_BROTLI_QUALITY)
+
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "version": version,
+        "files": {
+            name: {"size": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+            for name, content in sorted(files.items())
+        },
+    }
+    # Written last, so it never announces files that are not there yet
+    files["manifest.json"] = encode(manifest)
+    written = await asyncio.to_thread(write_files, Path(directory), files)
+    return {"written": written, "files": len(files), "seconds": round(time.perf_counter() - started, 3)}
+
+
+class SnapshotBuilder:
+    """Background job that rebuilds the snapshots after writes.
+
+    Changes are debounced: a burst of writes (an import, a bulk request)
+    leads to one rebuild once things go quiet.
+    """
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.builds = 0
+        self.last_build = None
+        self.last_error = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def schedule(self):
+        self.wakeup.set()
+
+    async def wait_for_quiet(self):
+        first_change = time.monotonic()
+        while True:
+            self.wakeup.clear()
+            remaining = SNAPSHOT_MAX_DELAY_SECONDS - (time.monotonic() - first_change)
+            timeout = min(SNAPSHOT_DEBOUNCE_SECONDS, remaining)
+            if timeout <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def run(self):
+        while True:
+            await self.wakeup.wait()
+            await self.wait_for_quiet()
+            # Writes landing during the build set wakeup again and trigger
+            # another pass, so the last write is always reflected
+            try:
+                self.last_build = await build_snapshots(self.directory)
+                self.builds += 1
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Snapshot build failed: {e}")
+
+
+snapshot_builder = SnapshotBuilder()
+
+
+@subscribe
+async def rebuild_on_change(event):
+    # Snapshots are static files of the default tenant's portfolio only
+    if event.tenant == DEFAULT_TENANT and event.collection in SNAPSHOT_COLLECTIONS:
+        snapshot_builder.schedule()
+
+
+async def build_once(directory: str):
+    from app.db.database import mongo
+
+    mongo.connect()
+    try:
+        result = await build_snapshots(directory)
+    finally:
+        mongo.close()
+        shutdown_process_pool()
+    print(f"Wrote {len(result['written'])} of {result['files']} file(s) to {directory} in {result['seconds']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the public API into static JSON snapshots")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help=f"Output directory (default: {SNAPSHOT_DIR})")
+    args = parser.parse_args()
+    asyncio.run(build_once(args.dir))
+
+
+if __name__ == "__main__":
+    main()
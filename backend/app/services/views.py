@@ -0,0 +1,472 @@
+"""Materialized views derived from the portfolio collections.
+
+Two collections are computed inside MongoDB by aggregation pipelines ending
+in $merge, so serving them is a single indexed find:
+
+- view_technologies: one document per technology (case-insensitive), from
+  project technologies and skill icons, with the projects using it, the
+  experiences mentioning it in their position or description, and counts.
+- view_timeline: one document per experience, education and certificate,
+  dates normalized to datetimes whether they were stored as datetimes or as
+  date strings ("2021", "2021-06", "2021-06-01"), read sorted by start.
+
+Writes keep them current without waiting for them: the change subscriber
+only records which documents changed, and a background task (debounced like
+the snapshots) refreshes the views once writes go quiet. Changed documents
+re-run the pipelines for those documents only: their timeline entries, and
+the technologies they had and have now. A bulk change re-runs them for its
+collection. An experience can mention any technology, so a change to one
+refreshes the whole graph (a pipeline over a few dozen documents). Each
+refresh is published as a change to the view, which drops cached responses
+and reaches SSE clients.
+
+Needs MongoDB 4.4 or later ($unionWith, $replaceAll); VIEWS_ENABLED=false
+turns it off.
+"""
+from datetime import datetime, timezone
+from bson import ObjectId
+from fastapi import HTTPException
+import asyncio
+import re
+import time
+from app.core.codec import document_serializer
+from app.core.events import publish_change, register_collection, subscribe
+from app.core.settings import settings
+from app.core.tenancy import TenantLocal
+from app.db.database import current_tenant, db
+
+TECHNOLOGIES_VIEW = "view_technologies"
+TIMELINE_VIEW = "view_timeline"
+register_collection(TECHNOLOGIES_VIEW)
+register_collection(TIMELINE_VIEW)
+# A failed build is tried again on the first read or write after this long
+VIEWS_RETRY_SECONDS = 30
+# Wait for writes to go quiet this long before refreshing...
+VIEWS_DEBOUNCE_SECONDS = settings.views_debounce_seconds
+# ...but never let a steady stream of writes postpone it longer than this
+VIEWS_MAX_DELAY_SECONDS = settings.views_max_delay_seconds
+# Past this many changed documents a collection is refreshed as a whole
+VIEWS_MAX_PENDING_IDS = 100
+
+# Collection -> how its documents become timeline entries
+TIMELINE_SOURCES = {
+    "experiences": {
+        "kind": "work",
+        "title": {"$ifNull": ["$position", "$Company_name"]},
+        "organization": "$Company_name",
+        "detail": {"$literal": None},
+        "url": "$website",
+        "start": "start_date",
+        "end": "end_date",
+    },
+    "educations": {
+        "kind": "education",
+        "title": "$degree",
+        "organization": "$institution",
+        "detail": "$field_of_study",
+        "url": {"$literal": None},
+        "start": "start_date",
+        "end": "end_date",
+    },
+    "certificates": {
+        "kind": "certificate",
+        "title": "$title",
+        "organization": "$issuer",
+        "detail": {"$literal": None},
+        "url": "$certificate_url",
+        "start": "issue_date",
+        "end": "expiration_date",
+    },
+}
+TIMELINE_KINDS = tuple(source["kind"] for source in TIMELINE_SOURCES.values())
+# Collection -> the field naming its technologies, for incremental refreshes
+TECHNOLOGY_FIELDS = {"projects": "technologies", "tech_stacks": "name"}
+# Collection -> where the graph records which of its documents it used
+TECHNOLOGY_LINKS = {"projects": "projects.id", "tech_stacks": "skill_id"}
+SOURCES = {*TIMELINE_SOURCES, *TECHNOLOGY_FIELDS, "experiences"}
+
+# Escaped (backslash first) before a technology name becomes a regex
+REGEX_SPECIAL = "\\.^$|?*+()[]{}"
+# Whole words only: "go" is not found in "good", nor "c" in "c++"
+WORD_BEFORE = "(^|[^a-z0-9])"
+WORD_AFTER = "($|[^a-z0-9+#])"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def technology_key(value) -> str:
+    return value.strip().lower() if isinstance(value, str) else ""
+
+
+def normalized(field: str) -> dict:
+    # Pipeline expression: a stored datetime as is, a date string parsed
+    # (a bare year or year-month is its first day), anything else null
+    value = f"${field}"
+    return {"$switch": {
+        "branches": [
+            {"case": {"$eq": [{"$type": value}, "date"]}, "then": value},
+            {"case": {"$eq": [{"$type": value}, "string"]}, "then": {"$let": {
+                "vars": {"text": {"$trim": {"input": value}}},
+                "in": {"$dateFromString": {
+                    "dateString": {"$switch": {
+                        "branches": [
+                            {"case": {"$eq": [{"$strLenCP": "$$text"}, 4]}, "then": {"$concat": ["$$text", "-01-01"]}},
+                            {"case": {"$eq": [{"$strLenCP": "$$text"}, 7]}, "then": {"$concat": ["$$text", "-01"]}},
+                        ],
+                        "default": "$$text",
+                    }},
+                    # "Present", "" and other free text
+                    "onError": None,
+                    "onNull": None,
+                }},
+            }}},
+        ],
+        "default": None,
+    }}
+
+
+def lowercase_trimmed(value: str) -> dict:
+    return {"$toLower": {"$trim": {"input": {"$ifNull": [value, ""]}}}}
+
+
+def escaped(expression) -> dict:
+    for char in REGEX_SPECIAL:
+        expression = {"$replaceAll": {"input": expression, "find": char, "replacement": "\\" + char}}
+    return expression
+
+
+def name_filter(field: str, keys) -> dict:
+    # Source documents holding one of `keys`, however they are spaced or capitalized
+    return {field: {"$in": [re.compile(rf"^\s*{re.escape(key)}\s*$", re.IGNORECASE) for key in keys]}}
+
+
+def timeline_pipeline(source: str, match: dict, stamp: datetime) -> list:
+    fields = TIMELINE_SOURCES[source]
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": {"$concat": [f"{source}:", {"$toString": "$_id"}]},
+            "source": {"$literal": source},
+            "source_id": {"$toString": "$_id"},
+            "kind": {"$literal": fields["kind"]},
+            "title": fields["title"],
+            "organization": fields["organization"],
+            "detail": fields["detail"],
+            "description": "$description",
+            "url": fields["url"],
+            "start": normalized(fields["start"]),
+            "end": normalized(fields["end"]),
+            "refreshed_at": {"$literal": stamp},
+        }},
+        # Certificates without an expiration date are not ongoing, just valid
+        {"$addFields": {"current": {"$and": [
+            fields["kind"] != "certificate", {"$ne": ["$start", None]}, {"$eq": ["$end", None]},
+        ]}}},
+        {"$merge": {"into": TIMELINE_VIEW, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def technology_pipeline(keys, stamp: datetime) -> list:
+    # `keys`: the lowercase technology names to rebuild, or None for all
+    selected = {"key": {"$in": sorted(keys)}} if keys is not None else {"key": {"$ne": ""}}
+    skill_match = [{"$match": name_filter("name", keys)}] if keys is not None else []
+    pattern = {"$concat": [WORD_BEFORE, escaped("$_id"), WORD_AFTER]}
+    return [
+        {"$match": name_filter("technologies", keys) if keys is not None else {"technologies.0": {"$exists": True}}},
+        {"$unwind": "$technologies"},
+        {"$project": {
+            "_id": 0,
+            "key": lowercase_trimmed("$technologies"),
+            "spelling": {"$trim": {"input": "$technologies"}},
+            "project": {"id": {"$toString": "$_id"}, "name": "$name"},
+        }},
+        {"$unionWith": {"coll": "tech_stacks", "pipeline": [
+            *skill_match,
+            {"$project": {
+                "_id": 0,
+                "key": lowercase_trimmed("$name"),
+                "skill": {
+                    "id": {"$toString": "$_id"},
+                    "name": {"$trim": {"input": "$name"}},
+                    # Same URL as /skills/get gives the icon
+                    "image_url": {"$concat": [
+                        "/skills/", {"$toString": "$_id"}, "/image",
+                        {"$cond": ["$image_hash", {"$concat": ["?v=", {"$substrCP": ["$image_hash", 0, 16]}]}, ""]},
+                    ]},
+                },
+            }},
+        ]}},
+        {"$match": selected},
+        {"$group": {
+            "_id": "$key",
+            "spelling": {"$min": "$spelling"},
+            "skill": {"$max": "$skill"},
+            "projects": {"$addToSet": "$project"},
+        }},
+        {"$lookup": {
+            "from": "experiences",
+            "let": {"pattern": pattern},
+            "pipeline": [
+                {"$match": {"$expr": {"$regexMatch": {
+                    "input": {"$concat": [{"$ifNull": ["$position", ""]}, " ", {"$ifNull": ["$description", ""]}]},
+                    "regex": "$$pattern",
+                    "options": "i",
+                }}}},
+                {"$project": {"_id": 0, "id": {"$toString": "$_id"}, "company": "$Company_name", "position": "$position"}},
+            ],
+            "as": "experiences",
+        }},
+        {"$project": {
+            # The skill's spelling when there is one
+            "name": {"$ifNull": ["$skill.name", "$spelling"]},
+            "skill_id": "$skill.id",
+            "image_url": "$skill.image_url",
+            "projects": 1,
+            "experiences": 1,
+            "project_count": {"$size": "$projects"},
+            "experience_count": {"$size": "$experiences"},
+            "usage": {"$add": [{"$size": "$projects"}, {"$size": "$experiences"}]},
+            "refreshed_at": {"$literal": stamp},
+        }},
+        {"$merge": {"into": TECHNOLOGIES_VIEW, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+class DerivedViews:
+    """Builds and refreshes the views of one database.
+
+    Refreshes are serialized, so one never deletes what a concurrent one
+    just wrote. A view whose refresh failed is rebuilt from scratch once
+    VIEWS_RETRY_SECONDS have passed; until then it is served as it was.
+    """
+
+    def __init__(self):
+        self.built = False
+        self.building = None
+        self.retry_at = 0.0
+        self.lock = asyncio.Lock()
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.last_error = None
+
+    # ───── pipelines ─────
+
+    async def refresh_timeline(self, source: str, ids, stamp: datetime):
+        # `ids`: the documents to refresh, or None for the whole collection
+        match = {"_id": {"$in": ids}} if ids is not None else {}
+        await db[source].aggregate(timeline_pipeline(source, match, stamp)).to_list(None)
+        # Entries of documents that are gone were not refreshed
+        stale = {"source": source, "refreshed_at": {"$lt": stamp}}
+        if ids is not None:
+            stale["source_id"] = {"$in": [str(doc_id) for doc_id in ids]}
+        await db[TIMELINE_VIEW].delete_many(stale)
+
+    async def technology_keys(self, source: str, ids: list) -> set:
+        # What the documents name now, and what the graph has them under
+        field = TECHNOLOGY_FIELDS[source]
+        keys = set()
+        async for doc in db[source].find({"_id": {"$in": ids}}, {field: 1}):
+            values = doc.get(field) or []
+            keys.update(technology_key(value) for value in ([values] if isinstance(values, str) else values))
+        async for entry in db[TECHNOLOGIES_VIEW].find({TECHNOLOGY_LINKS[source]: {"$in": [str(doc_id) for doc_id in ids]}}, {"_id": 1}):
+            keys.add(entry["_id"])
+        keys.discard("")
+        return keys
+
+    async def refresh_technologies(self, keys, stamp: datetime):
+        if keys is not None and not keys:
+            return
+        await db.projects.aggregate(technology_pipeline(keys, stamp)).to_list(None)
+        # Technologies no project or skill names any more
+        stale = {"refreshed_at": {"$lt": stamp}}
+        if keys is not None:
+            stale["_id"] = {"$in": sorted(keys)}
+        await db[TECHNOLOGIES_VIEW].delete_many(stale)
+
+    # ───── build and refresh ─────
+
+    async def rebuild(self):
+        async with self.lock:
+            stamp = utcnow()
+            for source in TIMELINE_SOURCES:
+                await self.refresh_timeline(source, None, stamp)
+            await self.refresh_technologies(None, stamp)
+        self.built = True
+        self.rebuilds += 1
+        self.last_error = None
+        await publish_change(TIMELINE_VIEW, "refresh")
+        await publish_change(TECHNOLOGIES_VIEW, "refresh")
+
+    async def build(self):
+        try:
+            await self.rebuild()
+        except Exception as e:
+            self.failed(e)
+
+    async def ensure_built(self):
+        if self.built or not settings.views_enabled or time.monotonic() < self.retry_at:
+            return
+        # Concurrent callers share one build
+        if self.building is None or self.building.done():
+            self.building = asyncio.create_task(self.build())
+        await asyncio.shield(self.building)
+
+    def failed(self, error: Exception):
+        self.built = False
+        self.retry_at = time.monotonic() + VIEWS_RETRY_SECONDS
+        self.last_error = str(error)
+        print(f"Derived view refresh failed: {error}")
+
+    async def apply(self, changes: dict):
+        # `changes`: collection -> changed document ids, or None for all of them
+        if not self.built:
+            # A full build covers the changes
+            await self.ensure_built()
+            return
+
+        refreshed = []
+        try:
+            async with self.lock:
+                stamp = utcnow()
+                whole_graph, keys = False, set()
+                for collection, ids in changes.items():
+                    ids = sorted(ids) if ids is not None else None
+                    if collection in TIMELINE_SOURCES:
+                        await self.refresh_timeline(collection, ids, stamp)
+                        if TIMELINE_VIEW not in refreshed:
+                            refreshed.append(TIMELINE_VIEW)
+                    if collection == "experiences" or (collection in TECHNOLOGY_FIELDS and ids is None):
+                        whole_graph = True
+                    elif collection in TECHNOLOGY_FIELDS:
+                        keys |= await self.technology_keys(collection, ids)
+                if whole_graph or keys:
+                    await self.refresh_technologies(None if whole_graph else keys, stamp)
+                    refreshed.append(TECHNOLOGIES_VIEW)
+            self.refreshes += 1
+        except Exception as e:
+            self.failed(e)
+        for view in refreshed:
+            await publish_change(view, "refresh")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.views_enabled,
+            "built": self.built,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "last_error": self.last_error,
+        }
+
+
+derived_views = TenantLocal(lambda tenant: DerivedViews())
+
+
+class ViewRefresher:
+    """Background job that refreshes the views of every tenant after writes.
+
+    Changes are debounced: a burst of writes (an import, a bulk request)
+    leads to one refresh per tenant once things go quiet.
+    """
+
+    def __init__(self):
+        self.pending = {}  # tenant -> {collection: set of ObjectIds, or None for all}
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        if self.task is None and settings.views_enabled:
+            self.task = asyncio.create_task(self.run(), name="view-refresher")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def mark(self, tenant: str, collection: str, doc_id):
+        changes = self.pending.setdefault(tenant, {})
+        ids = changes.get(collection, set())
+        if ids is not None:
+            if doc_id is None or not ObjectId.is_valid(doc_id) or len(ids) >= VIEWS_MAX_PENDING_IDS:
+                ids = None
+            else:
+                ids.add(ObjectId(doc_id))
+        changes[collection] = ids
+        self.wakeup.set()
+
+    async def wait_for_quiet(self):
+        first_change = time.monotonic()
+        while True:
+            self.wakeup.clear()
+            remaining = VIEWS_MAX_DELAY_SECONDS - (time.monotonic() - first_change)
+            timeout = min(VIEWS_DEBOUNCE_SECONDS, remaining)
+            if timeout <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def flush(self):
+        pending, self.pending = self.pending, {}
+        for tenant, changes in pending.items():
+            token = current_tenant.set(tenant)
+            try:
+                await derived_views.apply(changes)
+            finally:
+                current_tenant.reset(token)
+
+    async def run(self):
+        while True:
+            await self.wakeup.wait()
+            await self.wait_for_quiet()
+            # Writes landing during the refresh set wakeup again and trigger
+            # another pass; DerivedViews.apply handles its own errors
+            await self.flush()
+
+
+view_refresher = ViewRefresher()
+
+
+@subscribe
+async def refresh_views(event):
+    # Only noted here, so the write never waits for the pipelines. Run by the
+    # worker that made the write; the result is in MongoDB for all.
+    if event.remote or not settings.views_enabled or event.collection not in SOURCES:
+        return
+    view_refresher.mark(event.tenant, event.collection, event.id)
+
+
+# ───── reads ─────
+
+serialize_entry = document_serializer("start", "end")
+
+
+def serialize_technology(doc: dict) -> dict:
+    doc = document_serializer()(doc)
+    doc["projects"].sort(key=lambda project: (project.get("name") or "").lower())
+    return doc
+
+
+async def load_technologies() -> list:
+    cursor = db[TECHNOLOGIES_VIEW].find({}, {"refreshed_at": 0}).sort([("usage", -1), ("_id", 1)])
+    return [serialize_technology(doc) async for doc in cursor]
+
+
+async def load_technology(name: str) -> dict:
+    doc = await db[TECHNOLOGIES_VIEW].find_one({"_id": technology_key(name)}, {"refreshed_at": 0})
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Technology not found")
+    return serialize_technology(doc)
+
+
+async def load_timeline(kinds: tuple) -> list:
+    # Newest first; entries without a start date last
+    query = {"kind": {"$in": list(kinds)}} if kinds else {}
+    cursor = db[TIMELINE_VIEW].find(query, {"refreshed_at": 0}).sort([("start", -1), ("_id", -1)])
+    return [serialize_entry(doc) async for doc in cursor]
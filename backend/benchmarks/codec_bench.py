@@ -0,0 +1,76 @@
+"""Serialization cost of one list response, old path vs. the codec.
+
+Run from backend/:  python -m benchmarks.codec_bench [--docs 500] [--rounds 200]
+"""
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from bson import ObjectId
+import argparse
+import json
+import timeit
+from app.core.codec import document_serializer, encode
+
+
+def make_documents(count: int) -> list[dict]:
+    # Shaped like experiences: ObjectId, two datetimes, a few strings
+    start = datetime(2015, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "Company_name": f"Company {i}",
+            "position": "Software Engineer",
+            "start_date": start + timedelta(days=30 * i),
+            "end_date": start + timedelta(days=30 * i + 365) if i % 3 else None,
+            "description": "Built and operated services in Python and TypeScript. " * 4,
+            "website": f"https://company{i}.example.com",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_serialize(doc):
+    # What every router did before app.core.codec
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    for field in ["start_date", "end_date"]:
+        if isinstance(doc.get(field), datetime):
+            doc[field] = doc[field].date()
+    return doc
+
+
+def legacy_path(docs):
+    items = [legacy_serialize(doc) for doc in docs]
+    return json.dumps(jsonable_encoder(items), separators=(",", ":")).encode("utf-8")
+
+
+serialize = document_serializer("start_date", "end_date")
+
+
+def codec_path(docs):
+    # Motor hands out fresh dicts, so the serializer may work in place
+    return encode([serialize(dict(doc)) for doc in docs])
+
+
+def measure(fn, docs, rounds: int) -> float:
+    return min(timeit.repeat(lambda: fn(docs), number=rounds, repeat=3)) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = make_documents(args.docs)
+    assert json.loads(legacy_path(docs)) == json.loads(codec_path(docs))
+
+    legacy = measure(legacy_path, docs, args.rounds)
+    codec = measure(codec_path, docs, args.rounds)
+    print(f"{args.docs} documents, {len(codec_path(docs))} bytes")
+    print(f"jsonable_encoder + json.dumps: {legacy * 1000:8.3f} ms")
+    print(f"codec (orjson):                {codec * 1000:8.3f} ms")
+    print(f"speedup:                       {legacy / codec:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
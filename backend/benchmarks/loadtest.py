@@ -0,0 +1,232 @@
+"""Load test every API route in-process and compare against a baseline.
+
+Run from backend/:
+
+    python -m benchmarks.loadtest                      # in-memory MongoDB stand-in
+    python -m benchmarks.loadtest --mongo mongodb://localhost:27017
+    python -m benchmarks.loadtest --output run.json --baseline benchmarks/baseline.json
+
+The in-memory stand-in needs `mongomock-motor` and driving the app needs
+`httpx` (pip install -r benchmarks/req.txt); neither is a runtime
+dependency of the API. Against a real server
+the run uses (and first drops) the database named by --database, never
+the configured one.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Portfolio API load test")
+    parser.add_argument("--mongo", default="memory", help="'memory' for the in-process stand-in, or a MongoDB URL")
+    parser.add_argument("--database", default="portfolio_bench", help="Database used (and dropped) on a real server")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each read scenario")
+    parser.add_argument("--only", help="Comma separated scenario name prefixes, e.g. projects,portfolio.get")
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--experiences", type=int, default=40)
+    parser.add_argument("--certificates", type=int, default=80)
+    parser.add_argument("--icons", type=int, default=40)
+    parser.add_argument("--admission", action="store_true", help="Keep admission control (rate limits, in-flight caps) on")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a stored results file; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/throughput change before a regression (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite --baseline with this run")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # Settings are read when app modules are imported, so this runs first
+    os.environ["MONGO_DB"] = args.database
+    if args.mongo != "memory":
+        os.environ["MONGO_URL"] = args.mongo
+    # Contact mail goes nowhere: a closed local port fails fast and is retried later
+    os.environ.setdefault("SMTP_HOST", "127.0.0.1")
+    os.environ.setdefault("SMTP_PORT", "9")
+    # Snapshots of the seeded data are throwaway
+    os.environ.setdefault("SNAPSHOT_DIR", tempfile.mkdtemp(prefix="portfolio-bench-"))
+    # Lets the profiled and /debug scenarios authenticate
+    from benchmarks.scenarios import PROFILE_TOKEN
+    os.environ.setdefault("PROFILE_TOKEN", PROFILE_TOKEN)
+    # One client hammering each route would only measure the rate limiter
+    # (and the upload cap is below the default concurrency)
+    if not args.admission:
+        os.environ["ADMISSION_ENABLED"] = "false"
+
+
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_kb()
+
+
+def peak_rss_kb() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def run_scenario(client, ctx, scenario, count: int, concurrency: int, warmup: int):
+    from benchmarks.report import summarize
+
+    if scenario.setup is not None:
+        await scenario.setup(client, ctx, count)
+    if scenario.method == "GET":
+        for i in range(warmup):
+            await send(client, ctx, scenario, i)
+
+    latencies, sizes = [], []
+    errors = 0
+    sample_error = None
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors, sample_error
+        while (i := next(counter)) < count:
+            started = time.perf_counter()
+            response = await send(client, ctx, scenario, i)
+            latencies.append(time.perf_counter() - started)
+            sizes.append(len(response.content))
+            if response.status_code not in scenario.expect:
+                errors += 1
+                sample_error = sample_error or f"{response.status_code} {response.text[:200]}"
+
+    rss_before = rss_kb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies, sizes, errors, elapsed, rss_kb() - rss_before)
+    if sample_error:
+        stats["sample_error"] = sample_error
+    return stats
+
+
+async def send(client, ctx, scenario, i: int):
+    request = scenario.build(ctx, i)
+    response = await client.request(scenario.method, **request)
+    # Conditional scenarios replay the latest ETag seen for their URL
+    etag = response.headers.get("etag")
+    if etag and response.status_code == 200:
+        ctx.etags[request["url"]] = etag
+    return response
+
+
+def uncovered_routes(app, scenarios) -> list[str]:
+    covered = {(scenario.method.lower(), scenario.route) for scenario in scenarios}
+    routes = [
+        (method, path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    ]
+    return [f"{method.upper()} {path}" for method, path in routes if (method, path) not in covered]
+
+
+async def run(args) -> dict:
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("httpx is required: pip install httpx")
+
+    from app.main import app
+    from app.db.database import mongo
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import SeedConfig, seed
+
+    if args.mongo == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("The in-memory stand-in needs mongomock-motor: pip install mongomock-motor")
+        # Mongo.connect() keeps an existing client, so the lifespan uses this one
+        mongo.client = AsyncMongoMockClient()
+    else:
+        await mongo.connect().drop_database(args.database)
+
+    scenarios = SCENARIOS
+    if args.only:
+        prefixes = tuple(prefix.strip() for prefix in args.only.split(",") if prefix.strip())
+        scenarios = [scenario for scenario in SCENARIOS if scenario.name.startswith(prefixes)]
+
+    config = SeedConfig(projects=args.projects, experiences=args.experiences, certificates=args.certificates, icons=args.icons)
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongo": "memory" if args.mongo == "memory" else "mongod",
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "seed": vars(config),
+        },
+        "scenarios": {},
+    }
+
+    async with app.router.lifespan_context(app):
+        # The lifespan gives up waiting on a slow database; the run does not
+        while not mongo.ready:
+            await asyncio.sleep(0.1)
+
+        # A crashing handler is counted as a 500, not an aborted run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            started = time.perf_counter()
+            ctx = await seed(client, config)
+            print(f"Seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+            for scenario in scenarios:
+                stats = await run_scenario(client, ctx, scenario, args.requests, args.concurrency, args.warmup)
+                results["scenarios"][scenario.name] = stats
+                print(f"  {scenario.name}: {stats['throughput_rps']} req/s", file=sys.stderr)
+
+    results["memory"] = {"rss_kb": rss_kb(), "peak_rss_kb": peak_rss_kb()}
+    results["uncovered_routes"] = uncovered_routes(app, SCENARIOS)
+    return results
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from benchmarks.report import compare, load, print_table, save
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    if results["uncovered_routes"]:
+        print(f"\nRoutes without a scenario: {', '.join(results['uncovered_routes'])}")
+
+    if args.output:
+        save(args.output, results)
+
+    if args.baseline and args.update_baseline:
+        save(args.baseline, results)
+        print(f"\nBaseline written to {args.baseline}")
+    elif args.baseline:
+        regressions = compare(results, load(args.baseline), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Latency statistics, console report and baseline comparison."""
+import json
+import math
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest rank, so p99 of 100 samples is the 99th, not an interpolation
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list, sizes: list, errors: int, elapsed: float, rss_delta_kb: int) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+            "p50": round(percentile(ordered, 50) * 1000, 3),
+            "p95": round(percentile(ordered, 95) * 1000, 3),
+            "p99": round(percentile(ordered, 99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if count else 0.0,
+        },
+        "bytes_per_response": round(sum(sizes) / len(sizes)) if sizes else 0,
+        "rss_delta_kb": rss_delta_kb,
+    }
+
+
+def print_table(results: dict):
+    header = f"{'scenario':28} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>9} {'err':>5} {'rss kB':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in results["scenarios"].items():
+        latency = stats["latency_ms"]
+        print(
+            f"{name:28} {stats['throughput_rps']:>9} {latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9} "
+            f"{stats['bytes_per_response']:>9} {stats['errors']:>5} {stats['rss_delta_kb']:>8}"
+        )
+    memory = results["memory"]
+    print(f"\npeak RSS {memory['peak_rss_kb']} kB, RSS after run {memory['rss_kb']} kB")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions against a stored baseline, as readable lines.
+
+    A scenario regresses when its p95 latency grows, or its throughput
+    drops, by more than `tolerance` (0.2 = 20%), or when it starts failing.
+    """
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors (baseline {base['errors']})")
+        base_p95, p95 = base["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        if base_p95 and p95 > base_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {p95} ms vs {base_p95} ms (+{(p95 / base_p95 - 1) * 100:.0f}%)")
+        base_rps, rps = base["throughput_rps"], current["throughput_rps"]
+        if base_rps and rps < base_rps * (1 - tolerance):
+            regressions.append(f"{name}: {rps} req/s vs {base_rps} req/s ({(rps / base_rps - 1) * 100:.0f}%)")
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(path: str, results: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
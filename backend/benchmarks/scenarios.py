@@ -0,0 +1,278 @@
+"""One scenario per route in app/api/routes_*.py.
+
+Each scenario builds the i-th request from the seeded ids. Reads run first,
+then writes, then deletes, so every phase sees the full data set.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+from benchmarks.seed import make_certificate, make_education, make_experience, make_project, make_personal
+import asyncio
+import random
+
+PROFILE_TOKEN = "bench-profile-token"
+# Idle /events/stream connections held open from projects.patch.fanout on
+EVENT_LISTENERS = 1_000
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    # Route template as it appears in the OpenAPI schema, used for coverage
+    route: str
+    build: Callable  # (ctx, i) -> keyword arguments for httpx request()
+    expect: tuple = (200,)
+    # Creates documents the scenario consumes, e.g. ids to delete
+    setup: Optional[Callable] = None
+
+
+def pick(ctx, collection: str, i: int) -> str:
+    ids = ctx.ids[collection]
+    return ids[i % len(ids)]
+
+
+def get(url: str, **kwargs):
+    return lambda ctx, i: {"url": url, **kwargs}
+
+
+def conditional_get(url: str):
+    # Replays the ETag of the first response: measures the 304 path
+    def build(ctx, i):
+        return {"url": url, "headers": {"If-None-Match": ctx.etags.get(url, "")}}
+    return build
+
+
+async def create_victims(client, ctx, collection: str, path: str, make, count: int):
+    rng = random.Random(count)
+    response = await client.post(path, json={"ordered": False, "operations": [
+        {"op": "insert", "document": make(rng, 10_000 + i)} for i in range(count)
+    ]})
+    response.raise_for_status()
+    ctx.victims[collection] = [result["id"] for result in response.json()["results"]]
+
+
+def victims_of(collection: str, path: str, make):
+    async def setup(client, ctx, count):
+        await create_victims(client, ctx, collection, path, make, count)
+    return setup
+
+
+def delete(url_template: str, collection: str):
+    return lambda ctx, i: {"url": url_template.format(id=ctx.victims[collection][i])}
+
+
+def make_phone(rng, i):
+    return {"number": f"+1 555 {i:07d}"}
+
+
+def update(url_template: str, collection: str, make):
+    # The generated name embeds i, so every update really changes the document
+    return lambda ctx, i: {"url": url_template.format(id=pick(ctx, collection, i)), "json": make(random.Random(i), 40_000 + i)}
+
+
+def patch(url_template: str, collection: str, field: str):
+    return lambda ctx, i: {"url": url_template.format(id=pick(ctx, collection, i)), "json": {field: f"Patched {i}"}}
+
+
+def get_one(url_template: str, collection: str):
+    return lambda ctx, i: {"url": url_template.format(id=pick(ctx, collection, i))}
+
+
+def create(url: str, make):
+    return lambda ctx, i: {"url": url, "json": make(random.Random(i), 20_000 + i)}
+
+
+def bulk(url: str, make):
+    # Inserts only, so the in-memory stand-in (no UpdateOne support) can run it too
+    return lambda ctx, i: {"url": url, "json": {"ordered": False, "operations": [
+        {"op": "insert", "document": make(random.Random(i), 30_000 + i * 10 + n)} for n in range(10)
+    ]}}
+
+
+def upload_icon(ctx, i):
+    content = ctx.icon_bytes[i % len(ctx.icon_bytes)]
+    return {"url": "/skills/post", "params": {"name": f"Icon {i}"}, "files": {"file": (f"bench-{i}.png", content, "image/png")}}
+
+
+def icon_image(**params):
+    return lambda ctx, i: {"url": f"/skills/{pick(ctx, 'skills', i)}/image", "params": params}
+
+
+def contact(ctx, i):
+    return {"url": "/contact/post", "json": {
+        "first_name": "Load", "last_name": f"Test {i}", "email": "load@example.com", "message": "Benchmark message " * 10,
+    }}
+
+
+def portfolio_import(ctx, i):
+    return {"url": "/portfolio/import", "params": {"mode": "merge"}, "json": {"phones": [{"number": f"+1 556 {i:07d}"}]}}
+
+
+def update_phone(ctx, i):
+    phone_id = pick(ctx, "phones", i)
+    return {"url": f"/phones/{phone_id}/put", "json": {"id": phone_id, "number": f"+1 557 {i:07d}"}}
+
+
+async def wait_for_snapshots(client, ctx, count):
+    # The first build runs a debounce interval after seeding
+    for _ in range(300):
+        if (await client.get("/snapshots/status")).json()["builds"]:
+            return
+        await asyncio.sleep(0.1)
+
+
+def snapshot(name: str):
+    return lambda ctx, i: {"url": f"/snapshots/{name}.json", "headers": {"Accept-Encoding": "br, gzip"}}
+
+
+def profiled(url: str):
+    return lambda ctx, i: {"url": url, "headers": {"X-Profile": PROFILE_TOKEN}}
+
+
+async def take_profile(client, ctx, count):
+    response = await client.get("/projects/get", headers={"X-Profile": PROFILE_TOKEN})
+    ctx.profiles.append(response.headers["X-Profile-Id"])
+
+
+async def listen(app):
+    # An event stream client that never reads or disconnects; it ends when
+    # the lifespan shutdown closes the open streams
+    idle = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await idle.wait()
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/events/stream", "raw_path": b"/events/stream", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+
+
+async def open_listeners(client, ctx, count):
+    # Writes are then measured with every change fanned out to them
+    from app.main import app
+
+    ctx.listeners.extend(asyncio.create_task(listen(app)) for _ in range(EVENT_LISTENERS))
+    for _ in range(300):
+        if (await client.get("/events/stats")).json()["clients"] >= EVENT_LISTENERS:
+            return
+        await asyncio.sleep(0.01)
+
+
+def update_personal(ctx, i):
+    return {"url": "/personals/update", "json": {**make_personal(), "passion": f"Building fast services {i}"}}
+
+
+READS = [
+    Scenario("projects.get", "GET", "/projects/get", get("/projects/get")),
+    Scenario("projects.get.ndjson", "GET", "/projects/get", get("/projects/get", headers={"Accept": "application/x-ndjson"})),
+    Scenario("projects.get.304", "GET", "/projects/get", conditional_get("/projects/get"), expect=(304,)),
+    Scenario("projects.get.page", "GET", "/projects/get", get("/projects/get", params={"limit": 20, "sort": "name", "fields": "name,technologies"})),
+    Scenario("projects.get.one", "GET", "/projects/get/{id}", get_one("/projects/get/{id}", "projects")),
+    Scenario("experiences.get", "GET", "/experiences/get", get("/experiences/get")),
+    Scenario("experiences.get.one", "GET", "/experiences/get/{id}", get_one("/experiences/get/{id}", "experiences")),
+    Scenario("educations.get.one", "GET", "/educations/get/{id}", get_one("/educations/get/{id}", "educations")),
+    Scenario("certificates.get.one", "GET", "/certificates/get/{id}", get_one("/certificates/get/{id}", "certificates")),
+    Scenario("phones.get.one", "GET", "/phones/get/{id}", get_one("/phones/get/{id}", "phones")),
+    Scenario("personals.get.one", "GET", "/personals/get/{id}", get_one("/personals/get/{id}", "personal")),
+    Scenario("educations.get", "GET", "/educations/get", get("/educations/get")),
+    Scenario("certificates.get", "GET", "/certificates/get", get("/certificates/get")),
+    Scenario("personals.get", "GET", "/personals/get", get("/personals/get")),
+    Scenario("phones.get", "GET", "/phones/get", get("/phones/get")),
+    Scenario("skills.get", "GET", "/skills/get", get("/skills/get")),
+    Scenario("skills.get.ndjson", "GET", "/skills/get", get("/skills/get", params={"format": "ndjson"})),
+    Scenario("skills.image", "GET", "/skills/{id}/image", icon_image()),
+    Scenario("skills.image.variant", "GET", "/skills/{id}/image", icon_image(size=64, format="webp")),
+    Scenario("portfolio.get", "GET", "/portfolio/get", get("/portfolio/get")),
+    Scenario("portfolio.get.304", "GET", "/portfolio/get", conditional_get("/portfolio/get"), expect=(304,)),
+    Scenario("portfolio.export", "GET", "/portfolio/export", get("/portfolio/export")),
+    Scenario("snapshots.portfolio", "GET", "/snapshots/{name}.json", snapshot("portfolio"), setup=wait_for_snapshots),
+    Scenario("snapshots.status", "GET", "/snapshots/status", get("/snapshots/status")),
+    Scenario("cv.pdf", "GET", "/cv/get", get("/cv/get")),
+    Scenario("cv.json", "GET", "/cv/get", get("/cv/get", params={"format": "json"})),
+    Scenario("cv.status", "GET", "/cv/status", get("/cv/status")),
+    Scenario("analytics.stats", "GET", "/analytics/stats", get("/analytics/stats")),
+    Scenario("projects.get.profiled", "GET", "/projects/get", profiled("/projects/get")),
+    Scenario("debug.slow", "GET", "/debug/slow", get("/debug/slow", headers={"X-Debug-Token": PROFILE_TOKEN})),
+    Scenario("debug.profiles", "GET", "/debug/profiles", get("/debug/profiles", headers={"X-Debug-Token": PROFILE_TOKEN})),
+    Scenario("debug.profile", "GET", "/debug/profiles/{profile_id}",
+             lambda ctx, i: {"url": f"/debug/profiles/{ctx.profiles[0]}", "headers": {"X-Debug-Token": PROFILE_TOKEN}}, setup=take_profile),
+    # The test transport buffers whole responses, so an endless stream is
+    # only measured through its fan-out (projects.patch.fanout)
+    Scenario("events.stream.invalid", "GET", "/events/stream", get("/events/stream", params={"collections": "nope"}), expect=(400,)),
+    Scenario("events.stats", "GET", "/events/stats", get("/events/stats")),
+    Scenario("search.get", "GET", "/search/get", get("/search/get", params={"q": "api pyth"})),
+    Scenario("search.facets", "GET", "/search/facets", get("/search/facets")),
+    Scenario("views.technologies", "GET", "/views/technologies", get("/views/technologies")),
+    # Unknown on either backend; the in-memory stand-in cannot run the $merge
+    # pipelines, so its views stay empty
+    Scenario("views.technology.missing", "GET", "/views/technologies/{name}", get("/views/technologies/no-such-technology"), expect=(404,)),
+    Scenario("views.timeline", "GET", "/views/timeline", get("/views/timeline")),
+    Scenario("views.timeline.work", "GET", "/views/timeline", get("/views/timeline", params={"kind": "work"})),
+    Scenario("views.status", "GET", "/views/status", get("/views/status")),
+    Scenario("cache.stats", "GET", "/cache/stats", get("/cache/stats")),
+    Scenario("metrics", "GET", "/metrics", get("/metrics")),
+    Scenario("health.live", "GET", "/health/live", get("/health/live")),
+    Scenario("health.ready", "GET", "/health/ready", get("/health/ready")),
+]
+
+WRITES = [
+    Scenario("projects.post", "POST", "/projects/post", create("/projects/post", make_project)),
+    Scenario("projects.update", "PUT", "/projects/update/{id}", update("/projects/update/{id}", "projects", make_project)),
+    Scenario("projects.patch", "PATCH", "/projects/update/{id}", patch("/projects/update/{id}", "projects", "description")),
+    Scenario("projects.bulk", "POST", "/projects/bulk", bulk("/projects/bulk", make_project)),
+    Scenario("experiences.post", "POST", "/experiences/post", create("/experiences/post", make_experience)),
+    Scenario("experiences.update", "PUT", "/experiences/update/{id}", update("/experiences/update/{id}", "experiences", make_experience)),
+    Scenario("experiences.patch", "PATCH", "/experiences/update/{id}", patch("/experiences/update/{id}", "experiences", "description")),
+    Scenario("experiences.bulk", "POST", "/experiences/bulk", bulk("/experiences/bulk", make_experience)),
+    Scenario("educations.post", "POST", "/educations/post", create("/educations/post", make_education)),
+    Scenario("educations.update", "PUT", "/educations/update/{id}", update("/educations/update/{id}", "educations", make_education)),
+    Scenario("educations.patch", "PATCH", "/educations/update/{id}", patch("/educations/update/{id}", "educations", "description")),
+    Scenario("educations.bulk", "POST", "/educations/bulk", bulk("/educations/bulk", make_education)),
+    Scenario("certificates.post", "POST", "/certificates/post", create("/certificates/post", make_certificate)),
+    Scenario("certificates.update", "PUT", "/certificates/update/{id}", update("/certificates/update/{id}", "certificates", make_certificate)),
+    Scenario("certificates.patch", "PATCH", "/certificates/update/{id}", patch("/certificates/update/{id}", "certificates", "description")),
+    Scenario("certificates.bulk", "POST", "/certificates/bulk", bulk("/certificates/bulk", make_certificate)),
+    Scenario("phones.post", "POST", "/phones/post", create("/phones/post", make_phone)),
+    Scenario("phones.put", "PUT", "/phones/{phone_id}/put", update_phone),
+    Scenario("phones.update", "PUT", "/phones/update/{id}", update("/phones/update/{id}", "phones", make_phone)),
+    Scenario("phones.patch", "PATCH", "/phones/update/{id}", patch("/phones/update/{id}", "phones", "number")),
+    Scenario("phones.bulk", "POST", "/phones/bulk", bulk("/phones/bulk", make_phone)),
+    # Only one personal document may exist, so this measures the conflict path
+    Scenario("personals.post", "POST", "/personals/post", lambda ctx, i: {"url": "/personals/post", "json": make_personal()}, expect=(400,)),
+    Scenario("personals.update", "PUT", "/personals/update", update_personal),
+    Scenario("personals.patch", "PATCH", "/personals/update", lambda ctx, i: {"url": "/personals/update", "json": {"passion": f"Patched {i}"}}),
+    Scenario("skills.post", "POST", "/skills/post", upload_icon),
+    Scenario("contact.post", "POST", "/contact/post", contact, expect=(202,)),
+    Scenario("portfolio.import", "POST", "/portfolio/import", portfolio_import),
+    # Last write scenario: the listeners stay connected for the rest of the run
+    Scenario("projects.patch.fanout", "PATCH", "/projects/update/{id}", patch("/projects/update/{id}", "projects", "description"),
+             setup=open_listeners),
+]
+
+DELETES = [
+    Scenario("projects.delete", "DELETE", "/projects/delete/{id}", delete("/projects/delete/{id}", "projects"),
+             setup=victims_of("projects", "/projects/bulk", make_project)),
+    Scenario("experiences.delete", "DELETE", "/experiences/delete/{id}", delete("/experiences/delete/{id}", "experiences"),
+             setup=victims_of("experiences", "/experiences/bulk", make_experience)),
+    Scenario("educations.delete", "DELETE", "/educations/delete/{id}", delete("/educations/delete/{id}", "educations"),
+             setup=victims_of("educations", "/educations/bulk", make_education)),
+    Scenario("certificates.delete", "DELETE", "/certificates/delete/{id}", delete("/certificates/delete/{id}", "certificates"),
+             setup=victims_of("certificates", "/certificates/bulk", make_certificate)),
+    Scenario("phones.delete", "DELETE", "/phones/delete/{id}", delete("/phones/delete/{id}", "phones"),
+             setup=victims_of("phones", "/phones/bulk", make_phone)),
+    Scenario("phones.delete.legacy", "DELETE", "/phones/{phone_id}/delete", delete("/phones/{id}/delete", "phones_legacy"),
+             setup=victims_of("phones_legacy", "/phones/bulk", make_phone)),
+]
+
+SCENARIOS = READS + WRITES + DELETES
@@ -0,0 +1,156 @@
+"""Realistic portfolio data, loaded through the public API."""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from PIL import Image
+import io
+import random
+
+TECHNOLOGIES = [
+    "Python", "FastAPI", "Django", "Flask", "TypeScript", "React", "Next.js", "Node.js",
+    "MongoDB", "PostgreSQL", "Redis", "Docker", "Kubernetes", "AWS", "GCP", "Go",
+    "Rust", "C++", "C#", ".NET", "Java", "Spring", "Kotlin", "Swift", "GraphQL", "Tailwind",
+]
+WORDS = (
+    "built designed shipped scaled maintained migrated automated monitored api service platform "
+    "pipeline dashboard realtime analytics search payments auth caching queue worker mobile web "
+    "cloud data model tests deploy latency throughput users team feature release"
+).split()
+
+# Long edge of generated icons; uploads in the wild range from tiny SVG-ish
+# PNGs to oversized exports straight from a design tool
+ICON_EDGES = (64, 128, 256, 512, 1024)
+
+
+@dataclass
+class SeedConfig:
+    projects: int = 300
+    experiences: int = 40
+    educations: int = 8
+    certificates: int = 80
+    phones: int = 4
+    icons: int = 40
+    seed: int = 2025
+
+
+@dataclass
+class SeedResult:
+    # Ids handed to scenarios that need existing documents
+    ids: dict = field(default_factory=dict)
+    icon_bytes: list = field(default_factory=list)
+    # Filled while running: documents created for delete scenarios, and the
+    # ETag first seen per URL for conditional requests, profile ids and the
+    # tasks of idle event stream listeners
+    victims: dict = field(default_factory=dict)
+    etags: dict = field(default_factory=dict)
+    profiles: list = field(default_factory=list)
+    listeners: list = field(default_factory=list)
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_project(rng: random.Random, i: int) -> dict:
+    return {
+        "name": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {i}",
+        "description": " ".join(sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(2, 6))),
+        "repository_url": f"https://github.com/example/project-{i}",
+        "live_url": f"https://project-{i}.example.com" if i % 3 else None,
+        "technologies": rng.sample(TECHNOLOGIES, rng.randint(2, 7)),
+    }
+
+
+def make_experience(rng: random.Random, i: int) -> dict:
+    start = date(2012, 1, 1) + timedelta(days=rng.randint(0, 4000))
+    return {
+        "Company_name": f"Company {i}",
+        "position": rng.choice(["Software Engineer", "Senior Engineer", "Intern", "Tech Lead"]),
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=rng.randint(90, 1500))).isoformat() if i % 4 else None,
+        "description": " ".join(sentence(rng, rng.randint(10, 25)) for _ in range(3)),
+        "website": f"https://company{i}.example.com",
+    }
+
+
+def make_education(rng: random.Random, i: int) -> dict:
+    year = 2008 + i
+    return {
+        "institution": f"University {i}",
+        "degree": rng.choice(["BSc", "MSc", "Diploma"]),
+        "field_of_study": "Computer Science",
+        "start_date": str(year),
+        "end_date": str(year + 3),
+        "description": sentence(rng, 15),
+    }
+
+
+def make_certificate(rng: random.Random, i: int) -> dict:
+    issued = date(2016, 1, 1) + timedelta(days=rng.randint(0, 3000))
+    return {
+        "title": f"{rng.choice(TECHNOLOGIES)} Certification {i}",
+        "issuer": rng.choice(["Coursera", "AWS", "Google", "Microsoft", "Udemy"]),
+        "issue_date": issued.isoformat(),
+        "expiration_date": (issued + timedelta(days=1095)).isoformat() if i % 2 else None,
+        "description": sentence(rng, 12),
+        "certificate_url": f"https://certs.example.com/{i}",
+    }
+
+
+def make_personal() -> dict:
+    return {
+        "name": "Benchmark User",
+        "passion": "Building fast services",
+        "address": "Colombo",
+        "phone": "+94 77 000 0000",
+        "email": "bench@example.com",
+        "linkedin": "https://www.linkedin.com/in/example",
+        "github": "https://github.com/example",
+        "birthdate": "1995-06-15",
+    }
+
+
+def make_icon(rng: random.Random) -> bytes:
+    # Gradient plus noise: compresses like a real logo, not like a flat fill
+    edge = rng.choice(ICON_EDGES)
+    image = Image.linear_gradient("L").resize((edge, edge)).convert("RGBA")
+    noise = Image.effect_noise((edge, edge), rng.randint(10, 60)).convert("RGBA")
+    image = Image.blend(image, noise, 0.35)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def bulk_insert(client, path: str, documents: list) -> list:
+    response = await client.post(path, json={"ordered": True, "operations": [
+        {"op": "insert", "document": document} for document in documents
+    ]})
+    response.raise_for_status()
+    return [result["id"] for result in response.json()["results"]]
+
+
+async def seed(client, config: SeedConfig) -> SeedResult:
+    rng = random.Random(config.seed)
+    result = SeedResult()
+
+    response = await client.post("/personals/post", json=make_personal())
+    response.raise_for_status()
+    result.ids["personal"] = [response.json()["id"]]
+
+    result.ids["projects"] = await bulk_insert(client, "/projects/bulk", [make_project(rng, i) for i in range(config.projects)])
+    result.ids["experiences"] = await bulk_insert(client, "/experiences/bulk", [make_experience(rng, i) for i in range(config.experiences)])
+    result.ids["educations"] = await bulk_insert(client, "/educations/bulk", [make_education(rng, i) for i in range(config.educations)])
+    result.ids["certificates"] = await bulk_insert(client, "/certificates/bulk", [make_certificate(rng, i) for i in range(config.certificates)])
+    result.ids["phones"] = await bulk_insert(client, "/phones/bulk", [{"number": f"+94 77 {i:03d} 0000"} for i in range(config.phones)])
+
+    result.ids["skills"] = []
+    for i in range(config.icons):
+        content = make_icon(rng)
+        result.icon_bytes.append(content)
+        response = await client.post(
+            "/skills/post",
+            params={"name": rng.choice(TECHNOLOGIES)},
+            files={"file": (f"icon-{i}.png", content, "image/png")},
+        )
+        response.raise_for_status()
+        result.ids["skills"].append(response.json()["id"])
+    return result
@@ -0,0 +1,100 @@
+"""Shared fixtures: the app running on an in-memory MongoDB
+(mongomock-motor), called in process through httpx.ASGITransport.
+
+Run from backend/ with `python -m pytest tests` after
+`pip install -r req.txt -r tests/req.txt`.
+
+Settings are read once at import time, so the environment is set before
+the app is imported. Every test starts from an empty database and fresh
+in-process state (caches, replicas, search indexes, versions).
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("TENANT_MODE", "path")
+os.environ.setdefault("SNAPSHOT_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import mongomock.collection
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.main import app
+from app.core import events
+from app.core.admission import AdmissionMiddleware, default_groups
+from app.core.cache import response_cache
+from app.core.replica import replica
+from app.core.tenancy import tenant_registry
+from app.core.workers import shutdown_process_pool
+from app.db.database import mongo
+from app.services.analytics import BoundedCounter, analytics
+from app.services.broadcaster import change_broadcaster
+from app.services.cv import cv_builder
+from app.services.search import search_index
+from app.services.views import derived_views
+
+TENANT_LOCALS = (response_cache, replica, search_index, cv_builder, derived_views)
+
+
+def accept_sort(method):
+    # pymongo 4.9+ hands bulk builders a `sort` argument mongomock 4.3 predates
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+for name in ("add_replace", "add_update"):
+    setattr(mongomock.collection.BulkOperationBuilder, name, accept_sort(getattr(mongomock.collection.BulkOperationBuilder, name)))
+
+
+def admission_middleware() -> AdmissionMiddleware:
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+    layer = app.middleware_stack
+    while not isinstance(layer, AdmissionMiddleware):
+        layer = layer.app
+    return layer
+
+
+def project(name: str, **fields) -> dict:
+    return {"name": name, "description": None, "repository_url": None, "live_url": None, "technologies": [], **fields}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def process_pool():
+    yield
+    shutdown_process_pool()
+
+
+@pytest.fixture
+async def database():
+    mongo.client = AsyncMongoMockClient()
+    mongo.transactions = None
+    for local in TENANT_LOCALS:
+        local.__init__(local._factory, local._max_tenants)
+    events._versions.clear()
+    tenant_registry.__init__()
+    change_broadcaster.__init__()
+    analytics.counter = BoundedCounter()
+    admission = admission_middleware()
+    admission.groups = default_groups()
+    admission.in_flight = 0
+    # What the lifespan bootstrap does for the default tenant
+    await replica.load_all()
+    await search_index.build()
+    mongo.ready = True
+    yield mongo
+    mongo.ready = False
+
+
+@pytest.fixture
+async def client(database):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
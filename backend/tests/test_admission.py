@@ -0,0 +1,56 @@
+import pytest
+from app.core.admission import AdmissionGroup
+from conftest import admission_middleware, project
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com", "message": "Hello"}
+
+
+@pytest.fixture
+def groups(client):
+    groups = admission_middleware().groups
+    groups["upload"] = AdmissionGroup("upload", "", 4, 1000)
+    groups["write"] = AdmissionGroup("write", "", 4, 2000)
+    groups["contact"] = AdmissionGroup("contact", "2/600", 4, 16 * 1024)
+    return groups
+
+
+async def test_declared_body_over_the_limit_gets_413(client, groups):
+    response = await client.post("/skills/post", params={"name": "big"}, files={"file": ("a.png", b"x" * 5000, "image/png")})
+    assert response.status_code == 413
+    assert response.headers["connection"] == "close"
+
+
+async def test_streamed_body_over_the_limit_gets_413(client, groups):
+    async def body():
+        for _ in range(10):
+            yield b" " * 500
+
+    response = await client.post("/projects/post", content=body(), headers={"content-type": "application/json"})
+    assert response.status_code == 413
+    assert (await client.get("/projects/get")).json() == []
+
+
+async def test_body_within_the_limit_goes_through(client, groups):
+    assert (await client.post("/projects/post", json=project("small"))).status_code == 200
+
+
+async def test_rate_limit_gets_429_with_retry_after(client, groups):
+    for _ in range(2):
+        assert (await client.post("/contact/post", json=CONTACT)).status_code == 202
+    response = await client.post("/contact/post", json=CONTACT)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+
+    # Other groups keep their own budget
+    assert (await client.get("/projects/get")).status_code == 200
+    assert (await client.post("/projects/post", json=project("still allowed"))).status_code == 200
+
+
+async def test_full_group_sheds_load_with_503(client, groups):
+    groups["write"].in_flight = groups["write"].max_in_flight
+    response = await client.post("/projects/post", json=project("busy"))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert (await client.get("/projects/get")).status_code == 200
@@ -0,0 +1,44 @@
+import pytest
+from app.services.analytics import BoundedCounter, analytics
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_views_are_flushed_into_daily_counters(client):
+    created = (await client.post("/projects/post", json=project("alpha"))).json()
+    for _ in range(3):
+        await client.get(f"/projects/get/{created['id']}")
+    assert analytics.counter.pending() == 3
+
+    assert await analytics.flush() == 3
+    stats = (await client.get("/analytics/stats", params={"kind": "projects"})).json()
+    assert stats["kinds"]["projects"] == {"total": 3, "top": [{"id": created["id"], "hits": 3}]}
+    assert stats["buffer"]["pending_hits"] == 0
+
+    # Later flushes add to the same counter
+    await client.get(f"/projects/get/{created['id']}")
+    await analytics.flush()
+    stats = (await client.get("/analytics/stats", params={"kind": "projects"})).json()
+    assert stats["kinds"]["projects"]["total"] == 4
+
+
+async def test_cv_revalidation_is_not_a_download(client):
+    first = await client.get("/cv/get", params={"format": "json"})
+    assert first.status_code == 200
+    again = await client.get("/cv/get", params={"format": "json"}, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+    await analytics.flush()
+    stats = (await client.get("/analytics/stats", params={"kind": "cv"})).json()
+    assert stats["kinds"]["cv"] == {"total": 1, "top": [{"id": "json", "hits": 1}]}
+
+
+def test_full_buffer_drops_new_counters_only():
+    counter = BoundedCounter(max_keys=2)
+    assert counter.add("a") and counter.add("b")
+    assert not counter.add("c")
+    assert counter.add("a", 2)
+    assert counter.dropped == 1
+    assert counter.drain() == {"a": 3, "b": 1}
+    assert counter.pending() == 0
@@ -0,0 +1,42 @@
+import pytest
+from app.main import app
+from benchmarks.loadtest import run_scenario, uncovered_routes
+from benchmarks.report import compare, percentile, summarize
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import SeedConfig, seed
+
+pytestmark = pytest.mark.anyio
+
+
+def stats(p95: float, rps: float, errors: int = 0) -> dict:
+    return {"errors": errors, "throughput_rps": rps, "latency_ms": {"p95": p95}}
+
+
+def test_every_route_has_a_scenario():
+    assert uncovered_routes(app, SCENARIOS) == []
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 99), percentile(values, 100)) == (50, 99, 100)
+    assert percentile([], 95) == 0.0
+
+    summary = summarize([0.002, 0.001], [10, 30], 0, 1.0, 0)
+    assert summary["latency_ms"]["p50"] == 1.0
+    assert summary["bytes_per_response"] == 20
+
+
+def test_regressions_beyond_the_tolerance():
+    baseline = {"scenarios": {"a": stats(10, 100), "b": stats(10, 100), "c": stats(10, 100)}}
+    results = {"scenarios": {"a": stats(11.5, 90), "b": stats(13, 100), "c": stats(10, 70, errors=2)}}
+    regressions = compare(results, baseline, tolerance=0.2)
+    assert [line.split(":")[0] for line in regressions] == ["b", "c", "c"]
+
+
+@pytest.mark.parametrize("name", ["projects.get", "projects.get.304", "projects.patch", "portfolio.get"])
+async def test_scenario_runs_against_seeded_data(client, name):
+    ctx = await seed(client, SeedConfig(projects=5, experiences=2, certificates=2, icons=1))
+    scenario = next(scenario for scenario in SCENARIOS if scenario.name == name)
+    result = await run_scenario(client, ctx, scenario, count=4, concurrency=2, warmup=1)
+    assert result["requests"] == 4
+    assert result["errors"] == 0, result.get("sample_error")
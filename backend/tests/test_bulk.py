@@ -0,0 +1,95 @@
+import pytest
+from app.core.tenancy import tenant_registry
+from app.db.database import db
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+PERSONAL = {
+    "name": "Ada Lovelace", "passion": None, "address": None, "phone": None, "email": "ada@example.com",
+    "linkedin": None, "github": "https://github.com/ada", "birthdate": "1815-12-10",
+}
+CERTIFICATE = {"title": "C", "issuer": "I", "issue_date": "2024-01-01", "expiration_date": None, "description": None, "certificate_url": None}
+
+
+async def seed(client):
+    await client.post("/personals/post", json=PERSONAL)
+    for name in ("alpha", "bravo", "charlie"):
+        await client.post("/projects/post", json=project(name, technologies=["Go"]))
+    await client.post("/certificates/post", json=CERTIFICATE)
+
+
+async def test_export_import_round_trip(client):
+    await seed(client)
+    exported = (await client.get("/portfolio/export")).json()
+    assert len(exported["projects"]) == 3
+
+    # Into another, empty portfolio: same documents, same ids
+    await tenant_registry.create("copy", [])
+    response = await client.post("/t/copy/portfolio/import", json=exported)
+    assert response.status_code == 200
+    assert response.json()["sections"]["projects"]["inserted"] == 3
+    assert (await client.get("/t/copy/portfolio/export")).json() == exported
+
+
+async def test_replace_keeps_ids_and_drops_the_rest(client):
+    await seed(client)
+    exported = (await client.get("/portfolio/export")).json()
+    kept = exported["projects"][:2]
+    kept[0]["name"] = "renamed"
+
+    response = await client.post("/portfolio/import", params={"mode": "replace"}, json={"projects": kept})
+    assert response.status_code == 200
+    assert response.json()["sections"]["projects"]["deleted"] == 1
+
+    projects = (await client.get("/projects/get", params={"sort": "_id"})).json()
+    assert projects == kept
+    # Sections not in the payload are left alone
+    assert len((await client.get("/certificates/get")).json()) == 1
+
+
+async def test_merge_adds_to_the_section(client):
+    await seed(client)
+    response = await client.post("/portfolio/import", json={"projects": [project("delta")]})
+    assert response.status_code == 200
+    assert len((await client.get("/projects/get")).json()) == 4
+
+
+async def test_invalid_document_writes_nothing(client):
+    await seed(client)
+    payload = {"projects": [project("ok"), {"description": "no name"}], "certificates": []}
+    response = await client.post("/portfolio/import", params={"mode": "replace"}, json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"]["projects"][0]["index"] == 1
+    assert len((await client.get("/projects/get")).json()) == 3
+    assert len((await client.get("/certificates/get")).json()) == 1
+
+
+async def test_failed_replace_never_empties_the_section(client):
+    await seed(client)
+    before = (await client.get("/projects/get", params={"sort": "_id"})).json()
+    await db.projects.create_index("name", unique=True)
+
+    payload = {"projects": [project("x"), project("x")]}
+    response = await client.post("/portfolio/import", params={"mode": "replace"}, json=payload)
+    results = response.json()["sections"]["projects"]["results"]
+    assert [result["status"] for result in results] == ["ok", "error"]
+
+    names = {item["name"] for item in (await client.get("/projects/get")).json()}
+    assert names == {item["name"] for item in before} | {"x"}
+
+
+async def test_batch_write_ordered_and_unordered(client):
+    operations = [
+        {"op": "insert", "document": project("one")},
+        {"op": "update", "id": "bad-id", "document": project("two")},
+        {"op": "insert", "document": project("three")},
+    ]
+    ordered = (await client.post("/projects/bulk", json={"operations": operations})).json()
+    assert [result["status"] for result in ordered["results"]] == ["ok", "error", "skipped"]
+    assert ordered["inserted"] == 1
+
+    unordered = (await client.post("/projects/bulk", json={"ordered": False, "operations": operations})).json()
+    assert [result["status"] for result in unordered["results"]] == ["ok", "error", "ok"]
+    assert unordered["inserted"] == 2
+    assert len((await client.get("/projects/get")).json()) == 3
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+import pytest
+from app.core import events
+from app.core.replica import replica
+from app.db.database import control_db, db
+from app.services.cache_sync import VersionWatcher
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+async def bump_elsewhere(collection: str):
+    # What another worker's publish_change leaves in cache_versions
+    await control_db[events.VERSIONS_COLLECTION].update_one(
+        {"_id": collection},
+        {"$inc": {"version": 1}, "$set": {"operation": "sync", "doc_id": None, "origin": "other", "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def test_poll_applies_only_new_versions(client):
+    watcher = VersionWatcher(mode="poll")
+    await watcher.prime()
+    await bump_elsewhere("projects")
+
+    await watcher.poll()
+    assert watcher.remote_changes == 1
+    assert events.current_version("projects") == 1
+
+    # Already applied: seen again through the look-back, but nothing to do
+    await watcher.poll()
+    assert watcher.remote_changes == 1
+
+
+async def test_remote_write_reaches_local_caches(client):
+    watcher = VersionWatcher(mode="poll")
+    await watcher.prime()
+    etag = (await client.get("/projects/get")).headers["etag"]
+
+    # Written by another worker: straight to MongoDB, then the version bump
+    await db.projects.insert_one(project("remote"))
+    await bump_elsewhere("projects")
+    await watcher.poll()
+
+    response = await client.get("/projects/get", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["remote"]
+
+
+async def test_outage_marks_replicas_stale_until_rebuilt(client):
+    await client.post("/projects/post", json=project("alpha"))
+    watcher = VersionWatcher(mode="poll")
+    await watcher.prime()
+
+    watcher.mark_stale()
+    assert "projects" in replica.stats()["stale"]
+    assert watcher.stats()["stale"]
+
+    await watcher.poll()
+    assert replica.stats()["stale"] == []
+    assert not watcher.stats()["stale"]
+    assert (await client.get("/search/get", params={"q": "alpha"})).json()["total"] == 1
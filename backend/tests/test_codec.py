@@ -0,0 +1,57 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import orjson
+import pytest
+from bson import Decimal128, ObjectId
+from app.core.codec import CodecJSONResponse, document_serializer, encode
+from app.schemas.skill_schema import SkillUploadOut
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+ID = ObjectId("0123456789abcdef01234567")
+
+
+def test_bson_types_are_encoded():
+    content = {
+        "_id": ID,
+        "price": Decimal128(Decimal("9.90")),
+        "data": b"\x00\xff",
+        "tags": frozenset(["a"]),
+        "model": SkillUploadOut(id="1", image_hash="abc"),
+        "at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        "on": date(2024, 5, 1),
+    }
+    assert orjson.loads(encode(content)) == {
+        "_id": "0123456789abcdef01234567",
+        "price": "9.90",
+        "data": "AP8=",
+        "tags": ["a"],
+        "model": {"id": "1", "filename": None, "image_hash": "abc"},
+        "at": "2024-05-01T12:30:00+00:00",
+        "on": "2024-05-01",
+    }
+
+
+def test_unknown_type_is_an_error():
+    with pytest.raises(TypeError):
+        encode({"value": object()})
+
+
+def test_document_serializer_narrows_dates():
+    serialize = document_serializer("start_date")
+    doc = serialize({"_id": ID, "start_date": datetime(2020, 1, 1), "name": "x"})
+    assert doc == {"id": "0123456789abcdef01234567", "start_date": date(2020, 1, 1), "name": "x"}
+
+
+def test_codec_response_renders_raw_documents():
+    response = CodecJSONResponse({"projects": [{"_id": ID}]})
+    assert response.media_type == "application/json"
+    assert orjson.loads(response.body) == {"projects": [{"_id": "0123456789abcdef01234567"}]}
+
+
+async def test_export_is_encoded_by_the_codec(client):
+    created = (await client.post("/projects/post", json=project("A"))).json()
+    response = await client.get("/portfolio/export")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["projects"][0]["id"] == created["id"]
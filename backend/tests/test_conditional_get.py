@@ -0,0 +1,67 @@
+import pytest
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_matching_etag_gets_304(client):
+    await client.post("/projects/post", json=project("A"))
+    first = await client.get("/projects/get")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = await client.get("/projects/get", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    # Weak comparison, as proxies may add W/
+    assert (await client.get("/projects/get", headers={"If-None-Match": f'"other", W/{etag}'})).status_code == 304
+
+
+async def test_repeated_reads_come_from_the_cache(client):
+    await client.post("/projects/post", json=project("A"))
+    assert (await client.get("/projects/get")).headers["x-cache"] == "MISS"
+    assert (await client.get("/projects/get")).headers["x-cache"] == "HIT"
+
+
+async def test_write_changes_the_etag_and_the_body(client):
+    created = (await client.post("/projects/post", json=project("A"))).json()
+    before = await client.get("/projects/get")
+
+    await client.patch(f"/projects/update/{created['id']}", json={"name": "B"})
+
+    after = await client.get("/projects/get", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert after.headers["x-cache"] == "MISS"
+    assert [item["name"] for item in after.json()] == ["B"]
+
+
+async def test_item_etag_follows_its_collection(client):
+    created = (await client.post("/projects/post", json=project("A"))).json()
+    url = f"/projects/get/{created['id']}"
+    etag = (await client.get(url)).headers["etag"]
+
+    await client.delete(f"/projects/delete/{created['id']}")
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 404
+
+
+async def test_portfolio_is_invalidated_by_any_of_its_sections(client):
+    first = await client.get("/portfolio/get")
+    etag = first.headers["etag"]
+    assert first.json()["certificates"] == []
+
+    certificate = {"title": "C", "issuer": "I", "issue_date": None, "expiration_date": None, "description": None, "certificate_url": None}
+    await client.post("/certificates/post", json=certificate)
+
+    after = await client.get("/portfolio/get", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert [item["title"] for item in after.json()["certificates"]] == ["C"]
+
+
+async def test_unrelated_write_keeps_the_etag(client):
+    etag = (await client.get("/projects/get")).headers["etag"]
+    certificate = {"title": "C", "issuer": "I", "issue_date": None, "expiration_date": None, "description": None, "certificate_url": None}
+    await client.post("/certificates/post", json=certificate)
+    assert (await client.get("/projects/get", headers={"If-None-Match": etag})).status_code == 304
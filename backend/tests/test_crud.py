@@ -0,0 +1,76 @@
+import pytest
+from app.services.analytics import analytics
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+MISSING_ID = "0123456789abcdef01234567"
+
+
+async def create(client, name="Portfolio", **fields) -> dict:
+    response = await client.post("/projects/post", json=project(name, **fields))
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_create_and_get(client):
+    created = await create(client, technologies=["FastAPI"])
+    assert created["name"] == "Portfolio"
+
+    response = await client.get(f"/projects/get/{created['id']}")
+    assert response.status_code == 200
+    assert response.json() == created
+
+
+async def test_status_codes(client):
+    assert (await client.get("/projects/get/not-an-id")).status_code == 400
+    assert (await client.get(f"/projects/get/{MISSING_ID}")).status_code == 404
+    assert (await client.post("/projects/post", json={"description": "no name"})).status_code == 422
+    assert (await client.put(f"/projects/update/{MISSING_ID}", json=project("x"))).status_code == 404
+    assert (await client.patch(f"/projects/update/{MISSING_ID}", json={"name": "x"})).status_code == 404
+    assert (await client.delete(f"/projects/delete/{MISSING_ID}")).status_code == 404
+    assert (await client.delete("/projects/delete/not-an-id")).status_code == 400
+
+
+async def test_patch_changes_only_the_fields_sent(client):
+    created = await create(client, description="before", technologies=["Go"])
+
+    response = await client.patch(f"/projects/update/{created['id']}", json={"description": "after"})
+    assert response.status_code == 200
+    assert response.json() == {**created, "description": "after"}
+
+    # Nothing to change is still a success
+    response = await client.patch(f"/projects/update/{created['id']}", json={})
+    assert response.status_code == 200
+    assert response.json()["description"] == "after"
+
+
+async def test_patch_rejects_null_for_required_fields(client):
+    created = await create(client)
+    response = await client.patch(f"/projects/update/{created['id']}", json={"name": None})
+    assert response.status_code == 422
+
+
+async def test_put_requires_the_full_document(client):
+    created = await create(client, description="d")
+    assert (await client.put(f"/projects/update/{created['id']}", json={"name": "only"})).status_code == 422
+
+    response = await client.put(f"/projects/update/{created['id']}", json=project("renamed", description="new"))
+    assert response.status_code == 200
+    assert response.json()["name"] == "renamed"
+    assert response.json()["description"] == "new"
+
+
+async def test_delete(client):
+    created = await create(client)
+    response = await client.delete(f"/projects/delete/{created['id']}")
+    assert response.status_code == 200
+    assert (await client.get(f"/projects/get/{created['id']}")).status_code == 404
+
+
+async def test_view_is_counted_only_when_the_body_is_served(client):
+    created = await create(client)
+    first = await client.get(f"/projects/get/{created['id']}")
+    again = await client.get(f"/projects/get/{created['id']}", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert analytics.counter.pending() == 1
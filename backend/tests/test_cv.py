@@ -0,0 +1,49 @@
+import pytest
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+async def status(client) -> tuple:
+    counts = (await client.get("/cv/status")).json()
+    return counts["section_renders"], counts["document_builds"]
+
+
+async def test_pdf_and_json_resume(client):
+    await client.post("/projects/post", json=project("Tracker", description="Time tracking"))
+
+    pdf = await client.get("/cv/get")
+    assert pdf.headers["content-type"] == "application/pdf"
+    assert pdf.content.startswith(b"%PDF-")
+
+    resume = (await client.get("/cv/get", params={"format": "json"})).json()
+    assert [item["name"] for item in resume["projects"]] == ["Tracker"]
+    assert pdf.headers["etag"] != (await client.get("/cv/get", params={"format": "json"})).headers["etag"]
+
+
+async def test_unchanged_data_is_served_from_memory(client):
+    await client.get("/cv/get")
+    assert await status(client) == (6, 1)
+    await client.get("/cv/get", params={"format": "json"})
+    assert await status(client) == (6, 1)
+
+
+async def test_write_rerenders_only_its_section(client):
+    created = (await client.post("/projects/post", json=project("A"))).json()
+    etag = (await client.get("/cv/get")).headers["etag"]
+    renders, builds = await status(client)
+
+    await client.patch(f"/projects/update/{created['id']}", json={"name": "B"})
+    after = await client.get("/cv/get")
+    assert after.headers["etag"] != etag
+    assert await status(client) == (renders + 1, builds + 1)
+
+
+async def test_write_without_visible_change_keeps_the_document(client):
+    created = (await client.post("/projects/post", json=project("A"))).json()
+    etag = (await client.get("/cv/get")).headers["etag"]
+    counts = await status(client)
+
+    await client.patch(f"/projects/update/{created['id']}", json={"name": "A"})
+    assert (await client.get("/cv/get", headers={"If-None-Match": etag})).status_code == 304
+    assert await status(client) == counts
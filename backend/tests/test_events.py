@@ -0,0 +1,15 @@
+import pytest
+from app.core.events import published_collections
+
+pytestmark = pytest.mark.anyio
+
+
+def test_every_published_collection_can_be_followed():
+    for name in ("projects", "experiences", "phones", "tech_stacks", "view_timeline", "view_technologies"):
+        assert name in published_collections()
+
+
+async def test_unknown_collection_is_rejected(client):
+    response = await client.get("/events/stream", params={"collections": "phones,nope"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown collections: nope"
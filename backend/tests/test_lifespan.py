@@ -0,0 +1,61 @@
+import pytest
+from app import main
+from app.core.settings import get_settings
+from app.db.database import mongo
+from app.db.indexes import CONTROL_INDEXES
+from app.services.cache_sync import version_watcher
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def environ(monkeypatch):
+    yield monkeypatch
+    monkeypatch.undo()
+    get_settings.cache_clear()
+
+
+def test_settings_are_read_from_the_environment(environ):
+    environ.setenv("MONGO_MAX_POOL_SIZE", "7")
+    environ.setenv("MONGO_COMPRESSORS", "zstd, zlib,")
+    environ.setenv("MONGO_WARM_UP", "off")
+    environ.setenv("CACHE_TTL_SECONDS", "1.5")
+    get_settings.cache_clear()
+
+    settings = get_settings()
+    assert settings.mongo_max_pool_size == 7
+    assert settings.mongo_compressors == ("zstd", "zlib")
+    assert settings.mongo_warm_up is False
+    assert settings.cache_ttl_seconds == 1.5
+    # Read once: later calls share the same instance
+    assert get_settings() is settings
+
+
+@pytest.fixture
+async def bootstrapped(database):
+    mongo.ready = False
+    await main.bootstrap_database()
+    yield database
+    await version_watcher.stop()
+    await main.replica.stop()
+
+
+async def test_bootstrap_creates_indexes_and_warms_the_cache(bootstrapped, client):
+    assert mongo.ready
+    assert {"name_id", "technologies"} <= set(await mongo.database().projects.index_information())
+    for name, models in CONTROL_INDEXES.items():
+        names = set(await mongo.control_database()[name].index_information())
+        assert {model.document["name"] for model in models} <= names
+
+    # The portfolio was primed before the first request
+    assert (await client.get("/portfolio/get")).headers["x-cache"] == "HIT"
+
+
+async def test_readiness(client):
+    assert (await client.get("/health/live")).json() == {"status": "ok"}
+    assert (await client.get("/health/ready")).status_code == 200
+
+    mongo.ready = False
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Starting up"
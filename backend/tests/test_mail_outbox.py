@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app.db.database import control_db
+from app.services import mailer
+
+pytestmark = pytest.mark.anyio
+
+OWNER = "owner@example.com"
+CONTACT = {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com", "message": "Hello"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Mailbox:
+    """aiosmtpd handler: records what it accepts, or answers `reply`."""
+
+    def __init__(self):
+        self.messages = []
+        self.reply = None
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reply:
+            return self.reply
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    mailbox = Mailbox()
+    controller = Controller(mailbox, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(mailer, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(mailer, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(mailer, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(mailer, "SMTP_TIMEOUT", 5)
+    monkeypatch.setattr(mailer, "EMAIL_ADDRESS", OWNER)
+    monkeypatch.setattr(mailer, "EMAIL_PASSWORD", "")
+    yield mailbox
+    controller.stop()
+
+
+@pytest.fixture
+def worker():
+    worker = mailer.MailWorker()
+    yield worker
+    worker.connection.close()
+
+
+async def submit(client, count=1) -> list:
+    ids = []
+    for _ in range(count):
+        response = await client.post("/contact/post", json=CONTACT)
+        assert response.status_code == 202
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def outbox() -> list:
+    return await control_db.contact_outbox.find().sort("created_at", 1).to_list(length=None)
+
+
+def seconds_from_now(value: datetime) -> float:
+    # mongomock hands back naive UTC datetimes
+    return (value.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+
+
+async def test_queued_message_is_delivered(client, smtp, worker):
+    await submit(client, 2)
+    doc = (await outbox())[0]
+    assert doc["status"] == "pending"
+    assert doc["recipient"] == OWNER
+
+    assert await worker.drain_once() == 2
+    assert [doc["status"] for doc in await outbox()] == ["sent", "sent"]
+    assert len(smtp.messages) == 2
+    assert smtp.messages[0].rcpt_tos == [OWNER]
+    assert b"Reply-To: ada@example.com" in smtp.messages[0].content
+
+    # Nothing left to claim
+    assert await worker.drain_once() == 0
+
+
+async def test_transient_failure_is_retried_with_backoff(client, smtp, worker):
+    await submit(client)
+    smtp.reply = "451 4.3.0 Try again later"
+
+    assert await worker.drain_once() == 1
+    doc = (await outbox())[0]
+    assert doc["status"] == "pending"
+    assert doc["attempts"] == 1
+    assert "451" in doc["last_error"]
+    assert "locked_at" not in doc
+    assert seconds_from_now(doc["next_attempt_at"]) > mailer.MAIL_RETRY_BASE_SECONDS * 0.7
+
+    # Not due yet
+    assert await worker.drain_once() == 0
+
+    smtp.reply = None
+    await control_db.contact_outbox.update_one({"_id": doc["_id"]}, {"$set": {"next_attempt_at": datetime.now(timezone.utc)}})
+    assert await worker.drain_once() == 1
+    doc = (await outbox())[0]
+    assert doc["status"] == "sent"
+    assert doc["attempts"] == 1
+
+
+async def test_permanent_failure_goes_to_dead_letter(client, smtp, worker):
+    await submit(client)
+    smtp.reply = "550 5.1.1 Mailbox unavailable"
+
+    assert await worker.drain_once() == 1
+    doc = (await outbox())[0]
+    assert doc["status"] == "dead"
+    assert doc["attempts"] == 1
+    assert await worker.drain_once() == 0
+
+
+async def test_connect_failure_releases_the_rest_of_the_batch(client, smtp, worker, monkeypatch):
+    await submit(client, 3)
+    monkeypatch.setattr(mailer, "SMTP_PORT", free_port())  # nothing listens there
+
+    assert await worker.drain_once() == 3
+    first, *rest = await outbox()
+    assert first["status"] == "pending"
+    assert first["attempts"] == 1
+    for doc in rest:
+        # Never tried, so no attempt is counted
+        assert doc["status"] == "pending"
+        assert doc["attempts"] == 0
+        assert doc["last_error"].startswith("connect failed")
+        assert seconds_from_now(doc["next_attempt_at"]) > 0
+    assert smtp.messages == []
+
+
+async def test_stale_claims_are_released(client, worker):
+    await submit(client)
+    long_ago = datetime.now(timezone.utc) - timedelta(seconds=mailer.MAIL_LOCK_SECONDS + 60)
+    await control_db.contact_outbox.update_many({}, {"$set": {"status": "sending", "locked_at": long_ago}})
+
+    await worker.release_stale_claims()
+    assert (await outbox())[0]["status"] == "pending"
+
+
+@pytest.mark.parametrize("email", ["ada@example.com\r\nBcc: victim@example.com", "ada@example.com, victim@example.com"])
+async def test_reply_to_injection_is_rejected(client, smtp, email):
+    response = await client.post("/contact/post", json={**CONTACT, "email": email})
+    assert response.status_code == 422
+    assert await outbox() == []
+
+
+def test_legacy_payload_gets_no_reply_to():
+    doc = {"payload": {**CONTACT, "email": "ada@example.com\nBcc: victim@example.com"}, "recipient": OWNER}
+    assert "Reply-To" not in mailer.build_message(doc)
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+import pytest
+from app.core.metrics import Histogram, MongoCommandListener, RequestTimings, mongo_duration, mongo_failures, request_timings
+
+pytestmark = pytest.mark.anyio
+
+MISSING_ID = "0123456789abcdef01234567"
+
+
+def command_event(name: str, command: dict = None, request_id: int = 1, micros: int = 2_000):
+    return SimpleNamespace(command_name=name, command=command or {}, connection_id=("db", 27017), request_id=request_id, duration_micros=micros)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/a")
+    assert histogram.render()[2:] == [
+        'demo_seconds_bucket{route="/a",le="0.1"} 1',
+        'demo_seconds_bucket{route="/a",le="1.0"} 3',
+        'demo_seconds_bucket{route="/a",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a"} 4.25',
+        'demo_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_mongo_commands_are_timed_per_collection():
+    listener = MongoCommandListener()
+    timings = RequestTimings()
+    token = request_timings.set(timings)
+    try:
+        listener.started(command_event("find", {"find": "metrics_demo"}))
+        listener.succeeded(command_event("find"))
+        listener.started(command_event("getMore", {"getMore": 1, "collection": "metrics_demo"}, request_id=2))
+        listener.failed(command_event("getMore", request_id=2))
+        # Not a timed command
+        listener.started(command_event("ping", {"ping": 1}, request_id=3))
+        listener.succeeded(command_event("ping", request_id=3))
+    finally:
+        request_timings.reset(token)
+
+    assert (timings.mongo_commands, timings.mongo_seconds) == (2, 0.004)
+    rendered = "\n".join(mongo_duration.render() + mongo_failures.render())
+    assert 'mongodb_command_duration_seconds_count{collection="metrics_demo",command="find"} 1' in rendered
+    assert 'mongodb_command_failures_total{collection="metrics_demo",command="getMore"} 1' in rendered
+    assert 'command="ping"' not in rendered
+
+
+async def test_routes_are_labelled_by_template(client):
+    await client.get(f"/projects/get/{MISSING_ID}")
+    await client.get("/no/such/route")
+
+    response = await client.get("/metrics")
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/projects/get/{id}",status="404"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/projects/get/{id}"}' in body
+    assert 'route="unmatched"' in body
+    assert MISSING_ID not in body
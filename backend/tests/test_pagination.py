@@ -0,0 +1,64 @@
+import pytest
+from app.core.replica import replica
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+# Duplicates, so pages also have to break ties by _id
+NAMES = ["delta", "alpha", "echo", "bravo", "alpha", "charlie", "foxtrot"]
+
+
+@pytest.fixture(params=["replica", "mongodb"])
+async def projects(request, client):
+    for name in NAMES:
+        await client.post("/projects/post", json=project(name, description=f"about {name}"))
+    if request.param == "mongodb":
+        # Reads go to MongoDB while the replica is stale
+        replica.mark_stale()
+    return client
+
+
+async def read_all(client, **params) -> tuple:
+    items, pages, cursor = [], 0, None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/projects/get", params=query)
+        assert response.status_code == 200
+        items.extend(response.json())
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return items, pages
+
+
+async def test_pages_cover_every_document_once(projects):
+    items, pages = await read_all(projects, limit=3, sort="name")
+    assert [item["name"] for item in items] == sorted(NAMES)
+    assert len({item["id"] for item in items}) == len(NAMES)
+    assert pages == 3
+
+
+async def test_descending_sort(projects):
+    items, _ = await read_all(projects, limit=2, sort="-name")
+    assert [item["name"] for item in items] == sorted(NAMES, reverse=True)
+
+
+async def test_last_page_has_no_cursor(projects):
+    response = await projects.get("/projects/get", params={"limit": len(NAMES)})
+    assert len(response.json()) == len(NAMES)
+    assert "x-next-cursor" not in response.headers
+
+
+async def test_field_projection(projects):
+    response = await projects.get("/projects/get", params={"fields": "name", "limit": 1})
+    assert set(response.json()[0]) == {"id", "name"}
+
+
+async def test_bad_parameters(projects):
+    assert (await projects.get("/projects/get", params={"sort": "description"})).status_code == 400
+    assert (await projects.get("/projects/get", params={"fields": "secret"})).status_code == 400
+    assert (await projects.get("/projects/get", params={"cursor": "garbage"})).status_code == 400
+
+    # A cursor only continues the sort it was issued for
+    cursor = (await projects.get("/projects/get", params={"limit": 1, "sort": "name"})).headers["x-next-cursor"]
+    assert (await projects.get("/projects/get", params={"cursor": cursor, "sort": "-name"})).status_code == 400
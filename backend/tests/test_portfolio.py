@@ -0,0 +1,42 @@
+import pytest
+from app.api import routes_portfolio
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+CERTIFICATE = {"title": "C", "issuer": "I", "issue_date": None, "expiration_date": None, "description": None, "certificate_url": None}
+
+
+async def test_every_section_in_one_document(client):
+    await client.post("/projects/post", json=project("A"))
+    await client.post("/certificates/post", json=CERTIFICATE)
+
+    portfolio = (await client.get("/portfolio/get")).json()
+    assert list(portfolio) == list(routes_portfolio.SECTIONS)
+    assert [item["name"] for item in portfolio["projects"]] == ["A"]
+    assert [item["title"] for item in portfolio["certificates"]] == ["C"]
+    assert portfolio["skills"] == []
+    assert "next_cursors" not in portfolio
+
+
+async def test_selected_sections_in_a_stable_order(client):
+    response = await client.get("/portfolio/get", params={"sections": "skills, projects,projects"})
+    assert response.status_code == 200
+    assert list(response.json()) == ["projects", "skills"]
+
+
+async def test_unknown_section_is_rejected(client):
+    response = await client.get("/portfolio/get", params={"sections": "projects,hobbies"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown section(s): hobbies"
+
+
+async def test_long_sections_continue_through_their_own_endpoint(client, monkeypatch):
+    monkeypatch.setattr(routes_portfolio, "MAX_PAGE_SIZE", 2)
+    for name in "ABC":
+        await client.post("/projects/post", json=project(name))
+
+    portfolio = (await client.get("/portfolio/get", params={"sections": "projects"})).json()
+    assert len(portfolio["projects"]) == 2
+    rest = (await client.get("/projects/get", params={"cursor": portfolio["next_cursors"]["projects"]})).json()
+    assert [item["name"] for item in portfolio["projects"] + rest] == ["A", "B", "C"]
@@ -0,0 +1,72 @@
+import sys
+import pytest
+from app.api import routes_debug
+from app.core import profiling
+from app.core.profiling import Profile, ProfileStore
+
+pytestmark = pytest.mark.anyio
+
+TOKEN = "test-profile-token"
+MISSING_ID = "0123456789abcdef01234567"
+DEBUG = {"X-Debug-Token": TOKEN}
+
+
+@pytest.fixture
+def profiler(client, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(routes_debug, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "profile_store", ProfileStore())
+    monkeypatch.setattr(routes_debug, "profile_store", profiling.profile_store)
+    return client
+
+
+async def test_off_without_a_token(client):
+    response = await client.get("/projects/get", headers={"X-Profile": ""})
+    assert "x-profile-id" not in response.headers
+    assert (await client.get("/debug/slow", headers={"X-Debug-Token": ""})).status_code == 404
+
+
+async def test_profiled_on_request(profiler):
+    assert "x-profile-id" not in (await profiler.get("/projects/get", headers={"X-Profile": "wrong"})).headers
+    response = await profiler.get("/projects/get", headers={"X-Profile": TOKEN})
+    profile_id = response.headers["x-profile-id"]
+
+    assert (await profiler.get("/debug/profiles", headers={"X-Debug-Token": "wrong"})).status_code == 403
+    [summary] = (await profiler.get("/debug/profiles", headers=DEBUG)).json()["profiles"]
+    assert (summary["id"], summary["path"], summary["reason"], summary["status"]) == (profile_id, "/projects/get", "header", 200)
+
+    folded = await profiler.get(f"/debug/profiles/{profile_id}", headers=DEBUG)
+    assert folded.status_code == 200
+    assert folded.headers["content-disposition"] == f'attachment; filename="profile-{profile_id}.folded"'
+    assert (await profiler.get("/debug/profiles/nope", headers=DEBUG)).status_code == 404
+
+
+async def test_concurrent_profiles_are_capped(profiler, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_CONCURRENT", 0)
+    assert "x-profile-id" not in (await profiler.get("/projects/get", headers={"X-Profile": TOKEN})).headers
+
+
+async def test_samples_are_labelled_by_task():
+    profile = Profile("GET", "/", "header")
+    profile.sample(sys._current_frames())
+    [stack] = profile.stacks
+    assert stack.startswith("[request];")
+    assert "test_samples_are_labelled_by_task (test_profiling.py:" in stack
+    assert profile.folded() == f"{stack} 1\n"
+
+
+async def test_stored_profiles_are_bounded():
+    store = ProfileStore(max_stored=2)
+    profiles = [Profile("GET", "/", "sampled") for _ in range(3)]
+    for profile in profiles:
+        store.save(profile)
+    assert [summary["id"] for summary in store.list()] == [profiles[2].id, profiles[1].id]
+
+
+async def test_slow_requests_are_logged(profiler, monkeypatch):
+    monkeypatch.setattr(profiling, "SLOW_REQUEST_SECONDS", 1e-9)
+    await profiler.get(f"/projects/get/{MISSING_ID}")
+
+    entry = (await profiler.get("/debug/slow", headers=DEBUG)).json()["requests"][-1]
+    assert (entry["method"], entry["route"], entry["status"], entry["profile_id"]) == ("GET", "/projects/get/{id}", 404, None)
+    assert {"total_ms", "mongo_ms", "mongo_commands", "serialize_ms", "response_bytes"} <= set(entry)
@@ -0,0 +1,74 @@
+import base64
+import pytest
+from bson import ObjectId
+from app.core import events
+from app.core.replica import ReplicaStore, replica
+from app.db.database import db
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+async def create(client, name: str) -> ObjectId:
+    return ObjectId((await client.post("/projects/post", json=project(name))).json()["id"])
+
+
+async def test_writes_go_through_without_a_reload(client):
+    reloads = replica.stats()["reloads"]
+    doc_id = await create(client, "A")
+    before = replica.snapshot("projects")
+    assert before.by_id[doc_id]["name"] == "A"
+
+    await client.patch(f"/projects/update/{doc_id}", json={"name": "B"})
+    after = replica.snapshot("projects")
+    assert after.by_id[doc_id]["name"] == "B"
+    # Readers holding the old snapshot never see the change half applied
+    assert before.by_id[doc_id]["name"] == "A"
+
+    await client.delete(f"/projects/delete/{doc_id}")
+    assert doc_id not in replica.snapshot("projects").by_id
+    assert replica.stats()["reloads"] == reloads
+
+
+async def test_reads_are_served_from_memory(client):
+    doc_id = await create(client, "A")
+    # Behind the replica's back: not visible until a change event arrives
+    await db.projects.update_one({"_id": doc_id}, {"$set": {"name": "hidden"}})
+    assert (await client.get(f"/projects/get/{doc_id}")).json()["name"] == "A"
+
+    await events.apply_version("projects", events.current_version("projects") + 1, "update", str(doc_id))
+    assert (await client.get(f"/projects/get/{doc_id}")).json()["name"] == "hidden"
+
+
+async def test_bulk_change_reloads_the_collection(client):
+    await create(client, "A")
+    await db.projects.insert_one(project("B"))
+    await events.apply_version("projects", events.current_version("projects") + 1, "bulk", None)
+    assert [item["name"] for item in (await client.get("/projects/get")).json()] == ["A", "B"]
+
+
+async def test_large_legacy_payloads_stay_out_of_memory(client):
+    result = await db.tech_stacks.insert_one({"name": "Old", "content_type": "image/png", "image_data": base64.b64encode(b"x" * 100).decode()})
+    await replica.load("tech_stacks")
+    assert "image_data" not in replica.snapshot("tech_stacks").by_id[result.inserted_id]
+
+
+async def test_failed_reload_keeps_serving_the_last_snapshot(client, monkeypatch):
+    await create(client, "A")
+
+    async def unreachable(collection):
+        raise ConnectionError("MongoDB unreachable")
+
+    monkeypatch.setattr(replica.for_tenant(""), "load", unreachable)
+    await replica.reload("projects")
+    assert replica.stats()["stale"] == ["projects"]
+    assert replica.snapshot("projects") is not None
+    assert [item["name"] for item in (await client.get("/projects/get")).json()] == ["A"]
+
+
+async def test_collection_over_the_quota_is_read_from_mongodb(client):
+    await create(client, "A")
+    store = ReplicaStore(max_bytes=10)
+    await store.load("projects")
+    assert store.snapshot("projects") is None
+    assert store.stats()["over_quota"] == ["projects"]
@@ -0,0 +1,67 @@
+import pytest
+from app.core import cache
+from app.core.cache import ResponseCache
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+def test_least_recently_used_entry_is_evicted():
+    entries = ResponseCache(max_entries=2)
+    entries.set("a", 1, ("projects",))
+    entries.set("b", 2, ("projects",))
+    entries.get("a")
+    entries.set("c", 3, ("projects",))
+    assert entries.get("b") is None
+    assert (entries.get("a"), entries.get("c")) == (1, 3)
+    assert entries.evictions == 1
+
+
+def test_byte_quota():
+    entries = ResponseCache(max_bytes=10)
+    entries.set("a", 1, (), size=6)
+    entries.set("b", 2, (), size=6)
+    assert entries.get("a") is None
+    assert entries.bytes == 6
+
+    # Larger than the whole quota: never cached
+    entries.set("c", 3, (), size=11)
+    assert entries.get("c") is None
+    assert entries.get("b") == 2
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    entries = ResponseCache(ttl=5)
+    entries.set("a", 1, ())
+    now += 6
+    assert entries.get("a") is None
+    assert entries.stats()["entries"] == 0
+
+
+def test_invalidation_drops_only_tagged_entries():
+    entries = ResponseCache()
+    entries.set("projects", 1, ("projects",))
+    entries.set("portfolio", 2, ("projects", "certificates"))
+    entries.set("certificates", 3, ("certificates",))
+    entries.invalidate("projects")
+    assert [entries.get(key) for key in ("projects", "portfolio", "certificates")] == [None, None, 3]
+    assert entries.invalidations == 2
+
+
+async def test_hit_replays_the_page_headers(client):
+    for name in "AB":
+        await client.post("/projects/post", json=project(name))
+    miss = await client.get("/projects/get", params={"limit": 1})
+    hit = await client.get("/projects/get", params={"limit": 1})
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.headers["x-next-cursor"] == miss.headers["x-next-cursor"]
+
+
+async def test_stats_endpoint(client):
+    await client.get("/projects/get")
+    await client.get("/projects/get")
+    stats = (await client.get("/cache/stats")).json()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["entries"] == 1
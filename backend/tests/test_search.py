@@ -0,0 +1,58 @@
+import pytest
+from app.services.search import tokenize
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+async def search(client, **params) -> dict:
+    response = await client.get("/search/get", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def titles(result) -> list:
+    return [hit["title"] for hit in result["results"]]
+
+
+def test_tokens_keep_language_names():
+    assert tokenize("C++, C# and Node.js.") == ["c++", "c#", "and", "node.js"]
+    assert tokenize(["FastAPI", "React"]) == ["fastapi", "react"]
+
+
+async def test_title_matches_rank_first(client):
+    await client.post("/projects/post", json=project("Tracker", description="A rust service"))
+    await client.post("/projects/post", json=project("Rust CLI"))
+
+    assert titles(await search(client, q="rust")) == ["Rust CLI", "Tracker"]
+    # The last word also matches as a prefix, every word must match
+    assert titles(await search(client, q="ru")) == ["Rust CLI", "Tracker"]
+    assert titles(await search(client, q="rust cli")) == ["Rust CLI"]
+
+
+async def test_technology_filter_and_facets(client):
+    await client.post("/projects/post", json=project("Site", technologies=["React", "FastAPI"]))
+    await client.post("/projects/post", json=project("Shop", technologies=["react"]))
+
+    facets = (await client.get("/search/facets")).json()
+    assert facets["technologies"] == {"React": 2, "FastAPI": 1}
+    assert facets["collections"] == {"projects": 2}
+
+    result = await search(client, technology="fastapi")
+    assert titles(result) == ["Site"]
+    assert result["facets"]["technologies"] == {"FastAPI": 1, "React": 1}
+
+
+async def test_index_follows_writes(client):
+    created = (await client.post("/projects/post", json=project("Alpha"))).json()
+    await client.patch(f"/projects/update/{created['id']}", json={"name": "Beta"})
+    assert titles(await search(client, q="alpha")) == []
+    assert titles(await search(client, q="beta")) == ["Beta"]
+
+    await client.delete(f"/projects/delete/{created['id']}")
+    assert (await search(client, q="beta"))["total"] == 0
+
+
+async def test_unknown_collection_is_rejected(client):
+    response = await client.get("/search/get", params={"collections": "projects,hobbies"})
+    assert response.status_code == 400
@@ -0,0 +1,138 @@
+from io import BytesIO
+import asyncio
+import base64
+import pytest
+from bson import ObjectId
+from PIL import Image
+from app.db import blob_store
+from app.db.blob_store import content_hash
+from app.db.database import db
+
+pytestmark = pytest.mark.anyio
+
+SVG = b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+
+
+def png(size=(300, 200)) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGBA", size, (200, 30, 30, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def upload(client, content: bytes, filename="icon.png", content_type="image/png"):
+    return await client.post("/skills/post", params={"name": "Python"}, files={"file": (filename, content, content_type)})
+
+
+async def test_png_upload_is_served_with_security_headers(client):
+    response = await upload(client, png())
+    assert response.status_code == 200
+    icon = (await client.get("/skills/get")).json()[0]
+
+    image = await client.get(icon["image_url"])
+    assert image.status_code == 200
+    assert image.headers["content-type"] == "image/png"
+    assert image.headers["x-content-type-options"] == "nosniff"
+    assert image.headers["content-security-policy"] == "default-src 'none'; sandbox"
+    assert "content-disposition" not in image.headers
+    assert "immutable" in image.headers["cache-control"]
+
+    again = await client.get(icon["image_url"], headers={"If-None-Match": image.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["x-content-type-options"] == "nosniff"
+
+
+async def test_resized_variant(client):
+    await upload(client, png())
+    icon = (await client.get("/skills/get")).json()[0]
+    assert icon["image_sizes"]
+
+    size = icon["image_sizes"][0]
+    response = await client.get(f"/skills/{icon['id']}/image", params={"size": size, "format": "webp"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert max(Image.open(BytesIO(response.content)).size) <= size
+
+
+@pytest.mark.parametrize("content_type", ["image/svg+xml", "image/png"])
+async def test_svg_is_rejected_whatever_the_declared_type(client, content_type):
+    response = await upload(client, SVG, "icon.svg", content_type)
+    assert response.status_code == 400
+    assert "SVG" in response.json()["detail"]
+    assert await db.tech_stacks.count_documents({}) == 0
+    assert await db.blobs.count_documents({}) == 0
+
+
+async def test_unreadable_file_is_rejected(client):
+    response = await upload(client, b"not an image at all")
+    assert response.status_code == 400
+    assert await db.tech_stacks.count_documents({}) == 0
+
+
+async def test_legacy_markup_icon_is_served_as_attachment(client):
+    # Stored inline before uploads were validated, with the client's content type
+    result = await db.tech_stacks.insert_one({
+        "name": "Old", "content_type": "text/html",
+        "image_data": base64.b64encode(b"<script>alert(1)</script>").decode(),
+    })
+    response = await client.get(f"/skills/{result.inserted_id}/image")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+async def test_short_version_does_not_pin_the_cache(client):
+    await upload(client, png())
+    icon = (await client.get("/skills/get")).json()[0]
+    assert "immutable" in (await client.get(icon["image_url"])).headers["cache-control"]
+
+    for v in ("", icon["image_url"][-4:]):
+        response = await client.get(f"/skills/{icon['id']}/image", params={"v": v})
+        assert response.headers["cache-control"] == "public, no-cache"
+
+
+async def test_legacy_icon_without_data_is_not_found(client):
+    result = await db.tech_stacks.insert_one({"name": "Broken", "content_type": "image/png"})
+    response = await client.get(f"/skills/{result.inserted_id}/image")
+    assert response.status_code == 404
+
+
+async def test_upload_is_stored_once_per_content(client):
+    content = png()
+    first = (await upload(client, content)).json()
+    second = (await upload(client, content)).json()
+    assert first["image_hash"] == second["image_hash"] == content_hash(content)
+
+    blob = await db.blobs.find_one({"_id": first["image_hash"]})
+    assert bytes(blob["data"]) == content
+    assert blob["size"] == len(content)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.files = {}
+
+    async def upload_from_stream(self, filename, source, **kwargs):
+        file_id = ObjectId()
+        self.files[file_id] = source.read()
+        # Let the concurrent upload of the same content get this far too
+        await asyncio.sleep(0)
+        return file_id
+
+    async def delete(self, file_id):
+        del self.files[file_id]
+
+
+async def test_concurrent_gridfs_uploads_leave_no_orphan(database, monkeypatch):
+    bucket = FakeBucket()
+    monkeypatch.setattr(blob_store, "GRIDFS_THRESHOLD", 0)
+    monkeypatch.setattr(blob_store, "gridfs_bucket", lambda: bucket)
+
+    content = png()
+    sha256 = content_hash(content)
+    await asyncio.gather(*(
+        blob_store.store_blob_file(BytesIO(content), sha256, len(content), "image/png") for _ in range(3)
+    ))
+
+    blob = await db.blobs.find_one({"_id": sha256})
+    assert list(bucket.files) == [blob["gridfs_id"]]
+    assert bucket.files[blob["gridfs_id"]] == content
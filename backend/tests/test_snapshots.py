@@ -0,0 +1,69 @@
+import gzip
+import hashlib
+import json
+import pytest
+from app.api import routes_snapshot
+from app.services.snapshots import build_snapshots, compress_bodies, write_files
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+
+def test_only_changed_files_are_rewritten(tmp_path):
+    assert write_files(tmp_path, {"a.json": b"1", "a.json.gz": b"z"}) == ["a.json", "a.json.gz"]
+    mtime = (tmp_path / "a.json").stat().st_mtime_ns
+
+    # The gzip sibling is no longer worth keeping
+    assert write_files(tmp_path, {"a.json": b"1"}) == []
+    assert (tmp_path / "a.json").stat().st_mtime_ns == mtime
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.json"]
+
+    assert write_files(tmp_path, {"a.json": b"2"}) == ["a.json"]
+    assert (tmp_path / "a.json").read_bytes() == b"2"
+
+
+def test_compressed_siblings_only_when_smaller():
+    large = json.dumps([{"name": "project", "technologies": ["FastAPI"]}] * 50).encode()
+    files = compress_bodies({"tiny": b"[]", "large": large}, brotli_quality=5)
+    assert "tiny.json.gz" not in files
+    assert gzip.decompress(files["large.json.gz"]) == large
+
+
+@pytest.fixture
+async def snapshots(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(routes_snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    return tmp_path
+
+
+async def test_build_matches_the_api(client, snapshots):
+    await client.post("/projects/post", json=project("A", technologies=["FastAPI"] * 20))
+    result = await build_snapshots(str(snapshots))
+    assert "manifest.json" in result["written"]
+
+    assert json.loads((snapshots / "portfolio.json").read_bytes()) == (await client.get("/portfolio/get")).json()
+    assert json.loads((snapshots / "projects.json").read_bytes()) == (await client.get("/projects/get")).json()
+
+    manifest = json.loads((snapshots / "manifest.json").read_bytes())
+    for name, entry in manifest["files"].items():
+        assert hashlib.sha256((snapshots / name).read_bytes()).hexdigest() == entry["sha256"]
+
+
+async def test_served_precompressed(client, snapshots):
+    assert (await client.get("/snapshots/projects.json")).status_code == 503
+    assert (await client.get("/snapshots/hobbies.json")).status_code == 404
+
+    for name in "ABCDEFGH":
+        await client.post("/projects/post", json=project(name, description="a portfolio project"))
+    await build_snapshots(str(snapshots))
+
+    response = await client.get("/snapshots/projects.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == (await client.get("/projects/get")).json()
+
+    plain = await client.get("/snapshots/projects.json", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != response.headers["etag"]
+
+    again = await client.get("/snapshots/projects.json", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
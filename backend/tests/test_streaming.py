@@ -0,0 +1,56 @@
+import json
+import pytest
+from app.api.routes_project import PROJECT
+from app.core import query, replica as replica_module
+from app.core.query import ListQuery
+from app.core.replica import replica
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+NDJSON = "application/x-ndjson"
+
+
+@pytest.fixture(params=["replica", "mongodb"])
+async def projects(request, client):
+    for name in "ABCDE":
+        await client.post("/projects/post", json=project(name, technologies=["Go"]))
+    if request.param == "mongodb":
+        # Reads fall through to MongoDB until the replica is reloaded
+        replica.mark_stale()
+    return client
+
+
+def lines(response) -> list:
+    assert response.headers["content-type"] == NDJSON
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+async def test_stream_has_every_document(projects):
+    page = (await projects.get("/projects/get", params={"limit": 2})).json()
+    streamed = lines(await projects.get("/projects/get", params={"format": "ndjson"}))
+    assert [item["name"] for item in streamed] == list("ABCDE")
+    assert streamed[:2] == page
+
+
+async def test_accept_header_limit_and_fields(projects):
+    response = await projects.get("/projects/get", params={"limit": 3, "sort": "-name", "fields": "name"}, headers={"Accept": NDJSON})
+    items = lines(response)
+    assert [item["name"] for item in items] == ["E", "D", "C"]
+    assert all("technologies" not in item for item in items)
+
+
+async def test_output_is_sent_in_chunks(projects, monkeypatch):
+    # Through the resource, so the replica or the MongoDB cursor feeds it;
+    # the ASGI test transport would buffer the chunks back together
+    monkeypatch.setattr(query, "STREAM_CHUNK_BYTES", 1)
+    monkeypatch.setattr(replica_module, "STREAM_CHUNK_BYTES", 1)
+    response = PROJECT.stream(ListQuery(limit=None, stream=True))
+    chunks = [chunk async for chunk in response.body_iterator]
+    assert [json.loads(chunk)["name"] for chunk in chunks] == list("ABCDE")
+
+
+async def test_bad_parameters_fail_before_the_stream(projects):
+    response = await projects.get("/projects/get", params={"format": "ndjson", "sort": "nope"})
+    assert response.status_code == 400
+    assert response.headers["content-type"] == "application/json"
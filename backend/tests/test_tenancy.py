@@ -0,0 +1,111 @@
+import pytest
+from app.core.cache import response_cache
+from app.core.replica import replica
+from app.core.tenancy import tenant_registry
+from app.db.database import control_db, current_tenant
+from app.services.broadcaster import change_broadcaster
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+CONTACT = {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com", "message": "Hello"}
+
+
+@pytest.fixture
+async def tenants(client):
+    for name in ("alice", "bob"):
+        await tenant_registry.create(name, [])
+    return client
+
+
+def listen(tenant: str, last_event_id: str = None):
+    # What GET /events/stream does, without holding a response open
+    token = current_tenant.set(tenant)
+    try:
+        client = change_broadcaster.connect(frozenset(), last_event_id)
+    finally:
+        current_tenant.reset(token)
+    change_broadcaster.clients.add(client)
+    return client
+
+
+def received(client) -> list:
+    messages = []
+    while not client.queue.empty():
+        messages.append(client.queue.get_nowait())
+    return messages
+
+
+async def test_data_is_per_tenant(tenants):
+    assert (await tenants.post("/t/alice/projects/post", json=project("alpha"))).status_code == 200
+    assert [item["name"] for item in (await tenants.get("/t/alice/projects/get")).json()] == ["alpha"]
+    assert (await tenants.get("/t/bob/projects/get")).json() == []
+    assert (await tenants.get("/projects/get")).json() == []
+    assert (await tenants.get("/t/nobody/projects/get")).status_code == 404
+
+
+async def test_cache_is_per_tenant(tenants):
+    bob = await tenants.get("/t/bob/projects/get")
+    await tenants.get("/t/alice/projects/get")
+
+    await tenants.post("/t/alice/projects/post", json=project("alpha"))
+
+    # Alice's write leaves Bob's cached page (and its ETag) alone
+    again = await tenants.get("/t/bob/projects/get")
+    assert again.headers["x-cache"] == "HIT"
+    assert again.headers["etag"] == bob.headers["etag"]
+    assert (await tenants.get("/t/bob/projects/get", headers={"If-None-Match": bob.headers["etag"]})).status_code == 304
+    assert (await tenants.get("/t/alice/projects/get")).headers["x-cache"] == "MISS"
+    assert response_cache.for_tenant("alice") is not response_cache.for_tenant("bob")
+
+
+async def test_replica_is_per_tenant(tenants):
+    await tenants.post("/t/alice/projects/post", json=project("alpha"))
+    # Other tenants' replicas load in the background on first read
+    for name in ("alice", "bob"):
+        await tenants.get(f"/t/{name}/projects/get", params={"limit": 5})
+        await replica.for_tenant(name).loader
+
+    assert replica.for_tenant("alice").stats()["collections"]["projects"] == 1
+    assert replica.for_tenant("bob").stats()["collections"]["projects"] == 0
+    assert replica.stats()["collections"]["projects"] == 0
+
+    await tenants.post("/t/bob/projects/post", json=project("bravo"))
+    assert replica.for_tenant("alice").stats()["collections"]["projects"] == 1
+    assert [item["name"] for item in (await tenants.get("/t/bob/projects/get", params={"limit": 5})).json()] == ["bravo"]
+
+
+async def test_search_is_per_tenant(tenants):
+    await tenants.post("/t/alice/projects/post", json=project("alpha"))
+    alice = (await tenants.get("/t/alice/search/get", params={"q": "alpha"})).json()
+    bob = (await tenants.get("/t/bob/search/get", params={"q": "alpha"})).json()
+    assert alice["total"] == 1
+    assert bob["total"] == 0
+
+
+async def test_events_reach_only_their_tenant(tenants):
+    alice, bob, default = listen("alice"), listen("bob"), listen("")
+    await tenants.post("/t/alice/projects/post", json=project("alpha"))
+
+    assert [b'"collection":"projects"' in message for message in received(alice)] == [True]
+    assert received(bob) == []
+    assert received(default) == []
+
+    # Nor through the replay buffer on reconnect
+    since = change_broadcaster.event_id(0)
+    assert received(listen("bob", since)) == []
+    assert len(received(listen("alice", since))) == 1
+
+
+async def test_contact_mail_goes_to_the_tenants_owner(tenants):
+    # No owner address yet
+    assert (await tenants.post("/t/alice/contact/post", json=CONTACT)).status_code == 503
+
+    personal = {"name": "Alice", "passion": None, "address": None, "phone": None, "email": "alice@example.com",
+                "linkedin": None, "github": None, "birthdate": None}
+    await tenants.post("/t/alice/personals/post", json=personal)
+    assert (await tenants.post("/t/alice/contact/post", json=CONTACT)).status_code == 202
+
+    doc = await control_db.contact_outbox.find_one()
+    assert doc["tenant"] == "alice"
+    assert doc["recipient"] == "alice@example.com"
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from app.core import events
+from app.core.tenancy import tenant_registry
+from app.services import views
+from app.services.views import DerivedViews, view_refresher
+from conftest import project
+
+pytestmark = pytest.mark.anyio
+
+EXPERIENCE = {"Company_name": "Acme", "position": "Engineer", "start_date": "2020-01-01", "end_date": None, "description": "Go services", "website": None}
+CERTIFICATE = {"title": "C", "issuer": "I", "issue_date": "2024-01-01", "expiration_date": None, "description": None, "certificate_url": None}
+
+
+@pytest.fixture
+def pipelines(database, monkeypatch):
+    # mongomock has no $merge: record what would run instead
+    calls = []
+
+    async def refresh_timeline(self, source, ids, stamp):
+        calls.append(("timeline", source, ids))
+
+    async def technology_keys(self, source, ids):
+        calls.append(("keys", source, ids))
+        return {"go"}
+
+    async def refresh_technologies(self, keys, stamp):
+        calls.append(("technologies", keys))
+
+    monkeypatch.setattr(DerivedViews, "refresh_timeline", refresh_timeline)
+    monkeypatch.setattr(DerivedViews, "technology_keys", technology_keys)
+    monkeypatch.setattr(DerivedViews, "refresh_technologies", refresh_technologies)
+    views.derived_views.for_tenant("").built = True
+    view_refresher.pending.clear()
+    yield calls
+    view_refresher.pending.clear()
+
+
+async def test_writes_only_mark_the_views(client, pipelines):
+    created = (await client.post("/projects/post", json=project("alpha", technologies=["Go"]))).json()
+    experience = (await client.post("/experiences/post", json=EXPERIENCE)).json()
+
+    assert pipelines == []
+    assert view_refresher.pending[""] == {
+        "projects": {ObjectId(created["id"])},
+        "experiences": {ObjectId(experience["id"])},
+    }
+    assert (await client.get("/views/status")).json()["pending"] == ["experiences", "projects"]
+
+
+async def test_refresh_covers_only_the_changed_documents(client, pipelines):
+    first = (await client.post("/projects/post", json=project("alpha", technologies=["Go"]))).json()
+    await client.patch(f"/projects/update/{first['id']}", json={"technologies": ["Rust"]})
+    certificate = (await client.post("/certificates/post", json=CERTIFICATE)).json()
+    version = events.current_version(views.TECHNOLOGIES_VIEW)
+
+    await view_refresher.flush()
+    assert pipelines == [
+        ("keys", "projects", [ObjectId(first["id"])]),
+        ("timeline", "certificates", [ObjectId(certificate["id"])]),
+        ("technologies", {"go"}),
+    ]
+    # Published, so cached view responses are dropped
+    assert events.current_version(views.TECHNOLOGIES_VIEW) == version + 1
+    assert view_refresher.pending == {}
+
+
+async def test_experience_or_bulk_change_refreshes_everything(client, pipelines):
+    experience = (await client.post("/experiences/post", json=EXPERIENCE)).json()
+    await client.post("/projects/bulk", json={"operations": [{"op": "insert", "document": project("beta")}]})
+
+    await view_refresher.flush()
+    # Its own timeline entry, but any technology it mentions
+    assert ("timeline", "experiences", [ObjectId(experience["id"])]) in pipelines
+    assert ("technologies", None) in pipelines
+    assert not [call for call in pipelines if call[0] == "keys"]
+    assert view_refresher.pending == {}
+
+
+def test_many_changes_collapse_into_a_whole_collection_refresh():
+    view_refresher.pending.clear()
+    for _ in range(views.VIEWS_MAX_PENDING_IDS + 1):
+        view_refresher.mark("", "projects", str(ObjectId()))
+    assert view_refresher.pending[""]["projects"] is None
+    view_refresher.pending.clear()
+
+
+async def test_changes_are_kept_per_tenant(client, pipelines):
+    await tenant_registry.create("alice", [])
+    await client.post("/t/alice/projects/post", json=project("alpha"))
+    assert set(view_refresher.pending) == {"alice"}
+
+
+async def test_burst_of_writes_is_refreshed_once(client, pipelines, monkeypatch):
+    monkeypatch.setattr(views, "VIEWS_DEBOUNCE_SECONDS", 0.05)
+    view_refresher.start()
+    try:
+        for name in ("a", "b", "c"):
+            await client.post("/projects/post", json=project(name))
+        await asyncio.sleep(0.3)
+    finally:
+        await view_refresher.stop()
+    keys = [call for call in pipelines if call[0] == "keys"]
+    assert len(keys) == 1
+    assert len(keys[0][2]) == 3
@@ -49,7 +49,7 @@ type Skill = {
   name: string;
   image_filename: string;
   content_type?: string;
-  image_data?: string; // Base64 encoded image
+  image_url?: string; // Path of the icon served by the backend
 };
 
 type Certificate = {
@@ -80,57 +80,55 @@ export default function About() {
   const [formMessage, setFormMessage] = useState<string | null>(null);
   const [formError, setFormError] = useState<string | null>(null);
 
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const personalRes = await fetch("http://localhost:8000/personals/get");
-        if (!personalRes.ok) throw new Error("Failed to fetch personal info");
-        const personalData = await personalRes.json();
-        setPersonal(personalData.length > 0 ? personalData[0] : null);
-
-        const educationRes = await fetch("http://localhost:8000/educations/get");
-        if (!educationRes.ok) throw new Error("Failed to fetch education info");
-        const educationData = await educationRes.json();
-        setEducations(educationData);
-
-        const experienceRes = await fetch("http://localhost:8000/experiences/get");
-        if (!experienceRes.ok) throw new Error("Failed to fetch experience info");
-        const experienceData = await experienceRes.json();
-
-        const sortedExperiences = experienceData.sort((a: Experience, b: Experience) => {
-          const dateA = a.start_date ? new Date(a.start_date).getTime() : 0;
-          const dateB = b.start_date ? new Date(b.start_date).getTime() : (new Date()).getTime(); // 'Present' or future dates come last
-          
-          if (a.end_date === 'Present' && b.end_date !== 'Present') return -1;
-          if (a.end_date !== 'Present' && b.end_date === 'Present') return 1;
-          if (a.end_date === 'Present' && b.end_date === 'Present') {
-              const startDateA = a.start_date ? new Date(a.start_date).getTime() : 0;
-              const startDateB = b.start_date ? new Date(b.start_date).getTime() : 0;
-              return startDateB - startDateA;
-          }
+  // Sets the state of every section present in a /portfolio/get response
+  const applyPortfolio = (portfolioData: any) => {
+    if (portfolioData.personal) {
+      const personalData = portfolioData.personal;
+      setPersonal(personalData.length > 0 ? personalData[0] : null);
+    }
 
-          if (isNaN(dateA) && isNaN(dateB)) return 0;
-          if (isNaN(dateA)) return 1;
-          if (isNaN(dateB)) return -1;
-          return dateB - dateA;
-        });
-        setExperiences(sortedExperiences);
+    if (portfolioData.educations) setEducations(portfolioData.educations);
+
+    if (portfolioData.experiences) {
+      const experienceData = portfolioData.experiences;
+
+      const sortedExperiences = experienceData.sort((a: Experience, b: Experience) => {
+        const dateA = a.start_date ? new Date(a.start_date).getTime() : 0;
+        const dateB = b.start_date ? new Date(b.start_date).getTime() : (new Date()).getTime(); // 'Present' or future dates come last
+        
+        if (a.end_date === 'Present' && b.end_date !== 'Present') return -1;
+        if (a.end_date !== 'Present' && b.end_date === 'Present') return 1;
+        if (a.end_date === 'Present' && b.end_date === 'Present') {
+            const startDateA = a.start_date ? new Date(a.start_date).getTime() : 0;
+            const startDateB = b.start_date ? new Date(b.start_date).getTime() : 0;
+            return startDateB - startDateA;
+        }
 
-        const projectsRes = await fetch("http://localhost:8000/projects/get");
-        if (!projectsRes.ok) throw new Error("Failed to fetch projects info");
-        const projectsData = await projectsRes.json();
-        setProjects(projectsData);
+        if (isNaN(dateA) && isNaN(dateB)) return 0;
+        if (isNaN(dateA)) return 1;
+        if (isNaN(dateB)) return -1;
+        return dateB - dateA;
+      });
+      setExperiences(sortedExperiences);
+    }
 
-        const skillsRes = await fetch("http://localhost:8000/skills/get");
-        if (!skillsRes.ok) throw new Error("Failed to fetch skills info");
-        const skillsData = await skillsRes.json();
-        setSkills(skillsData);
+    if (portfolioData.projects) setProjects(portfolioData.projects);
+    if (portfolioData.skills) setSkills(portfolioData.skills);
+    if (portfolioData.certificates) setCertificates(portfolioData.certificates);
+  };
 
-        const certificatesRes = await fetch("http://localhost:8000/certificates/get");
-        if (!certificatesRes.ok) throw new Error("Failed to fetch certificates info");
-        const certificatesData = await certificatesRes.json();
-        setCertificates(certificatesData);
+  const fetchPortfolio = async (sections?: string[]) => {
+    // One request for the sections asked for (all by default); the backend queries the collections concurrently
+    const query = sections ? `?sections=${sections.join(",")}` : "";
+    const portfolioRes = await fetch(`http://localhost:8000/portfolio/get${query}`);
+    if (!portfolioRes.ok) throw new Error("Failed to fetch portfolio info");
+    applyPortfolio(await portfolioRes.json());
+  };
 
+  useEffect(() => {
+    const fetchData = async () => {
+      try {
+        await fetchPortfolio();
       } catch (err: any) {
         setError(err.message);
       } finally {
@@ -141,6 +139,28 @@ export default function About() {
     fetchData();
   }, []);
 
+  // Refetch only the section a change was made to, instead of polling
+  useEffect(() => {
+    const sectionOf: Record<string, string> = {
+      personal: "personal",
+      educations: "educations",
+      experiences: "experiences",
+      projects: "projects",
+      tech_stacks: "skills",
+      certificates: "certificates",
+    };
+    const events = new EventSource("http://localhost:8000/events/stream");
+    events.addEventListener("change", (event) => {
+      const section = sectionOf[JSON.parse((event as MessageEvent).data).collection];
+      if (section) fetchPortfolio([section]).catch(() => {});
+    });
+    // Sent when changes were missed, e.g. after a reconnect
+    events.addEventListener("resync", () => {
+      fetchPortfolio().catch(() => {});
+    });
+    return () => events.close();
+  }, []);
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center" style={{ backgroundImage: 'url(/Desk.png)', backgroundSize: 'cover', backgroundPosition: 'top center', backgroundRepeat: 'no-repeat' }}>
@@ -501,7 +521,7 @@ export default function About() {
             </a>
 
             <a
-              href="/Sakinu Kulathunga_cv_new_new.pdf" // Replace with your CV file name
+              href="http://localhost:8000/cv/get" // Rendered from the portfolio data
               download
               className="bg-gradient-to-r from-green-500 to-teal-500 hover:from-green-600 hover:to-teal-600 text-white px-8 py-3 rounded-full transition-all duration-300 shadow-lg hover:shadow-xl transform hover:scale-105"
             >
@@ -693,9 +713,9 @@ export default function About() {
                     className={`skill-card hover-lift bg-slate-800/30 backdrop-blur-md rounded-2xl p-4 border border-slate-700/50 hover:bg-slate-700/40 hover:border-slate-600/50 transition-all duration-300 cursor-pointer text-center flex flex-col items-center stagger-${(index % 6) + 1}`}
                     style={{ minWidth: '120px', maxWidth: '150px' }}
                   >
-                    {skill.image_data ? (
+                    {skill.image_url ? (
                       <img
-                        src={skill.image_data}
+                        src={`http://localhost:8000${skill.image_url}${skill.image_url.includes('?') ? '&' : '?'}size=128`}
                         alt={skill.name}
                         className="w-16 h-16 object-contain mb-2 filter grayscale hover:grayscale-0 transition-all duration-300"
                       />